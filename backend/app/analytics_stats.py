@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from app.core.database import _get_session_factory
+from app.services.analysis_store import find_stats_drift, rebuild_stats
+
+logger = logging.getLogger("app.analytics_stats")
+
+
+async def backfill() -> int:
+    async with _get_session_factory()() as session:
+        users = await rebuild_stats(session)
+    logger.info("Rebuilt analytics aggregates for %s users", users)
+    return 0
+
+
+async def check() -> int:
+    async with _get_session_factory()() as session:
+        drift = await find_stats_drift(session)
+    for row in drift:
+        print(json.dumps(row, default=str))
+    if drift:
+        logger.error("Analytics aggregates drifted for %s users; run `python -m app.analytics_stats backfill`", len(drift))
+        return 1
+    logger.info("Analytics aggregates match analysis_reports")
+    return 0
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    parser = argparse.ArgumentParser(prog="python -m app.analytics_stats")
+    parser.add_argument("command", choices=["backfill", "check"])
+    args = parser.parse_args()
+    return asyncio.run(backfill() if args.command == "backfill" else check())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
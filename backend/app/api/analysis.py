@@ -1,63 +1,243 @@
-import hashlib
+import asyncio
 import json
-from datetime import datetime
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
-from app.core.database import get_db_session
-from app.models.schemas import AnalysisSummary, AnalyticsResponse, AnalyzeRequest, AnalyzeResponse
-from app.services.analysis_store import get_analytics, get_recent_reports, save_analysis
-from app.services.ml_client import analyze_with_ml
-from app.services.redis_client import redis
-from app.services.rule_engine import apply_rules
+from app.core.config import get_settings
+from app.core.database import _get_session_factory, get_read_db_session
+from app.models.schemas import (
+    AnalysisJobResponse,
+    AnalysisSummary,
+    AnalyticsResponse,
+    AnalyzeBatchRequest,
+    AnalyzeRequest,
+    AnalyzeResponse,
+)
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_pipeline import cache_key, finalize_analysis, to_response
+from app.services.analysis_store import get_analytics, get_recent_reports, save_analyses
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.job_queue import QueueUnavailableError, enqueue_analysis, get_job
+from app.services.ml_client import analyze_with_ml, stream_analysis_from_ml
+from app.services.report_writer import ReportBufferFullError
+from app.services.rule_cache import rule_cache
+from app.services.rule_engine import apply_rule_set
 from app.services.rule_store import list_rules
+from app.services.single_flight import analysis_flight
 
+settings = get_settings()
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
 
-@router.post("", response_model=AnalyzeResponse)
+@router.post("", response_model=AnalyzeResponse, responses={202: {"model": AnalysisJobResponse}})
 async def analyze_code(
     payload: AnalyzeRequest,
+    mode: Literal["sync", "async"] = "sync",
     user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
-) -> AnalyzeResponse:
-    cache_key = f"analysis:{hashlib.sha256((payload.code + payload.language).encode()).hexdigest()}"
-    cached = await redis.get(cache_key)
+) -> AnalyzeResponse | JSONResponse:
+    if mode == "async":
+        try:
+            job = await enqueue_analysis(user["sub"], payload.model_dump())
+        except QueueUnavailableError as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        return JSONResponse(
+            status_code=202,
+            content=AnalysisJobResponse(**job).model_dump(mode="json"),
+            headers={"Location": f"/analysis/jobs/{job['id']}"},
+        )
+
+    key = cache_key(payload, user["sub"], await rule_cache.version(user["sub"]))
+    cached = await analysis_cache.get(key)
     if cached:
-        data = json.loads(cached)
-        return AnalyzeResponse(**data)
+        return cached
+
+    async def compute() -> str:
+        try:
+            result = await analyze_with_ml(payload.model_dump())
+        except CircuitOpenError as exc:
+            raise HTTPException(
+                status_code=503,
+                detail=f"ML service unavailable: {exc}",
+                headers={"Retry-After": str(int(settings.ml_breaker_reset_seconds))},
+            ) from exc
+        except Exception as exc:
+            raise HTTPException(status_code=503, detail=f"ML service unavailable: {exc}") from exc
+
+        try:
+            async with _get_session_factory()() as db:
+                response = await finalize_analysis(db, user["sub"], payload, result, key)
+        except ReportBufferFullError as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        return response.model_dump_json()
+
+    return AnalyzeResponse.model_validate_json(await analysis_flight.run(key, compute))
+
+
+def _ndjson(event: dict[str, Any], started: float) -> str:
+    return json.dumps({**event, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}, default=str) + "\n"
+
+
+async def _relay_analysis(payload: AnalyzeRequest, user_id: str) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    key = cache_key(payload, user_id, await rule_cache.version(user_id))
+    response = await analysis_cache.get(key)
+    if response:
+        for section in ("bugs", "suggestions", "optimizations"):
+            yield _ndjson({"type": "section", "section": section, "items": getattr(response, section)}, started)
+        yield _ndjson({"type": "complete", "report": response.model_dump(mode="json")}, started)
+        return
+
+    result: dict[str, Any] | None = None
+    try:
+        async with aclosing(stream_analysis_from_ml(payload.model_dump())) as events:
+            async for event in events:
+                if event.get("type") == "section":
+                    yield _ndjson(event, started)
+                elif event.get("type") == "result":
+                    result = event["result"]
+    except Exception as exc:
+        logger.warning("Streaming analysis from the ML service failed", exc_info=True)
+        yield _ndjson({"type": "error", "detail": f"ML service unavailable: {exc}"}, started)
+        return
+
+    if result is None:
+        yield _ndjson({"type": "error", "detail": "ML service ended the stream without a result"}, started)
+        return
+
+    try:
+        async with _get_session_factory()() as db:
+            response = await finalize_analysis(db, user_id, payload, result, key)
+    except ReportBufferFullError as exc:
+        yield _ndjson({"type": "error", "detail": str(exc)}, started)
+        return
+    except Exception as exc:
+        logger.exception("Failed to save streamed analysis")
+        yield _ndjson({"type": "error", "detail": f"Failed to save analysis: {exc}"}, started)
+        return
+    yield _ndjson({"type": "complete", "report": response.model_dump(mode="json")}, started)
+
+
+@router.post("/stream")
+async def analyze_code_stream(
+    payload: AnalyzeRequest,
+    user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    return StreamingResponse(_relay_analysis(payload, user["sub"]), media_type="application/x-ndjson")
+
+
+def _batch_item(index: int, response: AnalyzeResponse, cached: bool, started: float) -> str:
+    return _ndjson(
+        {"type": "item", "index": index, "cached": cached, "provisional": not cached, "report": response.model_dump(mode="json")},
+        started,
+    )
+
+
+async def _relay_batch(items: list[AnalyzeRequest], user_id: str) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    rules_version = await rule_cache.version(user_id)
+    keys = [cache_key(item, user_id, rules_version) for item in items]
+    indexes: dict[str, list[int]] = {}
+    for index, key in enumerate(keys):
+        indexes.setdefault(key, []).append(index)
+
+    cached = await analysis_cache.get_many(keys)
+    for key, response in cached.items():
+        if response is not None:
+            for index in indexes[key]:
+                yield _batch_item(index, response, True, started)
+
+    misses = [key for key, response in cached.items() if response is None]
+    cached_count = len(items) - sum(len(indexes[key]) for key in misses)
+    semaphore = asyncio.Semaphore(max(1, settings.analysis_batch_concurrency))
+
+    async def run(key: str) -> tuple[str, dict[str, Any] | None, str | None]:
+        async with semaphore:
+            try:
+                return key, await analyze_with_ml(items[indexes[key][0]].model_dump()), None
+            except Exception as exc:
+                logger.warning("Batch analysis item failed in the ML service", exc_info=True)
+                return key, None, f"ML service unavailable: {exc}"
+
+    failed = 0
+    computed: dict[str, AnalyzeResponse] = {}
+    reports: list[tuple[str, dict[str, Any], dict[str, Any]]] = []
+    rule_set = None
+    if misses:
+        async with _get_session_factory()() as db:
+            rule_set = await rule_cache.get(user_id, lambda: list_rules(db, user_id=user_id))
+            await db.commit()
+    tasks = [asyncio.create_task(run(key)) for key in misses]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, result, error = await next_done
+            if result is None:
+                failed += len(indexes[key])
+                for index in indexes[key]:
+                    yield _ndjson({"type": "item", "index": index, "error": error}, started)
+                continue
+            payload = items[indexes[key][0]]
+            result = apply_rule_set(rule_set, payload.code, result)
+            report_id = str(uuid.uuid4())
+            response = to_response(report_id, result)
+            computed[key] = response
+            reports.append((report_id, payload.model_dump(), result))
+            for index in indexes[key]:
+                yield _batch_item(index, response, False, started)
+    finally:
+        for task in tasks:
+            task.cancel()
 
     try:
-        result = await analyze_with_ml(payload.model_dump())
+        async with _get_session_factory()() as db:
+            await save_analyses(db, user_id=user_id, reports=reports)
     except Exception as exc:
-        raise HTTPException(status_code=503, detail=f"ML service unavailable: {exc}") from exc
-
-    custom_rules = await list_rules(db, user_id=user["sub"])
-    rule_findings = apply_rules(payload.code, custom_rules)
-    if rule_findings:
-        result["bugs"] = [*result.get("bugs", []), *rule_findings]
-        result["score"] = max(0.0, float(result.get("score", 0.7)) - min(0.4, len(rule_findings) * 0.05))
-
-    report_id = await save_analysis(db, user_id=user["sub"], payload=payload.model_dump(), result=result)
-    response = AnalyzeResponse(
-        id=report_id,
-        suggestions=result.get("suggestions", []),
-        bugs=result.get("bugs", []),
-        optimizations=result.get("optimizations", []),
-        documentation=result.get("documentation", ""),
-        score=float(result.get("score", 0)),
-        created_at=datetime.utcnow(),
+        logger.exception("Failed to persist batch reports")
+        yield _ndjson({"type": "error", "detail": f"Failed to persist batch reports: {exc}"}, started)
+        return
+    await analysis_cache.set_many(computed)
+    yield _ndjson(
+        {
+            "type": "complete",
+            "total": len(items),
+            "cached": cached_count,
+            "analyzed": len(items) - cached_count - failed,
+            "failed": failed,
+            "saved_report_ids": [report_id for report_id, _, _ in reports],
+        },
+        started,
     )
-    await redis.set(cache_key, response.model_dump_json(), ex=300)
-    return response
+
+
+@router.post("/batch")
+async def analyze_code_batch(
+    payload: AnalyzeBatchRequest,
+    user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    return StreamingResponse(_relay_batch(payload.items, user["sub"]), media_type="application/x-ndjson")
+
+
+@router.get("/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def analysis_job(job_id: str, user: dict = Depends(get_current_user)) -> AnalysisJobResponse:
+    job = await get_job(job_id)
+    if not job or job["user_id"] != user["sub"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return AnalysisJobResponse(**job)
 
 
 @router.get("/analytics", response_model=AnalyticsResponse)
 async def analytics(
     user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> AnalyticsResponse:
     data = await get_analytics(db, user_id=user["sub"])
     return AnalyticsResponse(**data)
@@ -65,8 +245,13 @@ async def analytics(
 
 @router.get("/recent", response_model=list[AnalysisSummary])
 async def recent_reports(
+    response: Response,
+    limit: int = Query(12, ge=1, le=100),
+    cursor: str | None = None,
     user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> list[AnalysisSummary]:
-    rows = await get_recent_reports(db, user_id=user["sub"], limit=12)
+    rows, next_cursor = await get_recent_reports(db, user_id=user["sub"], limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [AnalysisSummary(**row) for row in rows]
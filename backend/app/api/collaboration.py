@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
-from app.core.database import get_db_session
+from app.core.config import get_settings
+from app.core.database import (
+    _get_session_factory,
+    get_db_session,
+    get_read_db_session,
+    is_replica_session,
+)
 from app.models.schemas import (
     NotificationResponse,
     ReviewCommentCreateRequest,
@@ -29,12 +39,50 @@ from app.services.collaboration_store import (
 )
 
 router = APIRouter(prefix="/collaboration", tags=["collaboration"])
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 def _can_write(role: str | None) -> bool:
     return role in {"owner", "reviewer"}
 
 
+@asynccontextmanager
+async def _primary_session(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    if not is_replica_session(db):
+        yield db
+        return
+    async with _get_session_factory()() as primary:
+        yield primary
+
+
+def _set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+
+async def _fan_out(room_id: str, sender_id: str, title: str, body: str) -> None:
+    try:
+        async with _get_session_factory()() as db:
+            await create_notifications_for_room(db, room_id, sender_id, title, body)
+    except Exception:
+        logger.exception("Notification fan-out failed for room %s", room_id)
+
+
+async def _notify_room(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    room_id: str,
+    sender_id: str,
+    title: str,
+    body: str,
+) -> None:
+    if settings.notification_fanout_mode == "background":
+        background_tasks.add_task(_fan_out, room_id, sender_id, title, body)
+        return
+    await create_notifications_for_room(db, room_id, sender_id, title, body)
+
+
 @router.post("/rooms", response_model=ReviewRoomResponse)
 async def post_room(
     payload: ReviewRoomCreateRequest,
@@ -47,10 +95,14 @@ async def post_room(
 
 @router.get("/rooms", response_model=list[ReviewRoomResponse])
 async def get_rooms(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
     user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> list[ReviewRoomResponse]:
-    rows = await list_rooms(db, user["sub"])
+    rows, next_cursor = await list_rooms(db, user["sub"], limit=limit, cursor=cursor)
+    _set_next_cursor(response, next_cursor)
     return [ReviewRoomResponse(**row) for row in rows]
 
 
@@ -72,6 +124,7 @@ async def post_participant(
 @router.post("/threads", response_model=ReviewThreadResponse)
 async def post_thread(
     payload: ReviewThreadCreateRequest,
+    background_tasks: BackgroundTasks,
     user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> ReviewThreadResponse:
@@ -80,27 +133,33 @@ async def post_thread(
         raise HTTPException(status_code=403, detail="Insufficient role")
 
     thread = await create_thread(db, payload.room_id, payload.title, user["sub"])
-    await create_notifications_for_room(db, payload.room_id, user["sub"], "New review thread", payload.title)
+    await _notify_room(db, background_tasks, payload.room_id, user["sub"], "New review thread", payload.title)
     return ReviewThreadResponse(**thread)
 
 
 @router.get("/rooms/{room_id}/threads", response_model=list[ReviewThreadResponse])
 async def get_threads(
     room_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
     user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> list[ReviewThreadResponse]:
-    role = await get_user_role(db, room_id, user["sub"])
+    async with _primary_session(db) as primary:
+        role = await get_user_role(primary, room_id, user["sub"])
     if not role:
         raise HTTPException(status_code=403, detail="Not a participant")
 
-    rows = await list_threads(db, room_id)
+    rows, next_cursor = await list_threads(db, room_id, limit=limit, cursor=cursor)
+    _set_next_cursor(response, next_cursor)
     return [ReviewThreadResponse(**row) for row in rows]
 
 
 @router.post("/comments", response_model=ReviewCommentResponse)
 async def post_comment(
     payload: ReviewCommentCreateRequest,
+    background_tasks: BackgroundTasks,
     user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> ReviewCommentResponse:
@@ -110,31 +169,40 @@ async def post_comment(
         raise HTTPException(status_code=403, detail="Insufficient role")
 
     comment = await create_comment(db, payload.thread_id, user["sub"], payload.body, payload.parent_id)
-    await create_notifications_for_room(db, room_id, user["sub"], "New review comment", payload.body[:120])
+    await _notify_room(db, background_tasks, room_id, user["sub"], "New review comment", payload.body[:120])
     return ReviewCommentResponse(**comment)
 
 
 @router.get("/threads/{thread_id}/comments", response_model=list[ReviewCommentResponse])
 async def get_comments(
     thread_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
     user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> list[ReviewCommentResponse]:
-    room_id = await get_room_id_by_thread(db, thread_id)
-    role = await get_user_role(db, room_id, user["sub"])
+    async with _primary_session(db) as primary:
+        room_id = await get_room_id_by_thread(primary, thread_id)
+        role = await get_user_role(primary, room_id, user["sub"])
     if not role:
         raise HTTPException(status_code=403, detail="Not a participant")
 
-    rows = await list_comments(db, thread_id)
+    rows, next_cursor = await list_comments(db, thread_id, limit=limit, cursor=cursor)
+    _set_next_cursor(response, next_cursor)
     return [ReviewCommentResponse(**row) for row in rows]
 
 
 @router.get("/notifications", response_model=list[NotificationResponse])
 async def get_user_notifications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
     user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> list[NotificationResponse]:
-    rows = await list_notifications(db, user["sub"])
+    rows, next_cursor = await list_notifications(db, user["sub"], limit=limit, cursor=cursor)
+    _set_next_cursor(response, next_cursor)
     return [NotificationResponse(**row) for row in rows]
 
 
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
-from app.core.database import get_db_session
-from app.models.schemas import RepoIntegrationResponse
-from app.services.git_providers import list_bitbucket_repos, list_github_repos, list_gitlab_repos
+from app.core.database import _get_session_factory, get_db_session
+from app.models.schemas import RepoAnalysisJobResponse, RepoAnalysisRequest, RepoIntegrationResponse
+from app.services.git_providers import REPO_PROVIDERS, list_bitbucket_repos, list_github_repos, list_gitlab_repos
 from app.services.oauth_store import get_access_token
+from app.services.repo_analysis import create_job, get_job, run_repo_analysis
 
 router = APIRouter(prefix="/integrations", tags=["integrations"])
 
@@ -30,3 +31,30 @@ async def repos(
         raise HTTPException(status_code=404, detail="Provider not supported")
 
     return RepoIntegrationResponse(provider=provider, repositories=repositories)
+
+
+@router.post("/{provider}/repos/analyze", response_model=RepoAnalysisJobResponse, status_code=202)
+async def analyze_repo(
+    provider: str,
+    payload: RepoAnalysisRequest,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session),
+) -> RepoAnalysisJobResponse:
+    if provider not in REPO_PROVIDERS:
+        raise HTTPException(status_code=404, detail="Provider not supported")
+    token = await get_access_token(db, user_id=user["sub"], provider=provider)
+    if not token:
+        raise HTTPException(status_code=404, detail=f"No OAuth connection found for {provider}")
+
+    job = await create_job(user["sub"], provider, payload.repository, payload.room)
+    background_tasks.add_task(run_repo_analysis, dict(job), REPO_PROVIDERS[provider](token), _get_session_factory())
+    return RepoAnalysisJobResponse(**job)
+
+
+@router.get("/jobs/{job_id}", response_model=RepoAnalysisJobResponse)
+async def repo_analysis_job(job_id: str, user: dict = Depends(get_current_user)) -> RepoAnalysisJobResponse:
+    job = await get_job(job_id)
+    if not job or job["user_id"] != user["sub"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return RepoAnalysisJobResponse(**job)
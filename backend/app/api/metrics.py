@@ -0,0 +1,27 @@
+from typing import Any
+
+from fastapi import APIRouter
+
+from app.core.database import database_pool_stats
+from app.core.query_metrics import query_metrics
+from app.services.analysis_cache import analysis_cache
+from app.services.job_queue import queue_stats
+from app.services.ml_client import ml_client_stats
+from app.services.report_writer import report_writer
+from app.services.rule_cache import rule_cache
+from app.services.single_flight import analysis_flight
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def metrics() -> dict[str, Any]:
+    return {
+        "analysis_cache": analysis_cache.stats(),
+        "analysis_queue": await queue_stats(),
+        "database": {**query_metrics.stats(), "pools": database_pool_stats()},
+        "ml_client": ml_client_stats(),
+        "report_writer": report_writer.stats(),
+        "rule_cache": rule_cache.stats(),
+        "single_flight": analysis_flight.stats(),
+    }
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_current_user
 from app.core.database import get_db_session
 from app.models.schemas import FeedbackRequest, RuleCreateRequest, RuleResponse
+from app.services.analysis_cache import analysis_cache
 from app.services.rule_store import create_rule, list_rules, save_feedback
 
 router = APIRouter(prefix="/rules", tags=["rules"])
@@ -25,6 +26,7 @@ async def post_rule(
     db: AsyncSession = Depends(get_db_session),
 ) -> RuleResponse:
     rule = await create_rule(db, user_id=user["sub"], payload=payload.model_dump())
+    await analysis_cache.announce_rules_changed(user["sub"])
     return RuleResponse(**rule.__dict__)
 
 
@@ -1,29 +1,8 @@
-import json
-from collections import defaultdict
-
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-router = APIRouter(tags=["realtime"])
-
-
-class ConnectionManager:
-    def __init__(self) -> None:
-        self.rooms: dict[str, list[WebSocket]] = defaultdict(list)
-
-    async def connect(self, room: str, socket: WebSocket) -> None:
-        await socket.accept()
-        self.rooms[room].append(socket)
+from app.services.connection_manager import manager
 
-    def disconnect(self, room: str, socket: WebSocket) -> None:
-        self.rooms[room] = [conn for conn in self.rooms[room] if conn != socket]
-
-    async def broadcast(self, room: str, message: dict) -> None:
-        payload = json.dumps(message)
-        for connection in self.rooms[room]:
-            await connection.send_text(payload)
-
-
-manager = ConnectionManager()
+router = APIRouter(tags=["realtime"])
 
 
 @router.websocket("/ws/review/{room}")
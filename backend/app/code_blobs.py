@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.database import _get_session_factory
+from app.services.code_blob_store import (
+    get_report_code,
+    migrate_inline_code,
+    save_blobs,
+    storage_report,
+)
+
+settings = get_settings()
+logger = logging.getLogger("app.code_blobs")
+
+
+async def migrate(batch_size: int) -> int:
+    migrated = 0
+    while True:
+        async with _get_session_factory()() as session:
+            moved = await migrate_inline_code(session, batch_size)
+        if not moved:
+            break
+        migrated += moved
+        logger.info("Moved %s reports to code_blobs (%s total)", moved, migrated)
+    logger.info("Migration finished, %s reports moved", migrated)
+    return 0
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[int(0.5 * (len(ordered) - 1))], 3),
+        "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+    }
+
+
+async def report(samples: int) -> int:
+    async with _get_session_factory()() as session:
+        summary = await storage_report(session)
+        response = await session.execute(
+            text("SELECT id::text, user_id FROM analysis_reports ORDER BY created_at DESC LIMIT :samples"),
+            {"samples": samples},
+        )
+        recent = response.all()
+        await session.rollback()
+
+        read_ms: list[float] = []
+        codes: list[str] = []
+        for row in recent:
+            started = time.perf_counter()
+            code = await get_report_code(session, row.user_id, row.id)
+            read_ms.append((time.perf_counter() - started) * 1000)
+            if code:
+                codes.append(f"{code}\n# {time.time_ns()}")
+        await session.rollback()
+
+        insert_ms: list[float] = []
+        for code in codes:
+            started = time.perf_counter()
+            await save_blobs(session, [code])
+            insert_ms.append((time.perf_counter() - started) * 1000)
+        await session.rollback()
+
+    summary["read_ms"] = _percentiles(read_ms)
+    summary["blob_insert_ms"] = _percentiles(insert_ms)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    parser = argparse.ArgumentParser(prog="python -m app.code_blobs")
+    parser.add_argument("command", choices=["migrate", "report"])
+    parser.add_argument("--batch-size", type=int, default=settings.code_blob_migrate_batch_size)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+    if args.command == "migrate":
+        return asyncio.run(migrate(args.batch_size))
+    return asyncio.run(report(args.samples))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
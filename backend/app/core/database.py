@@ -1,22 +1,114 @@
+import logging
+import time
 from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from app.core.config import get_settings
+from app.core.query_metrics import query_metrics
+
+logger = logging.getLogger(__name__)
 
 SessionLocal: async_sessionmaker[AsyncSession] | None = None
+ReadSessionLocal: async_sessionmaker[AsyncSession] | None = None
+_replica_down_until = 0.0
+_replica_fallbacks = 0
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    settings = get_settings()
+    engine = create_async_engine(
+        url,
+        future=True,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_timeout=settings.db_pool_timeout_seconds,
+    )
+    query_metrics.instrument(engine.sync_engine)
+    return engine
 
 
 def _get_session_factory() -> async_sessionmaker[AsyncSession]:
     global SessionLocal
     if SessionLocal is None:
         settings = get_settings()
-        engine = create_async_engine(settings.database_url, future=True, pool_pre_ping=True)
-        SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        SessionLocal = async_sessionmaker(bind=_create_engine(settings.database_url), expire_on_commit=False, class_=AsyncSession)
     return SessionLocal
 
 
+def _get_read_session_factory() -> async_sessionmaker[AsyncSession] | None:
+    global ReadSessionLocal
+    settings = get_settings()
+    if not settings.database_read_url:
+        return None
+    if ReadSessionLocal is None:
+        ReadSessionLocal = async_sessionmaker(
+            bind=_create_engine(settings.database_read_url), expire_on_commit=False, class_=AsyncSession
+        )
+    return ReadSessionLocal
+
+
+async def _open_replica_session() -> AsyncSession | None:
+    global _replica_down_until, _replica_fallbacks
+    factory = _get_read_session_factory()
+    if factory is None:
+        return None
+    if time.monotonic() < _replica_down_until:
+        _replica_fallbacks += 1
+        return None
+    session = factory()
+    try:
+        await session.connection()
+    except Exception as exc:
+        await session.close()
+        _replica_down_until = time.monotonic() + get_settings().db_replica_retry_seconds
+        _replica_fallbacks += 1
+        logger.warning("Read replica unavailable, using primary for reads: %s", exc, exc_info=True)
+        return None
+    session.info["replica"] = True
+    return session
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    return bool(session.info.get("replica"))
+
+
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     session_factory = _get_session_factory()
     async with session_factory() as session:
         yield session
+
+
+async def get_read_db_session() -> AsyncGenerator[AsyncSession, None]:
+    session = await _open_replica_session()
+    if session is None:
+        async with _get_session_factory()() as primary:
+            yield primary
+        return
+    async with session:
+        yield session
+
+
+def _pool_stats(factory: async_sessionmaker[AsyncSession] | None) -> dict[str, Any] | None:
+    if factory is None:
+        return None
+    pool = factory.kw["bind"].pool
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": max(0, pool.overflow()), "idle": pool.checkedin()}
+
+
+def database_pool_stats() -> dict[str, Any]:
+    return {
+        "primary": _pool_stats(SessionLocal),
+        "replica": _pool_stats(ReadSessionLocal),
+        "replica_configured": bool(get_settings().database_read_url),
+        "replica_healthy": time.monotonic() >= _replica_down_until,
+        "replica_fallbacks": _replica_fallbacks,
+    }
@@ -0,0 +1,232 @@
+import hashlib
+import logging
+import re
+import time
+from bisect import bisect_left
+from collections.abc import AsyncIterator
+from contextvars import Context, ContextVar, copy_context
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("app.db.slow")
+
+BUCKETS_MS = (1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+OVERFLOW_STATEMENT = "other"
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\?|(?<!:):\w+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUES_GROUPS = re.compile(r"(\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+_TARGET = re.compile(r"\b(?:from|into|update|table)\s+\"?([\w.]+)", re.IGNORECASE)
+
+
+class _RequestQueries:
+    __slots__ = ("count", "duration_ms")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration_ms = 0.0
+
+
+_current_request: ContextVar[_RequestQueries | None] = ContextVar("db_request_queries", default=None)
+
+
+def background_context() -> Context:
+    context = copy_context()
+    context.run(_current_request.set, None)
+    return context
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> tuple[str, str]:
+    normalized = _STRING.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = " ".join(normalized.split()).lower()
+    normalized = _VALUES_GROUPS.sub(r"\1, ...", normalized)
+    verb = normalized.split(" ", 1)[0] if normalized else "unknown"
+    body = normalized
+    if verb == "with":
+        verb = next((word for word in ("insert", "update", "delete", "select") if f") {word} " in normalized), verb)
+        body = normalized[normalized.rfind(f") {verb} ") :]
+    target = _TARGET.search(body)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:8]
+    name = f"{verb} {target.group(1)} [{digest}]" if target else f"{verb} [{digest}]"
+    return name, normalized
+
+
+def redact_parameters(parameters: Any, executemany: bool) -> str:
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} rows of {redact_parameters(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}=<{type(value).__name__}>" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(f"<{type(value).__name__}>" for value in parameters) + ")"
+    return "<redacted>"
+
+
+class _Histogram:
+    __slots__ = ("counts", "errors", "max_ms", "total_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def observe(self, duration_ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, duration_ms)] += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, fraction: float) -> float:
+        total = sum(self.counts)
+        if not total:
+            return 0.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= fraction * total:
+                return min(BUCKETS_MS[index], self.max_ms) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        calls = sum(self.counts)
+        return {
+            "calls": calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / calls, 3) if calls else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                **{f"le_{bound:g}": count for bound, count in zip(BUCKETS_MS, self.counts)},
+                "le_inf": self.counts[-1],
+            },
+        }
+
+
+class QueryMetrics:
+    def __init__(self, slow_query_ms: float, max_statements: int) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max(1, max_statements)
+        self._statements: dict[str, _Histogram] = {}
+        self._routes: dict[str, dict[str, float]] = {}
+        self._slow = 0
+
+    def _histogram(self, name: str) -> _Histogram:
+        histogram = self._statements.get(name)
+        if histogram is None:
+            if len(self._statements) >= self.max_statements:
+                name = OVERFLOW_STATEMENT
+            histogram = self._statements.setdefault(name, _Histogram())
+        return histogram
+
+    def record(self, statement: str, parameters: Any, executemany: bool, duration_ms: float, failed: bool = False) -> None:
+        name, normalized = normalize_statement(statement)
+        histogram = self._histogram(name)
+        histogram.observe(duration_ms)
+        if failed:
+            histogram.errors += 1
+        current = _current_request.get()
+        if current is not None:
+            current.count += 1
+            current.duration_ms += duration_ms
+        if duration_ms >= self.slow_query_ms:
+            self._slow += 1
+            logger.warning(
+                "Slow query %s took %.1fms: %s params=%s",
+                name,
+                duration_ms,
+                normalized,
+                redact_parameters(parameters, executemany),
+            )
+
+    def record_request(self, route: str, queries: _RequestQueries) -> None:
+        stats = self._routes.setdefault(route, {"requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0})
+        stats["requests"] += 1
+        stats["queries"] += queries.count
+        stats["max_queries"] = max(stats["max_queries"], queries.count)
+        stats["db_ms"] += queries.duration_ms
+
+    def stats(self) -> dict[str, Any]:
+        statements = sorted(self._statements.items(), key=lambda item: item[1].total_ms, reverse=True)
+        return {
+            "slow_query_ms": self.slow_query_ms,
+            "slow_queries": self._slow,
+            "statements": {name: histogram.snapshot() for name, histogram in statements},
+            "requests": {
+                route: {
+                    "requests": stats["requests"],
+                    "avg_queries": round(stats["queries"] / stats["requests"], 2),
+                    "max_queries": stats["max_queries"],
+                    "avg_db_ms": round(stats["db_ms"] / stats["requests"], 3),
+                }
+                for route, stats in sorted(self._routes.items())
+            },
+        }
+
+    def instrument(self, engine: Engine) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+            started = conn.info["query_started"].pop()
+            self.record(statement, parameters, executemany, (time.perf_counter() - started) * 1000)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context) -> None:
+            pending = context.connection.info.get("query_started") if context.connection is not None else None
+            if not pending or context.statement is None:
+                return
+            started = pending.pop()
+            duration_ms = (time.perf_counter() - started) * 1000
+            executemany = bool(context.execution_context is not None and context.execution_context.executemany)
+            self.record(context.statement, context.parameters, executemany, duration_ms, failed=True)
+
+
+class QueryMetricsMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, timing_headers: bool = False):
+        super().__init__(app)
+        self.timing_headers = timing_headers
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        queries = _RequestQueries()
+        token = _current_request.set(queries)
+        try:
+            response = await call_next(request)
+        finally:
+            _current_request.reset(token)
+        route = f"{request.method} {getattr(request.scope.get('route'), 'path', 'unmatched')}"
+        if "content-length" not in response.headers:
+            response.body_iterator = self._record_after_body(response.body_iterator, route, queries)
+            return response
+        query_metrics.record_request(route, queries)
+        if self.timing_headers:
+            response.headers["Server-Timing"] = f'db;dur={queries.duration_ms:.1f};desc="{queries.count} queries"'
+            response.headers["X-DB-Query-Count"] = str(queries.count)
+        return response
+
+    @staticmethod
+    async def _record_after_body(body: AsyncIterator[bytes], route: str, queries: _RequestQueries) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            query_metrics.record_request(route, queries)
+
+
+query_metrics = QueryMetrics(slow_query_ms=settings.db_slow_query_ms, max_statements=settings.db_query_metrics_max_statements)
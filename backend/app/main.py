@@ -1,20 +1,46 @@
-from fastapi import FastAPI
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.analysis import router as analysis_router
 from app.api.collaboration import router as collaboration_router
 from app.api.health import router as health_router
 from app.api.integrations import router as integrations_router
+from app.api.metrics import router as metrics_router
 from app.api.oauth import router as oauth_router
 from app.api.rules import router as rules_router
 from app.api.ws import router as ws_router
 from app.core.config import get_settings
+from app.core.query_metrics import QueryMetricsMiddleware
 from app.core.security import RateLimitMiddleware, SecurityHeadersMiddleware
+from app.services.analysis_cache import analysis_cache
+from app.services.job_queue import job_events
+from app.services.ml_client import close_ml_client, start_ml_client
+from app.services.pagination import InvalidCursorError
+from app.services.report_writer import report_writer
 
 settings = get_settings()
-app = FastAPI(title="CodeMind Backend", version="1.0.0")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    await start_ml_client()
+    analysis_cache.start()
+    job_events.start()
+    yield
+    await job_events.close()
+    await analysis_cache.close()
+    await report_writer.close()
+    await close_ml_client()
+
+
+app = FastAPI(title="CodeMind Backend", version="1.0.0", lifespan=lifespan)
 app.add_middleware(RateLimitMiddleware, requests_per_minute=180)
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(QueryMetricsMiddleware, timing_headers=settings.debug_timing_headers)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,9 +48,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "X-DB-Query-Count"],
 )
 
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(_: Request, exc: InvalidCursorError) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(analysis_router)
 app.include_router(rules_router)
 app.include_router(integrations_router)
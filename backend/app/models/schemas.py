@@ -11,6 +11,21 @@ class AnalyzeRequest(BaseModel):
     context: dict[str, Any] = Field(default_factory=dict)
 
 
+class AnalyzeBatchRequest(BaseModel):
+    items: list[AnalyzeRequest] = Field(min_length=1, max_length=500)
+
+
+class RuleFindingResponse(BaseModel):
+    rule_id: str
+    name: str
+    message: str
+    severity: str
+    line: int
+    column: int
+    end_line: int
+    end_column: int
+
+
 class AnalyzeResponse(BaseModel):
     id: str
     suggestions: list[str]
@@ -19,6 +34,18 @@ class AnalyzeResponse(BaseModel):
     documentation: str
     score: float
     created_at: datetime
+    rule_findings: list[RuleFindingResponse] = Field(default_factory=list)
+
+
+class AnalysisJobResponse(BaseModel):
+    id: str
+    status: str
+    attempts: int
+    report: AnalyzeResponse | None = None
+    error: str | None = None
+    enqueued_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
 
 
 class AnalysisSummary(BaseModel):
@@ -78,6 +105,28 @@ class RepoIntegrationResponse(BaseModel):
     repositories: list[str]
 
 
+class RepoAnalysisRequest(BaseModel):
+    repository: str = Field(min_length=1)
+    room: str | None = None
+
+
+class RepoAnalysisJobResponse(BaseModel):
+    id: str
+    provider: str
+    repository: str
+    room: str
+    status: str
+    total_files: int
+    changed_files: int
+    unchanged_files: int
+    analyzed_files: int
+    failed_files: int
+    removed_files: int
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
 class ReviewRoomCreateRequest(BaseModel):
     name: str = Field(min_length=2)
     repository: str | None = None
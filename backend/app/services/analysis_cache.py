@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import get_settings
+from app.core.query_metrics import background_context
+from app.models.schemas import AnalyzeResponse
+from app.services.redis_client import redis
+from app.services.rule_cache import rule_cache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "analysis-cache:invalidate"
+ALL_KEYS = "*"
+RULES_CHANGED = "rules:"
+
+
+@dataclass
+class _Entry:
+    value: AnalyzeResponse
+    size: int
+    fresh_until: float
+    stale_until: float
+
+
+class LocalResultCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, stale_ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.bytes = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: str) -> tuple[AnalyzeResponse, bool] | None:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or now >= entry.stale_until:
+            if entry is not None:
+                self._remove(key)
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        fresh = now < entry.fresh_until
+        self._stats["hits" if fresh else "stale_hits"] += 1
+        return entry.value, fresh
+
+    def put(self, key: str, value: AnalyzeResponse, size: int) -> None:
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        self._remove(key)
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, size, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key: str = ALL_KEYS) -> None:
+        self._stats["invalidations"] += 1
+        if key == ALL_KEYS:
+            self._entries.clear()
+            self.bytes = 0
+        else:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class AnalysisCache:
+    def __init__(self, local: LocalResultCache, ttl: int) -> None:
+        self.local = local
+        self.ttl = ttl
+        self._revalidating: set[str] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._listener: asyncio.Task[None] | None = None
+
+    async def get(self, key: str) -> AnalyzeResponse | None:
+        cached = self.local.get(key)
+        if cached is not None:
+            value, fresh = cached
+            if not fresh and key not in self._revalidating:
+                self._revalidating.add(key)
+                task = asyncio.get_running_loop().create_task(self._revalidate(key), context=background_context())
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+        return await self._load(key)
+
+    async def get_many(self, keys: list[str]) -> dict[str, AnalyzeResponse | None]:
+        found: dict[str, AnalyzeResponse | None] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            cached = self.local.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                found[key] = cached[0]
+        if missing:
+            for key, raw in zip(missing, await redis.mget(missing)):
+                value = AnalyzeResponse.model_validate_json(raw) if raw else None
+                if value is not None:
+                    self.local.put(key, value, len(raw))
+                found[key] = value
+        return found
+
+    async def _load(self, key: str) -> AnalyzeResponse | None:
+        raw = await redis.get(key)
+        if not raw:
+            return None
+        value = AnalyzeResponse.model_validate_json(raw)
+        self.local.put(key, value, len(raw))
+        return value
+
+    async def _revalidate(self, key: str) -> None:
+        try:
+            if await self._load(key) is None:
+                self.local.invalidate(key)
+        except Exception:
+            logger.exception("Failed to revalidate cached analysis %s", key)
+        finally:
+            self._revalidating.discard(key)
+
+    async def set(self, key: str, value: AnalyzeResponse) -> None:
+        raw = value.model_dump_json()
+        await redis.set(key, raw, ex=self.ttl)
+        self.local.put(key, value, len(raw))
+
+    async def set_many(self, values: dict[str, AnalyzeResponse]) -> None:
+        if not values:
+            return
+        raws = {key: value.model_dump_json() for key, value in values.items()}
+        if hasattr(redis, "pipeline"):
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, raw in raws.items():
+                    pipe.set(key, raw, ex=self.ttl)
+                await pipe.execute()
+        else:
+            for key, raw in raws.items():
+                await redis.set(key, raw, ex=self.ttl)
+        for key, value in values.items():
+            self.local.put(key, value, len(raws[key]))
+
+    async def purge(self, key: str = ALL_KEYS) -> None:
+        if key != ALL_KEYS:
+            await redis.delete(key)
+        self.local.invalidate(key)
+        if hasattr(redis, "publish"):
+            await redis.publish(INVALIDATION_CHANNEL, key)
+
+    async def announce_rules_changed(self, user_id: str) -> None:
+        if hasattr(redis, "publish"):
+            await redis.publish(INVALIDATION_CHANNEL, f"{RULES_CHANGED}{user_id}")
+
+    def _on_invalidation(self, data: str) -> None:
+        if data.startswith(RULES_CHANGED):
+            rule_cache.forget(data.removeprefix(RULES_CHANGED))
+        else:
+            self.local.invalidate(data)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._on_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Analysis cache invalidation listener disconnected, retrying", exc_info=True)
+                self.local.invalidate()
+                rule_cache.forget()
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if hasattr(redis, "pubsub") and self._listener is None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen(), context=background_context())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.local.stats(), "revalidating": len(self._revalidating), "listening": self._listener is not None}
+
+
+analysis_cache = AnalysisCache(
+    LocalResultCache(
+        max_entries=settings.analysis_l1_entries,
+        max_bytes=settings.analysis_l1_max_bytes,
+        ttl=settings.analysis_l1_ttl_seconds,
+        stale_ttl=settings.analysis_l1_stale_seconds,
+    ),
+    ttl=settings.analysis_cache_ttl_seconds,
+)
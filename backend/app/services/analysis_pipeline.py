@@ -0,0 +1,45 @@
+import hashlib
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.schemas import AnalyzeRequest, AnalyzeResponse
+from app.services.analysis_cache import analysis_cache
+from app.services.report_writer import report_writer
+from app.services.rule_cache import rule_cache
+from app.services.rule_engine import apply_rule_set
+from app.services.rule_store import list_rules
+
+
+def cache_key(payload: AnalyzeRequest, user_id: str, rules_version: str) -> str:
+    digest = hashlib.sha256((payload.code + payload.language).encode()).hexdigest()
+    return f"analysis:{user_id}:{rules_version}:{digest}"
+
+
+def to_response(report_id: str, result: dict[str, Any]) -> AnalyzeResponse:
+    return AnalyzeResponse(
+        id=report_id,
+        suggestions=result.get("suggestions", []),
+        bugs=result.get("bugs", []),
+        optimizations=result.get("optimizations", []),
+        documentation=result.get("documentation", ""),
+        score=float(result.get("score", 0)),
+        created_at=datetime.now(UTC),
+        rule_findings=result.get("rule_findings", []),
+    )
+
+
+async def finalize_analysis(
+    db: AsyncSession,
+    user_id: str,
+    payload: AnalyzeRequest,
+    result: dict[str, Any],
+    key: str,
+) -> AnalyzeResponse:
+    rule_set = await rule_cache.get(user_id, lambda: list_rules(db, user_id=user_id))
+    result = apply_rule_set(rule_set, payload.code, result)
+    report_id = await report_writer.save(db, user_id=user_id, payload=payload.model_dump(), result=result)
+    response = to_response(report_id, result)
+    await analysis_cache.set(key, response)
+    return response
@@ -4,6 +4,62 @@ from typing import Any
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.services.code_blob_store import save_blobs
+from app.services.pagination import keyset_filter, keyset_page
+
+RECENT_LANGUAGES = 5
+HIGH_RISK_SCORE = 0.5
+INSERT_CHUNK_ROWS = 1000
+
+
+async def record_stats(session: AsyncSession, reports: list[tuple[str, str, str, float]]) -> None:
+    by_user: dict[str, dict[str, Any]] = {}
+    for user_id, _, language, score in sorted(reports, key=lambda report: report[1]):
+        stats = by_user.setdefault(user_id, {"count": 0, "score_sum": 0.0, "high_risk": 0, "languages": []})
+        stats["count"] += 1
+        stats["score_sum"] += score
+        stats["high_risk"] += 1 if score < HIGH_RISK_SCORE else 0
+        stats["languages"].insert(0, language)
+    if not by_user:
+        return
+    await session.execute(
+        text(
+            """
+            INSERT INTO user_analysis_stats
+              (user_id, total_analyses, score_sum, high_risk_count, recent_languages, updated_at)
+            VALUES
+              (:user_id, :count, :score_sum, :high_risk, :languages::jsonb, NOW())
+            ON CONFLICT (user_id)
+            DO UPDATE SET
+              total_analyses = user_analysis_stats.total_analyses + EXCLUDED.total_analyses,
+              score_sum = user_analysis_stats.score_sum + EXCLUDED.score_sum,
+              high_risk_count = user_analysis_stats.high_risk_count + EXCLUDED.high_risk_count,
+              recent_languages = (
+                SELECT COALESCE(jsonb_agg(ring.language ORDER BY ring.position), '[]'::jsonb)
+                FROM (
+                  SELECT language, position
+                  FROM jsonb_array_elements(EXCLUDED.recent_languages || user_analysis_stats.recent_languages)
+                    WITH ORDINALITY AS entries(language, position)
+                  ORDER BY position
+                  LIMIT :recent
+                ) ring
+              ),
+              updated_at = NOW()
+            """
+        ),
+        [
+            {
+                "user_id": user_id,
+                "count": stats["count"],
+                "score_sum": stats["score_sum"],
+                "high_risk": stats["high_risk"],
+                "languages": json.dumps(stats["languages"][:RECENT_LANGUAGES]),
+                "recent": RECENT_LANGUAGES,
+            }
+            for user_id, stats in sorted(by_user.items())
+        ],
+    )
+
 
 async def save_analysis(
     session: AsyncSession,
@@ -11,12 +67,13 @@ async def save_analysis(
     payload: dict[str, Any],
     result: dict[str, Any],
 ) -> str:
+    code_hash = (await save_blobs(session, [payload.get("code", "")]))[0]
     query = text(
         """
         INSERT INTO analysis_reports
-        (id, user_id, language, repository, code, suggestions, bugs, optimizations, documentation, score)
+        (id, user_id, language, repository, code_hash, suggestions, bugs, optimizations, documentation, score)
         VALUES
-        (gen_random_uuid(), :user_id, :language, :repository, :code, :suggestions::jsonb, :bugs::jsonb, :optimizations::jsonb, :documentation, :score)
+        (gen_random_uuid(), :user_id, :language, :repository, :code_hash, :suggestions::jsonb, :bugs::jsonb, :optimizations::jsonb, :documentation, :score)
         RETURNING id::text
         """
     )
@@ -26,7 +83,7 @@ async def save_analysis(
             "user_id": user_id,
             "language": payload.get("language", "unknown"),
             "repository": payload.get("repository"),
-            "code": payload.get("code", ""),
+            "code_hash": code_hash,
             "suggestions": json.dumps(result.get("suggestions", [])),
             "bugs": json.dumps(result.get("bugs", [])),
             "optimizations": json.dumps(result.get("optimizations", [])),
@@ -35,57 +92,202 @@ async def save_analysis(
         },
     )
     created_id = response.scalar_one()
+    await record_stats(session, [(user_id, created_id, payload.get("language", "unknown"), float(result.get("score", 0)))])
     await session.commit()
     return created_id
 
 
-async def get_analytics(session: AsyncSession, user_id: str) -> dict[str, Any]:
-    totals = await session.execute(
-        text(
-            """
-            SELECT COUNT(*)::int AS total_analyses,
-                   COALESCE(AVG(score), 0)::float AS avg_score,
-                   COUNT(*) FILTER (WHERE score < 0.5)::int AS high_risk_count
-            FROM analysis_reports
-            WHERE user_id = :user_id
-            """
-        ),
-        {"user_id": user_id},
+async def insert_reports(session: AsyncSession, rows: list[tuple[str, str, dict[str, Any], dict[str, Any]]]) -> None:
+    if not rows:
+        return
+    hashes = await save_blobs(session, [payload.get("code", "") for _, _, payload, _ in rows])
+    for start in range(0, len(rows), INSERT_CHUNK_ROWS):
+        values: list[str] = []
+        params: dict[str, Any] = {}
+        chunk = zip(rows[start : start + INSERT_CHUNK_ROWS], hashes[start : start + INSERT_CHUNK_ROWS])
+        for index, ((report_id, user_id, payload, result), code_hash) in enumerate(chunk):
+            values.append(
+                f"(:id_{index}::uuid, :user_id_{index}, :language_{index}, :repository_{index}, :code_hash_{index}, "
+                f":suggestions_{index}::jsonb, :bugs_{index}::jsonb, :optimizations_{index}::jsonb, "
+                f":documentation_{index}, :score_{index})"
+            )
+            params.update(
+                {
+                    f"id_{index}": report_id,
+                    f"user_id_{index}": user_id,
+                    f"language_{index}": payload.get("language", "unknown"),
+                    f"repository_{index}": payload.get("repository"),
+                    f"code_hash_{index}": code_hash,
+                    f"suggestions_{index}": json.dumps(result.get("suggestions", [])),
+                    f"bugs_{index}": json.dumps(result.get("bugs", [])),
+                    f"optimizations_{index}": json.dumps(result.get("optimizations", [])),
+                    f"documentation_{index}": result.get("documentation", ""),
+                    f"score_{index}": float(result.get("score", 0)),
+                }
+            )
+        await session.execute(
+            text(
+                f"""
+                INSERT INTO analysis_reports
+                (id, user_id, language, repository, code_hash, suggestions, bugs, optimizations, documentation, score)
+                VALUES
+                {", ".join(values)}
+                """
+            ),
+            params,
+        )
+    await record_stats(
+        session,
+        [
+            (user_id, report_id, payload.get("language", "unknown"), float(result.get("score", 0)))
+            for report_id, user_id, payload, result in rows
+        ],
     )
 
-    languages = await session.execute(
+
+async def save_analyses(
+    session: AsyncSession,
+    user_id: str,
+    reports: list[tuple[str, dict[str, Any], dict[str, Any]]],
+) -> None:
+    if not reports:
+        return
+    await insert_reports(session, [(report_id, user_id, payload, result) for report_id, payload, result in reports])
+    await session.commit()
+
+
+async def get_analytics(session: AsyncSession, user_id: str) -> dict[str, Any]:
+    response = await session.execute(
         text(
             """
-            SELECT language
-            FROM analysis_reports
+            SELECT total_analyses,
+                   CASE WHEN total_analyses > 0 THEN score_sum / total_analyses ELSE 0 END::float AS avg_score,
+                   high_risk_count,
+                   recent_languages
+            FROM user_analysis_stats
             WHERE user_id = :user_id
-            ORDER BY created_at DESC
-            LIMIT 5
             """
         ),
         {"user_id": user_id},
     )
-
-    row = totals.one()
+    row = response.first()
+    if row is None:
+        return {"total_analyses": 0, "avg_score": 0.0, "high_risk_count": 0, "recent_languages": []}
     return {
         "total_analyses": row.total_analyses,
         "avg_score": row.avg_score,
         "high_risk_count": row.high_risk_count,
-        "recent_languages": [r.language for r in languages],
+        "recent_languages": list(row.recent_languages),
     }
 
 
-async def get_recent_reports(session: AsyncSession, user_id: str, limit: int = 10) -> list[dict[str, Any]]:
+async def get_recent_reports(
+    session: AsyncSession,
+    user_id: str,
+    limit: int = 10,
+    cursor: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    after, params = keyset_filter(cursor, "created_at", "id")
     response = await session.execute(
         text(
-            """
+            f"""
             SELECT id::text, language, repository, score, created_at
             FROM analysis_reports
-            WHERE user_id = :user_id
-            ORDER BY created_at DESC
+            WHERE user_id = :user_id {after}
+            ORDER BY created_at DESC, id DESC
             LIMIT :limit
             """
         ),
-        {"user_id": user_id, "limit": limit},
+        {"user_id": user_id, "limit": limit + 1, **params},
+    )
+    return keyset_page([dict(row._mapping) for row in response], limit)
+
+
+async def rebuild_stats(session: AsyncSession) -> int:
+    await session.execute(text("LOCK TABLE analysis_reports IN SHARE MODE"))
+    await session.execute(text("DELETE FROM user_analysis_stats"))
+    response = await session.execute(
+        text(
+            """
+            INSERT INTO user_analysis_stats
+              (user_id, total_analyses, score_sum, high_risk_count, recent_languages, updated_at)
+            SELECT
+              reports.user_id,
+              COUNT(*)::int,
+              COALESCE(SUM(reports.score), 0),
+              (COUNT(*) FILTER (WHERE reports.score < :high_risk))::int,
+              COALESCE(
+                (
+                  SELECT jsonb_agg(recent.language ORDER BY recent.created_at DESC, recent.id DESC)
+                  FROM (
+                    SELECT id, language, created_at
+                    FROM analysis_reports latest
+                    WHERE latest.user_id = reports.user_id
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT :recent
+                  ) recent
+                ),
+                '[]'::jsonb
+              ),
+              NOW()
+            FROM analysis_reports reports
+            GROUP BY reports.user_id
+            """
+        ),
+        {"high_risk": HIGH_RISK_SCORE, "recent": RECENT_LANGUAGES},
+    )
+    await session.commit()
+    return response.rowcount
+
+
+async def find_stats_drift(session: AsyncSession, tolerance: float = 1e-6) -> list[dict[str, Any]]:
+    await session.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+    response = await session.execute(
+        text(
+            """
+            WITH raw AS (
+              SELECT user_id,
+                     COUNT(*)::int AS total_analyses,
+                     COALESCE(SUM(score), 0)::float AS score_sum,
+                     (COUNT(*) FILTER (WHERE score < :high_risk))::int AS high_risk_count
+              FROM analysis_reports
+              GROUP BY user_id
+            )
+            SELECT COALESCE(raw.user_id, stats.user_id) AS user_id,
+                   COALESCE(raw.total_analyses, 0) AS expected_total,
+                   COALESCE(stats.total_analyses, 0) AS actual_total,
+                   COALESCE(raw.score_sum, 0) AS expected_score_sum,
+                   COALESCE(stats.score_sum, 0) AS actual_score_sum,
+                   COALESCE(raw.high_risk_count, 0) AS expected_high_risk,
+                   COALESCE(stats.high_risk_count, 0) AS actual_high_risk,
+                   COALESCE(
+                     (
+                       SELECT jsonb_agg(recent.language ORDER BY recent.created_at DESC, recent.id DESC)
+                       FROM (
+                         SELECT id, language, created_at
+                         FROM analysis_reports latest
+                         WHERE latest.user_id = COALESCE(raw.user_id, stats.user_id)
+                         ORDER BY created_at DESC, id DESC
+                         LIMIT :recent
+                       ) recent
+                     ),
+                     '[]'::jsonb
+                   ) AS expected_languages,
+                   COALESCE(stats.recent_languages, '[]'::jsonb) AS actual_languages
+            FROM raw
+            FULL OUTER JOIN user_analysis_stats stats ON stats.user_id = raw.user_id
+            """
+        ),
+        {"high_risk": HIGH_RISK_SCORE, "recent": RECENT_LANGUAGES},
     )
-    return [dict(row._mapping) for row in response]
+    drift: list[dict[str, Any]] = []
+    for row in response:
+        if (
+            row.expected_total != row.actual_total
+            or row.expected_high_risk != row.actual_high_risk
+            or abs(row.expected_score_sum - row.actual_score_sum) > tolerance * max(1, row.expected_total)
+            or sorted(row.expected_languages) != sorted(row.actual_languages)
+        ):
+            drift.append(dict(row._mapping))
+    await session.rollback()
+    return drift
@@ -0,0 +1,130 @@
+import hashlib
+import zlib
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def content_hash(code: str) -> str:
+    return f"sha256:{hashlib.sha256(code.encode()).hexdigest()}"
+
+
+def encode_code(code: str) -> tuple[str, bytes, int]:
+    raw = code.encode()
+    compressed = zlib.compress(raw, settings.code_blob_compression_level)
+    if len(compressed) < len(raw):
+        return "zlib", compressed, len(raw)
+    return "identity", raw, len(raw)
+
+
+def decode_code(encoding: str, content: bytes) -> str:
+    if encoding == "zlib":
+        return zlib.decompress(content).decode()
+    return bytes(content).decode()
+
+
+async def save_blobs(session: AsyncSession, codes: list[str]) -> list[str]:
+    hashes = [content_hash(code) for code in codes]
+    unique = dict(sorted(zip(hashes, codes)))
+    if not unique:
+        return hashes
+    rows: list[dict[str, Any]] = []
+    for digest, code in unique.items():
+        encoding, content, size = encode_code(code)
+        rows.append({"hash": digest, "encoding": encoding, "content": content, "size": size, "stored_size": len(content)})
+    await session.execute(
+        text(
+            """
+            INSERT INTO code_blobs (hash, encoding, content, size, stored_size, created_at)
+            VALUES (:hash, :encoding, :content, :size, :stored_size, NOW())
+            ON CONFLICT (hash) DO NOTHING
+            """
+        ),
+        rows,
+    )
+    return hashes
+
+
+async def get_report_code(session: AsyncSession, user_id: str, report_id: str) -> str | None:
+    response = await session.execute(
+        text(
+            """
+            SELECT reports.code, blobs.encoding, blobs.content
+            FROM analysis_reports reports
+            LEFT JOIN code_blobs blobs ON blobs.hash = reports.code_hash
+            WHERE reports.id = :report_id::uuid AND reports.user_id = :user_id
+            """
+        ),
+        {"report_id": report_id, "user_id": user_id},
+    )
+    row = response.first()
+    if row is None:
+        return None
+    if row.content is not None:
+        return decode_code(row.encoding, row.content)
+    return row.code
+
+
+async def migrate_inline_code(session: AsyncSession, batch_size: int) -> int:
+    response = await session.execute(
+        text(
+            """
+            SELECT id::text, code
+            FROM analysis_reports
+            WHERE code_hash IS NULL AND code IS NOT NULL
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+            """
+        ),
+        {"batch_size": batch_size},
+    )
+    rows = response.all()
+    if not rows:
+        await session.rollback()
+        return 0
+    hashes = await save_blobs(session, [row.code for row in rows])
+    await session.execute(
+        text("UPDATE analysis_reports SET code_hash = :code_hash, code = NULL WHERE id = :id::uuid"),
+        [{"id": row.id, "code_hash": digest} for row, digest in zip(rows, hashes)],
+    )
+    await session.commit()
+    return len(rows)
+
+
+async def storage_report(session: AsyncSession) -> dict[str, Any]:
+    response = await session.execute(
+        text(
+            """
+            SELECT
+              (SELECT COUNT(*) FROM analysis_reports)::bigint AS reports,
+              (SELECT COUNT(*) FROM analysis_reports WHERE code_hash IS NULL AND code IS NOT NULL)::bigint AS inline_reports,
+              (SELECT COALESCE(SUM(octet_length(code)), 0) FROM analysis_reports)::bigint AS inline_bytes,
+              (SELECT COUNT(*) FROM code_blobs)::bigint AS blobs,
+              (SELECT COALESCE(SUM(size), 0) FROM code_blobs)::bigint AS blob_bytes,
+              (SELECT COALESCE(SUM(stored_size), 0) FROM code_blobs)::bigint AS stored_bytes,
+              (
+                SELECT COALESCE(SUM(blobs.size), 0)
+                FROM analysis_reports reports
+                JOIN code_blobs blobs ON blobs.hash = reports.code_hash
+              )::bigint AS referenced_bytes
+            """
+        )
+    )
+    row = response.one()
+    logical = row.referenced_bytes + row.inline_bytes
+    physical = row.stored_bytes + row.inline_bytes
+    return {
+        "reports": row.reports,
+        "inline_reports": row.inline_reports,
+        "blobs": row.blobs,
+        "logical_bytes": logical,
+        "stored_bytes": physical,
+        "saved_bytes": logical - physical,
+        "dedup_ratio": round(row.referenced_bytes / row.blob_bytes, 2) if row.blob_bytes else 0.0,
+        "compression_ratio": round(row.blob_bytes / row.stored_bytes, 2) if row.stored_bytes else 0.0,
+    }
@@ -3,6 +3,8 @@ from typing import Any
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.services.pagination import keyset_filter, keyset_page
+
 
 async def create_room(session: AsyncSession, user_id: str, name: str, repository: str | None) -> dict[str, Any]:
     created = await session.execute(
@@ -30,20 +32,27 @@ async def create_room(session: AsyncSession, user_id: str, name: str, repository
     return room
 
 
-async def list_rooms(session: AsyncSession, user_id: str) -> list[dict[str, Any]]:
+async def list_rooms(
+    session: AsyncSession,
+    user_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    after, params = keyset_filter(cursor, "r.created_at", "r.id")
     response = await session.execute(
         text(
-            """
+            f"""
             SELECT r.id::text, r.name, r.repository, p.role, r.created_at
             FROM review_rooms r
             JOIN review_participants p ON p.room_id = r.id
-            WHERE p.user_id = :user_id
-            ORDER BY r.created_at DESC
+            WHERE p.user_id = :user_id {after}
+            ORDER BY r.created_at DESC, r.id DESC
+            LIMIT :limit
             """
         ),
-        {"user_id": user_id},
+        {"user_id": user_id, "limit": limit + 1, **params},
     )
-    return [dict(row._mapping) for row in response]
+    return keyset_page([dict(row._mapping) for row in response], limit)
 
 
 async def get_user_role(session: AsyncSession, room_id: str, user_id: str) -> str | None:
@@ -85,19 +94,26 @@ async def create_thread(session: AsyncSession, room_id: str, title: str, user_id
     return dict(response.one()._mapping)
 
 
-async def list_threads(session: AsyncSession, room_id: str) -> list[dict[str, Any]]:
+async def list_threads(
+    session: AsyncSession,
+    room_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    after, params = keyset_filter(cursor, "created_at", "id")
     response = await session.execute(
         text(
-            """
+            f"""
             SELECT id::text, room_id::text, title, created_by, created_at
             FROM review_threads
-            WHERE room_id = :room_id::uuid
-            ORDER BY created_at DESC
+            WHERE room_id = :room_id::uuid {after}
+            ORDER BY created_at DESC, id DESC
+            LIMIT :limit
             """
         ),
-        {"room_id": room_id},
+        {"room_id": room_id, "limit": limit + 1, **params},
     )
-    return [dict(row._mapping) for row in response]
+    return keyset_page([dict(row._mapping) for row in response], limit)
 
 
 async def create_comment(
@@ -121,19 +137,26 @@ async def create_comment(
     return dict(response.one()._mapping)
 
 
-async def list_comments(session: AsyncSession, thread_id: str) -> list[dict[str, Any]]:
+async def list_comments(
+    session: AsyncSession,
+    thread_id: str,
+    limit: int = 100,
+    cursor: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    after, params = keyset_filter(cursor, "created_at", "id", descending=False)
     response = await session.execute(
         text(
-            """
+            f"""
             SELECT id::text, thread_id::text, parent_id::text, body, author_id, created_at
             FROM review_comments
-            WHERE thread_id = :thread_id::uuid
-            ORDER BY created_at ASC
+            WHERE thread_id = :thread_id::uuid {after}
+            ORDER BY created_at ASC, id ASC
+            LIMIT :limit
             """
         ),
-        {"thread_id": thread_id},
+        {"thread_id": thread_id, "limit": limit + 1, **params},
     )
-    return [dict(row._mapping) for row in response]
+    return keyset_page([dict(row._mapping) for row in response], limit)
 
 
 async def get_room_id_by_thread(session: AsyncSession, thread_id: str) -> str:
@@ -145,38 +168,47 @@ async def get_room_id_by_thread(session: AsyncSession, thread_id: str) -> str:
     return row.room_id if row else ""
 
 
-async def create_notifications_for_room(session: AsyncSession, room_id: str, sender_id: str, title: str, body: str) -> None:
-    users = await session.execute(
-        text("SELECT user_id FROM review_participants WHERE room_id = :room_id::uuid AND user_id <> :sender"),
-        {"room_id": room_id, "sender": sender_id},
+async def insert_room_notifications(session: AsyncSession, room_id: str, sender_id: str, title: str, body: str) -> int:
+    response = await session.execute(
+        text(
+            """
+            INSERT INTO notifications(id, user_id, title, body, read)
+            SELECT gen_random_uuid(), user_id, :title, :body, false
+            FROM review_participants
+            WHERE room_id = :room_id::uuid AND user_id <> :sender
+            """
+        ),
+        {"room_id": room_id, "sender": sender_id, "title": title, "body": body},
     )
-    for row in users:
-        await session.execute(
-            text(
-                """
-                INSERT INTO notifications(id, user_id, title, body, read)
-                VALUES (gen_random_uuid(), :user_id, :title, :body, false)
-                """
-            ),
-            {"user_id": row.user_id, "title": title, "body": body},
-        )
+    return response.rowcount
+
+
+async def create_notifications_for_room(session: AsyncSession, room_id: str, sender_id: str, title: str, body: str) -> int:
+    created = await insert_room_notifications(session, room_id, sender_id, title, body)
     await session.commit()
+    return created
 
 
-async def list_notifications(session: AsyncSession, user_id: str) -> list[dict[str, Any]]:
+async def list_notifications(
+    session: AsyncSession,
+    user_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    after, params = keyset_filter(cursor, "created_at", "id")
     response = await session.execute(
         text(
-            """
+            f"""
             SELECT id::text, title, body, read, created_at
             FROM notifications
-            WHERE user_id = :user_id
-            ORDER BY created_at DESC
-            LIMIT 50
+            WHERE user_id = :user_id {after}
+            ORDER BY created_at DESC, id DESC
+            LIMIT :limit
             """
         ),
-        {"user_id": user_id},
+        {"user_id": user_id, "limit": limit + 1, **params},
     )
-    return [dict(row._mapping) for row in response]
+    return keyset_page([dict(row._mapping) for row in response], limit)
 
 
 async def mark_notification_read(session: AsyncSession, notification_id: str, user_id: str) -> None:
@@ -1,4 +1,7 @@
-from typing import Any
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+from urllib.parse import quote
 
 import httpx
 
@@ -32,3 +35,188 @@ async def list_bitbucket_repos(token: str) -> list[str]:
         response.raise_for_status()
         data: dict[str, Any] = response.json()
     return [repo["full_name"] for repo in data.get("values", [])]
+
+
+@dataclass
+class RepoFile:
+    path: str
+    size: int | None = None
+    blob_hash: str | None = None
+
+
+class RepoProvider(Protocol):
+    async def list_files(self, repository: str) -> list[RepoFile]: ...
+
+    async def read_file(self, repository: str, path: str) -> str: ...
+
+    async def close(self) -> None: ...
+
+
+class GitHubProvider:
+    def __init__(self, token: str) -> None:
+        self._client = httpx.AsyncClient(
+            base_url="https://api.github.com",
+            timeout=20,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+        )
+        self._refs: dict[str, str] = {}
+
+    async def list_files(self, repository: str) -> list[RepoFile]:
+        response = await self._client.get(f"/repos/{repository}")
+        response.raise_for_status()
+        branch = response.json()["default_branch"]
+        response = await self._client.get(f"/repos/{repository}/branches/{quote(branch, safe='')}")
+        response.raise_for_status()
+        commit = response.json()["commit"]
+        self._refs[repository] = commit["sha"]
+        tree_sha = commit["commit"]["tree"]["sha"]
+        response = await self._client.get(f"/repos/{repository}/git/trees/{tree_sha}", params={"recursive": "1"})
+        response.raise_for_status()
+        data = response.json()
+        if data.get("truncated"):
+            return await self._walk_tree(repository, tree_sha)
+        return [
+            RepoFile(path=item["path"], size=item.get("size"), blob_hash=f"git:{item['sha']}")
+            for item in data["tree"]
+            if item["type"] == "blob"
+        ]
+
+    async def _walk_tree(self, repository: str, root_sha: str) -> list[RepoFile]:
+        files: list[RepoFile] = []
+        pending = [(root_sha, "")]
+        while pending:
+            tree_sha, prefix = pending.pop()
+            response = await self._client.get(f"/repos/{repository}/git/trees/{tree_sha}")
+            response.raise_for_status()
+            data = response.json()
+            if data.get("truncated"):
+                raise RuntimeError(f"GitHub tree listing for {repository}/{prefix} is truncated")
+            for item in data["tree"]:
+                path = f"{prefix}{item['path']}"
+                if item["type"] == "tree":
+                    pending.append((item["sha"], f"{path}/"))
+                elif item["type"] == "blob":
+                    files.append(RepoFile(path=path, size=item.get("size"), blob_hash=f"git:{item['sha']}"))
+        return files
+
+    async def read_file(self, repository: str, path: str) -> str:
+        response = await self._client.get(
+            f"/repos/{repository}/contents/{quote(path)}",
+            params={"ref": self._refs.get(repository, "HEAD")},
+            headers={"Accept": "application/vnd.github.raw+json"},
+        )
+        response.raise_for_status()
+        return response.text
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class GitLabProvider:
+    def __init__(self, token: str) -> None:
+        self._client = httpx.AsyncClient(
+            base_url="https://gitlab.com/api/v4",
+            timeout=20,
+            headers={"PRIVATE-TOKEN": token},
+        )
+        self._refs: dict[str, str] = {}
+
+    async def list_files(self, repository: str) -> list[RepoFile]:
+        project = quote(repository, safe="")
+        response = await self._client.get(f"/projects/{project}")
+        response.raise_for_status()
+        branch = response.json()["default_branch"]
+        self._refs[repository] = branch
+
+        files: list[RepoFile] = []
+        page: str | None = "1"
+        while page:
+            response = await self._client.get(
+                f"/projects/{project}/repository/tree",
+                params={"ref": branch, "recursive": "true", "per_page": 100, "page": page},
+            )
+            response.raise_for_status()
+            files.extend(
+                RepoFile(path=item["path"], blob_hash=f"git:{item['id']}")
+                for item in response.json()
+                if item["type"] == "blob"
+            )
+            page = response.headers.get("X-Next-Page") or None
+        return files
+
+    async def read_file(self, repository: str, path: str) -> str:
+        response = await self._client.get(
+            f"/projects/{quote(repository, safe='')}/repository/files/{quote(path, safe='')}/raw",
+            params={"ref": self._refs.get(repository, "HEAD")},
+        )
+        response.raise_for_status()
+        return response.text
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class BitbucketProvider:
+    def __init__(self, token: str) -> None:
+        self._client = httpx.AsyncClient(
+            base_url="https://api.bitbucket.org/2.0",
+            timeout=20,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self._refs: dict[str, str] = {}
+
+    async def list_files(self, repository: str) -> list[RepoFile]:
+        response = await self._client.get(f"/repositories/{repository}")
+        response.raise_for_status()
+        branch = response.json()["mainbranch"]["name"]
+        self._refs[repository] = branch
+
+        files: list[RepoFile] = []
+        pending = [f"/repositories/{repository}/src/{quote(branch, safe='')}/"]
+        while pending:
+            response = await self._client.get(pending.pop(), params={"pagelen": 100})
+            response.raise_for_status()
+            data: dict[str, Any] = response.json()
+            for item in data.get("values", []):
+                if item["type"] == "commit_file":
+                    files.append(RepoFile(path=item["path"], size=item.get("size")))
+                elif item["type"] == "commit_directory":
+                    pending.append(item["links"]["self"]["href"])
+            if data.get("next"):
+                pending.append(data["next"])
+        return files
+
+    async def read_file(self, repository: str, path: str) -> str:
+        branch = quote(self._refs.get(repository, "HEAD"), safe="")
+        response = await self._client.get(f"/repositories/{repository}/src/{branch}/{quote(path)}")
+        response.raise_for_status()
+        return response.text
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class LocalRepoProvider:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    async def list_files(self, repository: str) -> list[RepoFile]:
+        base = self.root / repository
+        return [
+            RepoFile(path=path.relative_to(base).as_posix(), size=path.stat().st_size)
+            for path in sorted(base.rglob("*"))
+            if path.is_file()
+        ]
+
+    async def read_file(self, repository: str, path: str) -> str:
+        return (self.root / repository / path).read_text(encoding="utf-8", errors="replace")
+
+    async def close(self) -> None:
+        return None
+
+
+REPO_PROVIDERS = {"github": GitHubProvider, "gitlab": GitLabProvider, "bitbucket": BitbucketProvider}
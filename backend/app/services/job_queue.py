@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import UTC, datetime
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.core.query_metrics import background_context
+from app.services.connection_manager import manager
+from app.services.redis_client import redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "analysis-jobs:events"
+LATENCY_KEY = "analysis-jobs:latency"
+LATENCY_SAMPLES = 1000
+
+
+class QueueUnavailableError(RuntimeError):
+    pass
+
+
+def _job_key(job_id: str) -> str:
+    return f"analysis-job:{job_id}"
+
+
+def job_room(job_id: str) -> str:
+    return f"analysis-job:{job_id}"
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+async def save_job(job: dict[str, Any]) -> None:
+    await redis.set(_job_key(job["id"]), json.dumps(job), ex=settings.analysis_job_ttl_seconds)
+
+
+async def get_job(job_id: str) -> dict[str, Any] | None:
+    payload = await redis.get(_job_key(job_id))
+    return json.loads(payload) if payload else None
+
+
+async def enqueue_analysis(user_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+    if not hasattr(redis, "xadd"):
+        raise QueueUnavailableError("Async analysis requires Redis")
+    job = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "status": "queued",
+        "attempts": 0,
+        "report": None,
+        "error": None,
+        "enqueued_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    await save_job(job)
+    await redis.xadd(
+        settings.analysis_queue_stream,
+        {"job_id": job["id"], "user_id": user_id, "payload": json.dumps(payload)},
+        maxlen=settings.analysis_queue_maxlen,
+        approximate=True,
+    )
+    return job
+
+
+async def publish_job(job: dict[str, Any]) -> None:
+    await save_job(job)
+    await redis.publish(EVENTS_CHANNEL, json.dumps({"type": "analysis_job", **job}))
+
+
+async def record_latency(queued_ms: float, processing_ms: float) -> None:
+    sample = json.dumps({"queued_ms": round(queued_ms, 1), "processing_ms": round(processing_ms, 1)})
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.lpush(LATENCY_KEY, sample)
+        pipe.ltrim(LATENCY_KEY, 0, LATENCY_SAMPLES - 1)
+        await pipe.execute()
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    return {
+        "p50": ordered[int(0.5 * (len(ordered) - 1))],
+        "p95": ordered[int(0.95 * (len(ordered) - 1))],
+        "max": ordered[-1],
+    }
+
+
+async def queue_stats() -> dict[str, Any]:
+    if not hasattr(redis, "xadd"):
+        return {"enabled": False}
+    stream = settings.analysis_queue_stream
+    try:
+        depth = await redis.xlen(stream)
+        groups = await redis.xinfo_groups(stream) if await redis.exists(stream) else []
+        samples = [json.loads(sample) for sample in await redis.lrange(LATENCY_KEY, 0, LATENCY_SAMPLES - 1)]
+    except RedisError as exc:
+        return {"enabled": True, "error": str(exc)}
+    group = next((item for item in groups if item["name"] == settings.analysis_queue_group), {})
+    return {
+        "enabled": True,
+        "depth": depth,
+        "pending": group.get("pending", 0),
+        "lag": group.get("lag"),
+        "consumers": group.get("consumers", 0),
+        "queued_ms": _percentiles([sample["queued_ms"] for sample in samples]),
+        "processing_ms": _percentiles([sample["processing_ms"] for sample in samples]),
+        "samples": len(samples),
+    }
+
+
+class JobEventRelay:
+    def __init__(self) -> None:
+        self._task: asyncio.Task[None] | None = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        event = json.loads(message["data"])
+                        event.pop("user_id", None)
+                        await manager.broadcast(job_room(event["id"]), event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Analysis job event relay disconnected, retrying", exc_info=True)
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if hasattr(redis, "pubsub") and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._listen(), context=background_context())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+job_events = JobEventRelay()
+
@@ -1,15 +1,165 @@
-from typing import Any
+import asyncio
+import json
+import random
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
 
 import httpx
 
 from app.core.config import get_settings
+from app.services.circuit_breaker import CircuitBreaker
 
 settings = get_settings()
 
+T = TypeVar("T")
 
-async def analyze_with_ml(payload: dict[str, Any]) -> dict[str, Any]:
-    url = f"{settings.ml_service_url}/analyze"
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(url, json=payload)
+
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class MLStreamError(RuntimeError):
+    pass
+
+
+breaker = CircuitBreaker(
+    "ml-service",
+    failure_threshold=settings.ml_breaker_failure_threshold,
+    reset_timeout=settings.ml_breaker_reset_seconds,
+)
+_client: httpx.AsyncClient | None = None
+_stats = {"requests": 0, "retries": 0, "failures": 0, "in_flight": 0}
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.ml_service_url,
+        timeout=httpx.Timeout(settings.ml_timeout_seconds, connect=settings.ml_connect_timeout_seconds),
+        limits=httpx.Limits(
+            max_connections=settings.ml_pool_max_connections,
+            max_keepalive_connections=settings.ml_pool_max_keepalive,
+            keepalive_expiry=settings.ml_keepalive_expiry_seconds,
+        ),
+    )
+
+
+def get_ml_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def start_ml_client() -> None:
+    get_ml_client()
+
+
+async def close_ml_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _backoff(attempt: int) -> float:
+    return settings.ml_retry_backoff_seconds * (2**attempt) * random.uniform(0.5, 1.5)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError) and not isinstance(exc, httpx.ReadTimeout)
+
+
+def _is_failure(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, MLStreamError))
+
+
+@asynccontextmanager
+async def _guarded_call() -> AsyncIterator[None]:
+    breaker.before_call()
+    _stats["requests"] += 1
+    _stats["in_flight"] += 1
+    try:
+        yield
+    except BaseException as exc:
+        if _is_failure(exc):
+            _stats["failures"] += 1
+            breaker.record_failure()
+        elif isinstance(exc, httpx.HTTPStatusError):
+            breaker.record_success()
+        else:
+            breaker.release_probe()
+        raise
+    else:
+        breaker.record_success()
+    finally:
+        _stats["in_flight"] -= 1
+
+
+async def _with_retries(call: Callable[[], Awaitable[T]]) -> T:
+    attempts = max(1, settings.ml_retry_attempts)
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except (httpx.HTTPStatusError, httpx.TransportError) as exc:
+            if attempt == attempts - 1 or not _is_retryable(exc):
+                raise
+            _stats["retries"] += 1
+            await asyncio.sleep(_backoff(attempt))
+    raise AssertionError("unreachable")
+
+
+async def analyze_with_ml(payload: dict[str, Any], embedding_format: str = "none") -> dict[str, Any]:
+    client = get_ml_client()
+
+    async def call() -> dict[str, Any]:
+        response = await client.post("/analyze", json={**payload, "embedding_format": embedding_format})
         response.raise_for_status()
         return response.json()
+
+    async with _guarded_call():
+        return await _with_retries(call)
+
+
+async def stream_analysis_from_ml(payload: dict[str, Any], embedding_format: str = "none") -> AsyncIterator[dict[str, Any]]:
+    client = get_ml_client()
+    body = {**payload, "embedding_format": embedding_format}
+
+    async def open_stream() -> httpx.Response:
+        request = client.build_request("POST", "/analyze/stream", json=body)
+        response = await client.send(request, stream=True)
+        if response.is_error:
+            await response.aclose()
+            response.raise_for_status()
+        return response
+
+    async with _guarded_call():
+        response = await _with_retries(open_stream)
+        try:
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "error":
+                    raise MLStreamError(event.get("detail", "analysis failed"))
+                yield event
+        finally:
+            await response.aclose()
+
+
+def ml_client_stats() -> dict[str, Any]:
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    return {
+        **_stats,
+        "pool": {
+            "max_connections": settings.ml_pool_max_connections,
+            "max_keepalive": settings.ml_pool_max_keepalive,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+        },
+        "breaker": breaker.snapshot(),
+    }
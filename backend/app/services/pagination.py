@@ -0,0 +1,42 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Any
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps({"t": created_at.isoformat(), "id": row_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), str(uuid.UUID(data["id"]))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor") from exc
+
+
+def keyset_filter(cursor: str | None, created_at: str, row_id: str, descending: bool = True) -> tuple[str, dict[str, Any]]:
+    if cursor is None:
+        return "", {}
+    cursor_created_at, cursor_id = decode_cursor(cursor)
+    operator = "<" if descending else ">"
+    return (
+        f"AND ({created_at}, {row_id}) {operator} (:cursor_created_at, :cursor_id::uuid)",
+        {"cursor_created_at": cursor_created_at, "cursor_id": cursor_id},
+    )
+
+
+def keyset_page(rows: list[dict[str, Any]], limit: int) -> tuple[list[dict[str, Any]], str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1]["created_at"], page[-1]["id"])
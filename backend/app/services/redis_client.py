@@ -17,10 +17,18 @@ except ModuleNotFoundError:
         async def get(self, key: str) -> str | None:
             return self.store.get(key)
 
+        async def mget(self, keys: list[str]) -> list[str | None]:
+            return [self.store.get(key) for key in keys]
+
         async def set(self, key: str, value: str, ex: int | None = None) -> bool:
             self.store[key] = value if isinstance(value, str) else json.dumps(value)
             return True
 
+        async def incr(self, key: str) -> int:
+            value = int(self.store.get(key, 0)) + 1
+            self.store[key] = str(value)
+            return value
+
         async def delete(self, key: str) -> int:
             existed = key in self.store
             if existed:
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import PurePosixPath
+from typing import Any
+
+from app.core.config import get_settings
+from app.services.analysis_store import save_analyses
+from app.services.code_blob_store import content_hash
+from app.services.connection_manager import manager
+from app.services.git_providers import RepoFile, RepoProvider
+from app.services.ml_client import analyze_with_ml
+from app.services.redis_client import redis
+from app.services.repo_store import get_file_hashes, save_file_hashes
+from app.services.rule_cache import rule_cache
+from app.services.rule_engine import apply_rule_set
+from app.services.rule_store import list_rules
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+LANGUAGES = {
+    ".py": "python",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".go": "go",
+    ".java": "java",
+    ".kt": "kotlin",
+    ".rb": "ruby",
+    ".rs": "rust",
+    ".php": "php",
+    ".cs": "csharp",
+    ".c": "c",
+    ".h": "c",
+    ".cpp": "cpp",
+    ".cc": "cpp",
+    ".swift": "swift",
+}
+JOB_TTL_SECONDS = 86400
+
+
+def language_for(path: str) -> str | None:
+    return LANGUAGES.get(PurePosixPath(path).suffix.lower())
+
+
+def _job_key(job_id: str) -> str:
+    return f"repo-job:{job_id}"
+
+
+async def create_job(user_id: str, provider: str, repository: str, room: str | None) -> dict[str, Any]:
+    job_id = str(uuid.uuid4())
+    job = {
+        "id": job_id,
+        "user_id": user_id,
+        "provider": provider,
+        "repository": repository,
+        "room": room or f"repo-job:{job_id}",
+        "status": "queued",
+        "total_files": 0,
+        "changed_files": 0,
+        "unchanged_files": 0,
+        "analyzed_files": 0,
+        "failed_files": 0,
+        "removed_files": 0,
+        "error": None,
+        "created_at": datetime.now(UTC).isoformat(),
+        "finished_at": None,
+    }
+    await redis.set(_job_key(job_id), json.dumps(job), ex=JOB_TTL_SECONDS)
+    return job
+
+
+async def get_job(job_id: str) -> dict[str, Any] | None:
+    payload = await redis.get(_job_key(job_id))
+    return json.loads(payload) if payload else None
+
+
+async def _publish(job: dict[str, Any], **event: Any) -> None:
+    await redis.set(_job_key(job["id"]), json.dumps(job), ex=JOB_TTL_SECONDS)
+    message = {"type": "repo_analysis", "job_id": job["id"], "status": job["status"], **event}
+    for field in ("total_files", "changed_files", "unchanged_files", "analyzed_files", "failed_files"):
+        message[field] = job[field]
+    try:
+        await manager.broadcast(job["room"], message)
+    except Exception:
+        logger.warning("Failed to broadcast progress for repo job %s", job["id"], exc_info=True)
+
+
+def _eligible(files: list[RepoFile]) -> list[RepoFile]:
+    eligible = [
+        file
+        for file in files
+        if language_for(file.path) and (file.size is None or file.size <= settings.repo_analysis_max_file_bytes)
+    ]
+    return eligible[: settings.repo_analysis_max_files]
+
+
+async def run_repo_analysis(job: dict[str, Any], provider: RepoProvider, session_factory: Callable[[], Any]) -> dict[str, Any]:
+    user_id, repository = job["user_id"], job["repository"]
+    job["status"] = "running"
+    await _publish(job)
+    try:
+        listed = await provider.list_files(repository)
+        files = _eligible(listed)
+        async with session_factory() as db:
+            known = await get_file_hashes(db, user_id, job["provider"], repository)
+            rule_set = await rule_cache.get(user_id, lambda: list_rules(db, user_id=user_id))
+            await db.commit()
+        removed = sorted(set(known) - {file.path for file in listed})
+        job["total_files"] = len(files)
+        job["removed_files"] = len(removed)
+        await _publish(job)
+
+        semaphore = asyncio.Semaphore(max(1, settings.analysis_batch_concurrency))
+
+        async def analyze(file: RepoFile) -> dict[str, Any] | None:
+            async with semaphore:
+                try:
+                    code = None
+                    digest = file.blob_hash
+                    if digest is None:
+                        code = await provider.read_file(repository, file.path)
+                        digest = content_hash(code)
+                    if known.get(file.path) == digest:
+                        job["unchanged_files"] += 1
+                        return None
+                    job["changed_files"] += 1
+                    if code is None:
+                        code = await provider.read_file(repository, file.path)
+                    if not code.strip():
+                        return {"path": file.path, "content_hash": digest, "report_id": None}
+                    payload = {"code": code, "language": language_for(file.path), "repository": repository}
+                    result = await analyze_with_ml({**payload, "context": {"path": file.path}})
+                except Exception as exc:
+                    logger.warning("Failed to analyze %s in %s", file.path, repository, exc_info=True)
+                    return {"path": file.path, "error": str(exc)}
+                result = apply_rule_set(rule_set, code, result)
+                return {"path": file.path, "content_hash": digest, "report_id": str(uuid.uuid4()), "report": (payload, result)}
+
+        updated: list[dict[str, Any]] = []
+        reports: list[tuple[str, dict[str, Any], dict[str, Any]]] = []
+        for next_done in asyncio.as_completed([analyze(file) for file in files]):
+            outcome = await next_done
+            if outcome is None:
+                continue
+            if "error" in outcome:
+                job["failed_files"] += 1
+                await _publish(job, path=outcome["path"], error=outcome["error"])
+                continue
+            report = outcome.pop("report", None)
+            if report is not None:
+                reports.append((outcome["report_id"], *report))
+                job["analyzed_files"] += 1
+            updated.append(outcome)
+            await _publish(job, path=outcome["path"])
+
+        async with session_factory() as db:
+            await save_analyses(db, user_id=user_id, reports=reports)
+            await save_file_hashes(db, user_id, job["provider"], repository, updated, removed)
+        job["status"] = "completed"
+    except Exception as exc:
+        logger.exception("Repository analysis job %s failed", job["id"])
+        job["status"] = "failed"
+        job["error"] = str(exc)
+    finally:
+        await provider.close()
+    job["finished_at"] = datetime.now(UTC).isoformat()
+    await _publish(job)
+    return job
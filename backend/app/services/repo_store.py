@@ -0,0 +1,58 @@
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def get_file_hashes(session: AsyncSession, user_id: str, provider: str, repository: str) -> dict[str, str]:
+    response = await session.execute(
+        text(
+            """
+            SELECT path, content_hash
+            FROM repo_file_hashes
+            WHERE user_id = :user_id AND provider = :provider AND repository = :repository
+            """
+        ),
+        {"user_id": user_id, "provider": provider, "repository": repository},
+    )
+    return {row.path: row.content_hash for row in response}
+
+
+async def save_file_hashes(
+    session: AsyncSession,
+    user_id: str,
+    provider: str,
+    repository: str,
+    files: list[dict[str, Any]],
+    removed: list[str],
+) -> None:
+    scope = {"user_id": user_id, "provider": provider, "repository": repository}
+    if files:
+        await session.execute(
+            text(
+                """
+                INSERT INTO repo_file_hashes
+                  (id, user_id, provider, repository, path, content_hash, report_id, updated_at)
+                VALUES
+                  (gen_random_uuid(), :user_id, :provider, :repository, :path, :content_hash, :report_id::uuid, NOW())
+                ON CONFLICT (user_id, provider, repository, path)
+                DO UPDATE SET
+                  content_hash = EXCLUDED.content_hash,
+                  report_id = EXCLUDED.report_id,
+                  updated_at = NOW()
+                """
+            ),
+            [{**scope, **file} for file in files],
+        )
+    if removed:
+        await session.execute(
+            text(
+                """
+                DELETE FROM repo_file_hashes
+                WHERE user_id = :user_id AND provider = :provider AND repository = :repository
+                  AND path = ANY(:paths)
+                """
+            ),
+            {**scope, "paths": removed},
+        )
+    await session.commit()
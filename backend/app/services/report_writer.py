@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import _get_session_factory
+from app.core.query_metrics import background_context
+from app.services.analysis_store import insert_reports, save_analysis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ReportBufferFullError(RuntimeError):
+    pass
+
+
+class _PendingReport:
+    __slots__ = ("attempts", "done", "row")
+
+    def __init__(self, row: tuple[str, str, dict[str, Any], dict[str, Any]], done: asyncio.Future[None] | None) -> None:
+        self.row = row
+        self.done = done
+        self.attempts = 0
+
+
+class ReportWriter:
+    def __init__(
+        self,
+        mode: str,
+        max_rows: int,
+        interval_ms: float,
+        max_buffered: int,
+        max_attempts: int = 3,
+        session_factory: Callable[[], Any] | None = None,
+    ) -> None:
+        self.mode = mode
+        self.max_rows = max(1, max_rows)
+        self.interval = interval_ms / 1000
+        self.max_buffered = max(self.max_rows, max_buffered)
+        self.max_attempts = max_attempts
+        self._session_factory = session_factory
+        self._buffer: list[_PendingReport] = []
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._closing = False
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "dropped": 0,
+            "rejected": 0,
+            "flush_ms": 0.0,
+        }
+
+    async def save(self, session: AsyncSession, user_id: str, payload: dict[str, Any], result: dict[str, Any]) -> str:
+        if self.mode == "sync":
+            return await save_analysis(session, user_id=user_id, payload=payload, result=result)
+
+        self.start()
+        if len(self._buffer) >= self.max_buffered:
+            await self.flush()
+            if len(self._buffer) >= self.max_buffered:
+                self._stats["rejected"] += 1
+                raise ReportBufferFullError("Report buffer is full")
+        report_id = str(uuid.uuid4())
+        done = asyncio.get_running_loop().create_future() if self.mode == "group_commit" else None
+        self._buffer.append(_PendingReport((report_id, user_id, payload, result), done))
+        self._stats["enqueued"] += 1
+        if len(self._buffer) >= self.max_rows:
+            self._wake.set()
+        if done is not None:
+            await done
+        return report_id
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=background_context())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        async with self._flush_lock:
+            while self._buffer:
+                batch, self._buffer = self._buffer[: self.max_rows], self._buffer[self.max_rows :]
+                if not await self._write(batch):
+                    return False
+        return True
+
+    async def _write(self, batch: list[_PendingReport]) -> bool:
+        started = time.perf_counter()
+        factory = self._session_factory or _get_session_factory()
+        try:
+            async with factory() as session:
+                await insert_reports(session, [pending.row for pending in batch])
+                await session.commit()
+        except Exception as exc:
+            self._stats["failed_flushes"] += 1
+            logger.warning("Failed to write %s buffered reports: %s", len(batch), exc, exc_info=True)
+            retry: list[_PendingReport] = []
+            for pending in batch:
+                pending.attempts += 1
+                if pending.done is not None:
+                    if not pending.done.done():
+                        pending.done.set_exception(exc)
+                elif pending.attempts < self.max_attempts:
+                    retry.append(pending)
+                else:
+                    self._stats["dropped"] += 1
+            overflow = len(retry) + len(self._buffer) - self.max_buffered
+            if overflow > 0:
+                logger.error("Dropping %s buffered reports over the %s row cap", overflow, self.max_buffered)
+                self._stats["dropped"] += overflow
+                retry = retry[overflow:]
+            self._buffer[:0] = retry
+            return not retry
+        self._stats["flushes"] += 1
+        self._stats["written"] += len(batch)
+        self._stats["flush_ms"] += (time.perf_counter() - started) * 1000
+        for pending in batch:
+            if pending.done is not None and not pending.done.done():
+                pending.done.set_result(None)
+        return True
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            self._closing = False
+        for _ in range(self.max_attempts):
+            if await self.flush():
+                return
+            await asyncio.sleep(0.5)
+        if self._buffer:
+            logger.error("Dropping %s buffered reports that could not be written at shutdown", len(self._buffer))
+            self._stats["dropped"] += len(self._buffer)
+            self._buffer.clear()
+
+    def stats(self) -> dict[str, Any]:
+        flushes = self._stats["flushes"]
+        return {
+            "mode": self.mode,
+            **{key: value for key, value in self._stats.items() if key != "flush_ms"},
+            "buffered": len(self._buffer),
+            "avg_flush_ms": round(self._stats["flush_ms"] / flushes, 3) if flushes else 0.0,
+            "avg_rows_per_flush": round(self._stats["written"] / flushes, 2) if flushes else 0.0,
+        }
+
+
+report_writer = ReportWriter(
+    mode=settings.report_write_mode,
+    max_rows=settings.report_flush_max_rows,
+    interval_ms=settings.report_flush_interval_ms,
+    max_buffered=settings.report_buffer_max_rows,
+)
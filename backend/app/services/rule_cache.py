@@ -0,0 +1,87 @@
+import json
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict
+from typing import Any
+
+from app.core.config import get_settings
+from app.services.redis_client import redis
+from app.services.rule_engine import CompiledRuleSet, Rule
+
+settings = get_settings()
+
+
+class RuleSetCache:
+    def __init__(self, max_users: int, ttl: int) -> None:
+        self.max_users = max_users
+        self.ttl = ttl
+        self._local: OrderedDict[str, tuple[str, CompiledRuleSet]] = OrderedDict()
+        self._versions: OrderedDict[str, str] = OrderedDict()
+        self._stats = {"local_hits": 0, "redis_hits": 0, "db_loads": 0, "invalidations": 0}
+
+    @staticmethod
+    def _version_key(user_id: str) -> str:
+        return f"rules:version:{user_id}"
+
+    async def version(self, user_id: str) -> str:
+        version = self._versions.get(user_id)
+        if version is None:
+            version = await redis.get(self._version_key(user_id)) or "0"
+            self._remember_version(user_id, version)
+        return version
+
+    def _remember_version(self, user_id: str, version: str) -> None:
+        self._versions[user_id] = version
+        self._versions.move_to_end(user_id)
+        while len(self._versions) > self.max_users:
+            self._versions.popitem(last=False)
+
+    def forget(self, user_id: str | None = None) -> None:
+        if user_id is None:
+            self._versions.clear()
+        else:
+            self._versions.pop(user_id, None)
+
+    async def get(self, user_id: str, load: Callable[[], Awaitable[list[Rule]]]) -> CompiledRuleSet:
+        version = await self.version(user_id)
+        cached = self._local.get(user_id)
+        if cached is not None and cached[0] == version:
+            self._local.move_to_end(user_id)
+            self._stats["local_hits"] += 1
+            return cached[1]
+
+        blob_key = f"rules:{user_id}:{version}"
+        raw = await redis.get(blob_key)
+        if raw:
+            self._stats["redis_hits"] += 1
+            rules = [Rule(**rule) for rule in json.loads(raw)]
+        else:
+            self._stats["db_loads"] += 1
+            rules = await load()
+            await redis.set(blob_key, json.dumps([asdict(rule) for rule in rules]), ex=self.ttl)
+
+        rule_set = CompiledRuleSet(rules)
+        self._local[user_id] = (version, rule_set)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_users:
+            self._local.popitem(last=False)
+        return rule_set
+
+    async def invalidate(self, user_id: str) -> None:
+        self._stats["invalidations"] += 1
+        version = await redis.incr(self._version_key(user_id))
+        self._local.pop(user_id, None)
+        self._remember_version(user_id, str(version))
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._stats["local_hits"] + self._stats["redis_hits"] + self._stats["db_loads"]
+        saved = lookups - self._stats["db_loads"]
+        return {
+            **self._stats,
+            "users": len(self._local),
+            "db_queries_saved": saved,
+            "hit_rate": round(saved / lookups, 4) if lookups else 0.0,
+        }
+
+
+rule_cache = RuleSetCache(max_users=settings.rule_cache_users, ttl=settings.rule_cache_ttl_seconds)
@@ -1,5 +1,14 @@
+import logging
 import re
-from dataclasses import dataclass
+from bisect import bisect_right
+from dataclasses import asdict, dataclass
+from re import _constants as sre
+from re import _parser as sre_parse
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+REPEATS = {sre.MAX_REPEAT, sre.MIN_REPEAT, sre.POSSESSIVE_REPEAT}
 
 
 @dataclass
@@ -12,11 +21,179 @@ class Rule:
     enabled: bool = True
 
 
-def apply_rules(code: str, rules: list[Rule]) -> list[str]:
-    findings: list[str] = []
-    for rule in rules:
-        if not rule.enabled:
+@dataclass
+class RuleFinding:
+    rule_id: str
+    name: str
+    message: str
+    severity: str
+    line: int
+    column: int
+    end_line: int
+    end_column: int
+
+    def describe(self) -> str:
+        return f"[{self.severity}] {self.name}: {self.message}"
+
+
+def _requirements(data: list) -> list[frozenset[str]]:
+    requirements: list[frozenset[str]] = []
+    run: list[str] = []
+    for op, av in data:
+        if op is sre.LITERAL:
+            run.append(chr(av))
             continue
-        if re.search(rule.pattern, code, re.MULTILINE):
-            findings.append(f"[{rule.severity}] {rule.name}: {rule.message}")
-    return findings
+        if run:
+            requirements.append(frozenset({"".join(run)}))
+            run.clear()
+        if op is sre.SUBPATTERN:
+            _, add_flags, _, sub = av
+            if not add_flags & sre.SRE_FLAG_IGNORECASE:
+                requirements.extend(_requirements(sub.data))
+        elif op is sre.ATOMIC_GROUP:
+            requirements.extend(_requirements(av.data))
+        elif op in REPEATS:
+            low, _, sub = av
+            if low >= 1:
+                requirements.extend(_requirements(sub.data))
+        elif op is sre.BRANCH:
+            alternatives = [_best(_requirements(branch.data)) for branch in av[1]]
+            if all(alternatives):
+                requirements.append(frozenset().union(*alternatives))
+    if run:
+        requirements.append(frozenset({"".join(run)}))
+    return requirements
+
+
+def _best(requirements: list[frozenset[str]]) -> frozenset[str] | None:
+    return max(requirements, key=lambda literals: min(map(len, literals)), default=None)
+
+
+def required_literals(pattern: str) -> tuple[frozenset[str] | None, bool]:
+    parsed = sre_parse.parse(pattern, re.MULTILINE)
+    ignore_case = bool(parsed.state.flags & sre.SRE_FLAG_IGNORECASE)
+    literals = _best(_requirements(parsed.data))
+    if literals and ignore_case:
+        literals = frozenset(literal.casefold() for literal in literals)
+    return literals, ignore_case
+
+
+def _trie_pattern(literals: set[str]) -> str:
+    trie: dict = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class LiteralScanner:
+    def __init__(self, literals: set[str]) -> None:
+        self.literals = literals
+        self._regex = re.compile(f"(?=({_trie_pattern(literals)}))") if literals else None
+        self._prefixes = {
+            literal: [literal[:size] for size in range(1, len(literal) + 1) if literal[:size] in literals]
+            for literal in literals
+        }
+
+    def scan(self, text: str) -> set[str]:
+        if self._regex is None:
+            return set()
+        found: set[str] = set()
+        for longest in set(self._regex.findall(text)):
+            found.update(self._prefixes[longest])
+        return found
+
+
+class CompiledRuleSet:
+    def __init__(self, rules: list[Rule]) -> None:
+        self.rules: list[tuple[Rule, re.Pattern[str]]] = []
+        self.unfiltered: list[int] = []
+        self.skipped: list[str] = []
+        by_case: dict[bool, dict[str, list[int]]] = {False: {}, True: {}}
+        for rule in rules:
+            if not rule.enabled:
+                continue
+            try:
+                compiled = re.compile(rule.pattern, re.MULTILINE)
+                literals, ignore_case = required_literals(rule.pattern)
+            except (re.error, RecursionError) as exc:
+                logger.warning("Skipping rule %s with invalid pattern: %s", rule.id, exc)
+                self.skipped.append(rule.id)
+                continue
+            position = len(self.rules)
+            self.rules.append((rule, compiled))
+            if not literals:
+                self.unfiltered.append(position)
+                continue
+            for literal in literals:
+                by_case[ignore_case].setdefault(literal, []).append(position)
+        self._sensitive = by_case[False]
+        self._insensitive = by_case[True]
+        self._sensitive_scanner = LiteralScanner(set(self._sensitive))
+        self._insensitive_scanner = LiteralScanner(set(self._insensitive))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def candidates(self, code: str) -> list[int]:
+        positions = set(self.unfiltered)
+        for literal in self._sensitive_scanner.scan(code):
+            positions.update(self._sensitive[literal])
+        if self._insensitive:
+            for literal in self._insensitive_scanner.scan(code.casefold()):
+                positions.update(self._insensitive[literal])
+        return sorted(positions)
+
+    def match(self, code: str) -> list[RuleFinding]:
+        findings: list[RuleFinding] = []
+        line_starts: list[int] | None = None
+        for position in self.candidates(code):
+            rule, compiled = self.rules[position]
+            found = compiled.search(code)
+            if found is None:
+                continue
+            if line_starts is None:
+                line_starts = [0, *(newline.end() for newline in re.finditer("\n", code))]
+            line, column = _location(line_starts, found.start())
+            end_line, end_column = _location(line_starts, found.end())
+            findings.append(
+                RuleFinding(
+                    rule_id=rule.id,
+                    name=rule.name,
+                    message=rule.message,
+                    severity=rule.severity,
+                    line=line,
+                    column=column,
+                    end_line=end_line,
+                    end_column=end_column,
+                )
+            )
+        return findings
+
+
+def _location(line_starts: list[int], offset: int) -> tuple[int, int]:
+    line = bisect_right(line_starts, offset)
+    return line, offset - line_starts[line - 1] + 1
+
+
+def apply_rule_set(rule_set: CompiledRuleSet, code: str, result: dict[str, Any]) -> dict[str, Any]:
+    findings = rule_set.match(code)
+    if findings:
+        result["bugs"] = [*result.get("bugs", []), *(finding.describe() for finding in findings)]
+        result["score"] = max(0.0, float(result.get("score", 0.7)) - min(0.4, len(findings) * 0.05))
+        result["rule_findings"] = [asdict(finding) for finding in findings]
+    return result
+
+
+def apply_rules(code: str, rules: list[Rule]) -> list[str]:
+    return [finding.describe() for finding in CompiledRuleSet(rules).match(code)]
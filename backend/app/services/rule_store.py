@@ -4,6 +4,7 @@ from typing import Any
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.services.rule_cache import rule_cache
 from app.services.rule_engine import Rule
 
 
@@ -41,6 +42,7 @@ async def create_rule(session: AsyncSession, user_id: str, payload: dict[str, An
         },
     )
     await session.commit()
+    await rule_cache.invalidate(user_id)
     return Rule(id=rule_id, enabled=True, **payload)
 
 
@@ -0,0 +1,101 @@
+import asyncio
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.core.config import get_settings
+from app.services.redis_client import redis
+
+settings = get_settings()
+
+FAILED = "__single_flight_failed__"
+RELEASE_LOCK = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    def __init__(self, prefix: str, timeout: float) -> None:
+        self.prefix = prefix
+        self.timeout = timeout
+        self._flights: dict[str, asyncio.Task[str]] = {}
+        self._stats = {"leaders": 0, "local_followers": 0, "remote_followers": 0, "remote_timeouts": 0}
+
+    @property
+    def distributed(self) -> bool:
+        return hasattr(redis, "pubsub")
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._stats["local_followers"] += 1
+            return await asyncio.shield(flight)
+
+        runner = self._run_distributed if self.distributed else self._lead
+        flight = asyncio.get_running_loop().create_task(runner(key, compute))
+        self._flights[key] = flight
+        flight.add_done_callback(lambda done: self._land(key, done))
+        return await asyncio.shield(flight)
+
+    def _land(self, key: str, flight: asyncio.Task[str]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()
+
+    async def _lead(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        self._stats["leaders"] += 1
+        return await compute()
+
+    async def _run_distributed(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        lock_key = f"{self.prefix}:lock:{key}"
+        channel = f"{self.prefix}:done:{key}"
+        token = uuid.uuid4().hex
+        if await redis.set(lock_key, token, nx=True, px=int(self.timeout * 1000)):
+            try:
+                value = await self._lead(key, compute)
+            except BaseException:
+                await redis.publish(channel, FAILED)
+                raise
+            else:
+                await redis.publish(channel, value)
+                return value
+            finally:
+                await redis.eval(RELEASE_LOCK, 1, lock_key, token)
+
+        value = await self._await_remote(key, lock_key, channel)
+        if value is None:
+            return await self._lead(key, compute)
+        self._stats["remote_followers"] += 1
+        return value
+
+    async def _await_remote(self, key: str, lock_key: str, channel: str) -> str | None:
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            cached = await redis.get(key)
+            if cached:
+                return cached
+            if not await redis.exists(lock_key):
+                return None
+            deadline = time.monotonic() + self.timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 1.0))
+                if message is None:
+                    continue
+                return None if message["data"] == FAILED else message["data"]
+            self._stats["remote_timeouts"] += 1
+            return None
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, "in_flight": len(self._flights), "distributed": self.distributed}
+
+
+analysis_flight = SingleFlight("singleflight", timeout=settings.single_flight_timeout_seconds)
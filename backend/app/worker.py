@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from datetime import UTC, datetime
+
+import httpx
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import get_settings
+from app.core.database import _get_session_factory
+from app.models.schemas import AnalyzeRequest
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_pipeline import cache_key, finalize_analysis
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.job_queue import get_job, publish_job, record_latency
+from app.services.ml_client import analyze_with_ml, close_ml_client
+from app.services.redis_client import redis
+from app.services.report_writer import ReportBufferFullError, report_writer
+from app.services.rule_cache import rule_cache
+
+settings = get_settings()
+logger = logging.getLogger("app.worker")
+
+JOB_ERRORS = (httpx.HTTPError, CircuitOpenError, ReportBufferFullError, SQLAlchemyError, RedisError)
+
+
+class AnalysisWorker:
+    def __init__(self, consumer: str, concurrency: int) -> None:
+        self.stream = settings.analysis_queue_stream
+        self.group = settings.analysis_queue_group
+        self.consumer = consumer
+        self.concurrency = max(1, concurrency)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._stopping = asyncio.Event()
+
+    async def ensure_group(self) -> None:
+        try:
+            await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def _claim_stale(self) -> list[tuple[str, dict[str, str]]]:
+        _, messages, _ = await redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=int(settings.analysis_job_visibility_seconds * 1000),
+            start_id="0-0",
+            count=self.concurrency,
+        )
+        return messages
+
+    async def _read_new(self) -> list[tuple[str, dict[str, str]]]:
+        response = await redis.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: ">"},
+            count=self.concurrency,
+            block=2000,
+        )
+        return [message for _, messages in response for message in messages]
+
+    async def _ack(self, message_id: str) -> None:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            await pipe.execute()
+
+    async def handle(self, message_id: str, fields: dict[str, str]) -> None:
+        job = await get_job(fields["job_id"])
+        if job is None or job["status"] in ("completed", "failed"):
+            await self._ack(message_id)
+            return
+
+        job["attempts"] += 1
+        if job["attempts"] > settings.analysis_job_max_attempts:
+            job.update(status="failed", finished_at=datetime.now(UTC).isoformat())
+            await publish_job(job)
+            await self._ack(message_id)
+            return
+
+        started = time.perf_counter()
+        job.update(status="running", started_at=datetime.now(UTC).isoformat())
+        await publish_job(job)
+        payload = AnalyzeRequest(**json.loads(fields["payload"]))
+        try:
+            key = cache_key(payload, fields["user_id"], await rule_cache.version(fields["user_id"]))
+            response = await analysis_cache.get(key)
+            if response is None:
+                result = await analyze_with_ml(payload.model_dump())
+                async with _get_session_factory()() as db:
+                    response = await finalize_analysis(db, fields["user_id"], payload, result, key)
+        except JOB_ERRORS as exc:
+            logger.warning("Analysis job %s attempt %s failed: %s", job["id"], job["attempts"], exc)
+            final = job["attempts"] >= settings.analysis_job_max_attempts
+            job.update(status="failed" if final else "retrying", error=str(exc))
+            if final:
+                job["finished_at"] = datetime.now(UTC).isoformat()
+            await publish_job(job)
+            if final:
+                await self._ack(message_id)
+            return
+
+        finished = datetime.now(UTC)
+        job.update(status="completed", error=None, report=response.model_dump(mode="json"), finished_at=finished.isoformat())
+        await publish_job(job)
+        await self._ack(message_id)
+        queued_ms = (finished - datetime.fromisoformat(job["enqueued_at"])).total_seconds() * 1000
+        processing_ms = (time.perf_counter() - started) * 1000
+        await record_latency(queued_ms - processing_ms, processing_ms)
+
+    async def _keep_claimed(self, message_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.analysis_job_visibility_seconds / 3)
+            try:
+                await redis.xclaim(self.stream, self.group, self.consumer, min_idle_time=0, message_ids=[message_id], justid=True)
+            except RedisError:
+                logger.warning("Failed to extend the claim on stream message %s", message_id, exc_info=True)
+
+    async def _run_one(self, message_id: str, fields: dict[str, str]) -> None:
+        heartbeat = asyncio.create_task(self._keep_claimed(message_id))
+        try:
+            await self.handle(message_id, fields)
+        except Exception:
+            logger.exception("Unexpected error processing stream message %s", message_id)
+        finally:
+            heartbeat.cancel()
+            self._slots.release()
+
+    async def _dispatch(self, messages: list[tuple[str, dict[str, str]]]) -> None:
+        for message_id, fields in messages:
+            await self._slots.acquire()
+            task = asyncio.create_task(self._run_one(message_id, fields))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def run(self) -> None:
+        await self.ensure_group()
+        logger.info("Worker %s consuming %s/%s with concurrency %s", self.consumer, self.stream, self.group, self.concurrency)
+        while not self._stopping.is_set():
+            try:
+                await self._dispatch(await self._claim_stale())
+                await self._dispatch(await self._read_new())
+            except Exception:
+                logger.exception("Worker loop error, retrying")
+                await asyncio.sleep(1.0)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    worker = AnalysisWorker(f"{socket.gethostname()}-{os.getpid()}", settings.analysis_worker_concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await report_writer.close()
+        await close_ml_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import _get_session_factory
+from app.services.collaboration_store import insert_room_notifications
+
+SENDER = "bench-sender"
+
+
+async def _legacy(session: AsyncSession, room_id: str, sender_id: str, title: str, body: str) -> int:
+    users = await session.execute(
+        text("SELECT user_id FROM review_participants WHERE room_id = :room_id::uuid AND user_id <> :sender"),
+        {"room_id": room_id, "sender": sender_id},
+    )
+    created = 0
+    for row in users:
+        await session.execute(
+            text(
+                """
+                INSERT INTO notifications(id, user_id, title, body, read)
+                VALUES (gen_random_uuid(), :user_id, :title, :body, false)
+                """
+            ),
+            {"user_id": row.user_id, "title": title, "body": body},
+        )
+        created += 1
+    return created
+
+
+async def _create_room(session: AsyncSession, participants: int) -> str:
+    response = await session.execute(
+        text(
+            """
+            INSERT INTO review_rooms(id, name, repository, created_by)
+            VALUES (gen_random_uuid(), :name, NULL, :sender)
+            RETURNING id::text
+            """
+        ),
+        {"name": f"bench-fanout-{participants}", "sender": SENDER},
+    )
+    room_id = response.scalar_one()
+    await session.execute(
+        text(
+            """
+            INSERT INTO review_participants(id, room_id, user_id, role)
+            SELECT gen_random_uuid(), :room_id::uuid, 'bench-user-' || n, 'reviewer'
+            FROM generate_series(1, :participants) AS n
+            UNION ALL
+            SELECT gen_random_uuid(), :room_id::uuid, :sender, 'owner'
+            """
+        ),
+        {"room_id": room_id, "participants": participants, "sender": SENDER},
+    )
+    return room_id
+
+
+async def _timed(
+    session: AsyncSession,
+    fan_out: Callable[[AsyncSession, str, str, str, str], Awaitable[int]],
+    room_id: str,
+    participants: int,
+    repeats: int,
+) -> float:
+    samples: list[float] = []
+    for _ in range(repeats):
+        savepoint = await session.begin_nested()
+        started = time.perf_counter()
+        created = await fan_out(session, room_id, SENDER, "Benchmark", "fan-out")
+        samples.append((time.perf_counter() - started) * 1000)
+        await savepoint.rollback()
+        assert created == participants
+    return statistics.median(samples)
+
+
+async def run(sizes: list[int], repeats: int) -> None:
+    async with _get_session_factory()() as session:
+        try:
+            for participants in sizes:
+                room_id = await _create_room(session, participants)
+                legacy_ms = await _timed(session, _legacy, room_id, participants, repeats)
+                set_ms = await _timed(session, insert_room_notifications, room_id, participants, repeats)
+                print(
+                    f"participants={participants} legacy={legacy_ms:.1f}ms "
+                    f"set_based={set_ms:.1f}ms speedup={legacy_ms / set_ms:.1f}x"
+                )
+        finally:
+            await session.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-row and set-based notification fan-out against DATABASE_URL")
+    parser.add_argument("--participants", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.participants, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
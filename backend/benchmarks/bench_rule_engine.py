@@ -0,0 +1,76 @@
+import argparse
+import random
+import re
+import time
+
+from app.services.rule_engine import CompiledRuleSet, Rule
+
+TEMPLATES = [
+    r"\b{name}\(",
+    r"(?i)api_key_{name}\s*=\s*['\"]",
+    r"console\.{name}\(|print_{name}\(",
+    r"^\s*import {name}\b",
+    r"{name}(Sync)?\([^)]*\)",
+]
+
+
+def _rules(count: int) -> list[Rule]:
+    return [
+        Rule(
+            id=str(index),
+            name=f"rule-{index}",
+            pattern=TEMPLATES[index % len(TEMPLATES)].format(name=f"symbol{index}"),
+            message="matched",
+        )
+        for index in range(count)
+    ]
+
+
+def _code(lines: int, rules: int, seed: int) -> str:
+    rng = random.Random(seed)
+    body = []
+    for index in range(lines):
+        if index % 97 == 0:
+            body.append(f"    const value{index} = symbol{rng.randrange(rules)}(input, {index});")
+        else:
+            body.append(f"    const value{index} = compute(items[{index}], options.limit) + offset;")
+    return "\n".join(body)
+
+
+def _legacy(code: str, rules: list[Rule]) -> list[str]:
+    return [rule.id for rule in rules if re.search(rule.pattern, code, re.MULTILINE)]
+
+
+def _timed(fn, repeats: int) -> tuple[float, object]:
+    result = fn()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - started) / repeats * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the compiled rule set with per-rule re.search")
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rules = _rules(args.rules)
+    code = _code(args.lines, args.rules, seed=7)
+
+    started = time.perf_counter()
+    compiled = CompiledRuleSet(rules)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    legacy_ms, legacy = _timed(lambda: _legacy(code, rules), args.repeats)
+    compiled_ms, findings = _timed(lambda: compiled.match(code), args.repeats)
+    assert sorted(legacy, key=int) == [finding.rule_id for finding in findings]
+
+    print(f"rules={args.rules} lines={args.lines} chars={len(code):,} matches={len(findings)}")
+    print(f"compile={build_ms:.1f}ms candidates={len(compiled.candidates(code))} unfiltered={len(compiled.unfiltered)}")
+    print(f"legacy={legacy_ms:.1f}ms compiled={compiled_ms:.1f}ms speedup={legacy_ms / compiled_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
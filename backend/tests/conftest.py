@@ -1,6 +1,95 @@
 import sys
 from pathlib import Path
+from typing import Any, Self
+
+import pytest
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+class FakeSession:
+    def __init__(self, name: str = "primary", healthy: bool = True) -> None:
+        self.name = name
+        self.healthy = healthy
+        self.params: list[Any] = []
+        self.commits = 0
+        self.closed = False
+        self.info: dict[str, Any] = {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        self.closed = True
+
+    async def execute(self, statement: Any, params: Any = None) -> None:
+        self.params.extend(params if isinstance(params, list) else [params])
+
+    async def connection(self) -> None:
+        if not self.healthy:
+            raise ConnectionRefusedError(f"{self.name} is down")
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeSessionFactory:
+    def __init__(self, name: str = "primary", healthy: bool = True) -> None:
+        self.name = name
+        self.healthy = healthy
+        self.sessions: list[FakeSession] = []
+
+    def __call__(self) -> FakeSession:
+        self.sessions.append(FakeSession(self.name, self.healthy))
+        return self.sessions[-1]
+
+    @property
+    def commits(self) -> int:
+        return sum(session.commits for session in self.sessions)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None, **kwargs: Any) -> bool:
+        self.store[key] = value
+        return True
+
+    async def incr(self, key: str) -> int:
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+        return int(self.store[key])
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+
+@pytest.fixture
+def fake_session() -> FakeSession:
+    return FakeSession()
+
+
+@pytest.fixture
+def make_session_factory() -> type[FakeSessionFactory]:
+    return FakeSessionFactory
+
+
+@pytest.fixture
+def session_factory() -> FakeSessionFactory:
+    return FakeSessionFactory()
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
@@ -0,0 +1,50 @@
+import json
+
+from app.api import analysis
+from app.models.schemas import AnalyzeRequest
+from app.services.rule_engine import CompiledRuleSet
+
+
+class FakeAnalysisCache:
+    def __init__(self) -> None:
+        self.stored: dict = {}
+
+    async def get_many(self, keys: list[str]) -> dict:
+        return {key: None for key in keys}
+
+    async def set_many(self, values: dict) -> None:
+        self.stored.update(values)
+
+
+class FakeRuleCache:
+    async def version(self, user_id: str) -> str:
+        return "0"
+
+    async def get(self, user_id: str, load: object) -> CompiledRuleSet:
+        return CompiledRuleSet([])
+
+
+async def test_batch_releases_the_session_and_marks_items_provisional(monkeypatch, session_factory) -> None:
+    saved: list[str] = []
+
+    async def analyze_with_ml(payload):
+        assert all(session.closed for session in session_factory.sessions)
+        return {"suggestions": [], "bugs": [], "optimizations": [], "documentation": "", "score": 0.9}
+
+    async def save_analyses(db, user_id, reports):
+        saved.extend(report_id for report_id, _, _ in reports)
+
+    monkeypatch.setattr(analysis, "_get_session_factory", lambda: session_factory)
+    monkeypatch.setattr(analysis, "analysis_cache", FakeAnalysisCache())
+    monkeypatch.setattr(analysis, "rule_cache", FakeRuleCache())
+    monkeypatch.setattr(analysis, "analyze_with_ml", analyze_with_ml)
+    monkeypatch.setattr(analysis, "save_analyses", save_analyses)
+
+    items = [AnalyzeRequest(code="print(1)", language="python"), AnalyzeRequest(code="print(2)", language="python")]
+    events = [json.loads(line) async for line in analysis._relay_batch(items, "user")]
+
+    assert [event["provisional"] for event in events[:-1]] == [True, True]
+    assert events[-1]["type"] == "complete"
+    assert sorted(events[-1]["saved_report_ids"]) == sorted(saved)
+    assert sorted(event["report"]["id"] for event in events[:-1]) == sorted(saved)
+    assert len(session_factory.sessions) == 2
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from app.models.schemas import AnalyzeResponse
+from app.services.analysis_cache import LocalResultCache
+
+
+def _report(report_id: str) -> AnalyzeResponse:
+    return AnalyzeResponse(
+        id=report_id,
+        suggestions=[],
+        bugs=[],
+        optimizations=[],
+        documentation="",
+        score=0.9,
+        created_at=datetime(2024, 1, 1),
+    )
+
+
+def test_local_cache_evicts_by_bytes_and_serves_stale() -> None:
+    cache = LocalResultCache(max_entries=10, max_bytes=250, ttl=0.0, stale_ttl=60.0)
+    cache.put("a", _report("a"), 100)
+    cache.put("b", _report("b"), 100)
+    cache.put("c", _report("c"), 100)
+
+    assert cache.get("a") is None
+    value, fresh = cache.get("c")
+    assert value.id == "c"
+    assert not fresh
+    assert cache.stats()["bytes"] == 200
+
+    cache.invalidate()
+    assert cache.get("b") is None
@@ -0,0 +1,21 @@
+import json
+
+from app.services.analysis_store import record_stats
+
+
+async def test_record_stats_groups_deltas_per_user_newest_first(fake_session) -> None:
+    reports = [
+        ("alice", "00000000-0000-0000-0000-000000000001", "python", 0.9),
+        ("bob", "00000000-0000-0000-0000-000000000002", "go", 0.4),
+        ("alice", "00000000-0000-0000-0000-000000000009", "rust", 0.3),
+        *[("alice", f"00000000-0000-0000-0000-00000000000{index}", "typescript", 0.8) for index in range(3, 7)],
+    ]
+    await record_stats(fake_session, reports)
+
+    by_user = {params["user_id"]: params for params in fake_session.params}
+    assert [params["user_id"] for params in fake_session.params] == ["alice", "bob"]
+    assert by_user["alice"]["count"] == 6
+    assert by_user["alice"]["high_risk"] == 1
+    assert round(by_user["alice"]["score_sum"], 6) == 4.4
+    assert json.loads(by_user["alice"]["languages"]) == ["rust"] + ["typescript"] * 4
+    assert json.loads(by_user["bob"]["languages"]) == ["go"]
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+
+from app.api import analysis
+from app.models.schemas import AnalyzeRequest, AnalyzeResponse
+
+
+class FakeAnalysisCache:
+    async def get(self, key: str) -> None:
+        return
+
+
+class FakeRuleCache:
+    async def version(self, user_id: str) -> str:
+        return "0"
+
+
+async def _events(monkeypatch, session_factory, finalize) -> list[dict]:
+    async def stream_analysis_from_ml(payload):
+        yield {"type": "section", "section": "bugs", "items": ["unchecked input"]}
+        yield {"type": "section", "section": "suggestions", "items": []}
+        yield {"type": "result", "result": {"bugs": ["unchecked input"], "score": 0.8}}
+
+    monkeypatch.setattr(analysis, "_get_session_factory", lambda: session_factory)
+    monkeypatch.setattr(analysis, "analysis_cache", FakeAnalysisCache())
+    monkeypatch.setattr(analysis, "rule_cache", FakeRuleCache())
+    monkeypatch.setattr(analysis, "stream_analysis_from_ml", stream_analysis_from_ml)
+    monkeypatch.setattr(analysis, "finalize_analysis", finalize)
+    lines = analysis._relay_analysis(AnalyzeRequest(code="print(1)", language="python"), "user")
+    return [json.loads(line) async for line in lines]
+
+
+async def test_stream_relays_sections_then_the_saved_report(monkeypatch, session_factory) -> None:
+    async def finalize(db, user_id, payload, result, key):
+        return AnalyzeResponse(
+            id="report",
+            suggestions=[],
+            bugs=result["bugs"],
+            optimizations=[],
+            documentation="",
+            score=0.8,
+            created_at=datetime(2026, 1, 1),
+        )
+
+    events = await _events(monkeypatch, session_factory, finalize)
+
+    assert [(event["type"], event.get("section")) for event in events] == [
+        ("section", "bugs"),
+        ("section", "suggestions"),
+        ("complete", None),
+    ]
+    assert events[-1]["report"]["id"] == "report"
+
+
+async def test_stream_ends_with_an_error_event_when_saving_fails(monkeypatch, session_factory) -> None:
+    async def finalize(db, user_id, payload, result, key):
+        raise ConnectionError("redis is down")
+
+    events = await _events(monkeypatch, session_factory, finalize)
+
+    assert [event["type"] for event in events] == ["section", "section", "error"]
+    assert events[-1]["detail"] == "Failed to save analysis: redis is down"
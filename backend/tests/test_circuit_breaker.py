@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import ml_client
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def test_circuit_opens_after_threshold_and_recovers() -> None:
+    breaker = CircuitBreaker("ml", failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+async def test_cancelled_calls_release_the_probe_without_counting_failures(monkeypatch) -> None:
+    breaker = CircuitBreaker("ml", failure_threshold=2, reset_timeout=0.0)
+    monkeypatch.setattr(ml_client, "breaker", breaker)
+    started = asyncio.Event()
+
+    class HangingClient:
+        async def post(self, *args, **kwargs):
+            started.set()
+            await asyncio.sleep(3600)
+
+    monkeypatch.setattr(ml_client, "get_ml_client", lambda: HangingClient())
+    calls = [asyncio.create_task(ml_client.analyze_with_ml({"code": "x"})) for _ in range(8)]
+    await started.wait()
+    for call in calls:
+        call.cancel()
+    await asyncio.gather(*calls, return_exceptions=True)
+    assert breaker.snapshot()["state"] == "closed"
+    assert breaker.consecutive_failures == 0
+
+    breaker.record_failure()
+    breaker.record_failure()
+    started.clear()
+    probe = asyncio.create_task(ml_client.analyze_with_ml({"code": "x"}))
+    await started.wait()
+    assert breaker.state == "half_open"
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+async def test_read_timeouts_are_not_retried(monkeypatch) -> None:
+    breaker = CircuitBreaker("ml", failure_threshold=5, reset_timeout=60.0)
+    monkeypatch.setattr(ml_client, "breaker", breaker)
+    monkeypatch.setattr(ml_client.settings, "ml_retry_attempts", 3)
+    attempts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal attempts
+        attempts += 1
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = httpx.AsyncClient(base_url="http://ml", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ml_client, "get_ml_client", lambda: client)
+
+    with pytest.raises(httpx.ReadTimeout):
+        await ml_client.analyze_with_ml({"code": "x"})
+
+    assert attempts == 1
+    assert breaker.consecutive_failures == 1
+    await client.aclose()
+
+
+async def test_server_errors_and_stream_errors_count_as_failures(monkeypatch) -> None:
+    breaker = CircuitBreaker("ml", failure_threshold=2, reset_timeout=60.0)
+    monkeypatch.setattr(ml_client, "breaker", breaker)
+    monkeypatch.setattr(ml_client.settings, "ml_retry_attempts", 1)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/analyze":
+            return httpx.Response(500, json={"detail": "boom"})
+        return httpx.Response(200, text='{"type": "error", "detail": "model crashed"}\n')
+
+    client = httpx.AsyncClient(base_url="http://ml", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ml_client, "get_ml_client", lambda: client)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await ml_client.analyze_with_ml({"code": "x"})
+    with pytest.raises(ml_client.MLStreamError):
+        async for _ in ml_client.stream_analysis_from_ml({"code": "x"}):
+            pass
+
+    assert breaker.state == "open"
+    await client.aclose()
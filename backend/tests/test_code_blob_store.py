@@ -0,0 +1,22 @@
+from app.services.code_blob_store import (
+    content_hash,
+    decode_code,
+    encode_code,
+    save_blobs,
+)
+
+
+async def test_blobs_are_deduplicated_and_round_trip(fake_session) -> None:
+    code = "def handler(event):\n    return event\n" * 50
+    hashes = await save_blobs(fake_session, [code, "x = 1", code])
+
+    assert hashes == [content_hash(code), content_hash("x = 1"), content_hash(code)]
+    assert len(fake_session.params) == 2
+    stored = {row["hash"]: row for row in fake_session.params}
+    assert stored[content_hash(code)]["encoding"] == "zlib"
+    assert stored[content_hash(code)]["stored_size"] < len(code)
+    assert stored[content_hash("x = 1")]["encoding"] == "identity"
+    for original in (code, "x = 1"):
+        row = stored[content_hash(original)]
+        assert decode_code(row["encoding"], row["content"]) == original
+    assert encode_code("")[0] == "identity"
@@ -0,0 +1,182 @@
+import asyncio
+import json
+from datetime import UTC, datetime
+from typing import Any, Self
+
+import httpx
+import pytest
+
+from app import worker as worker_module
+from app.models.schemas import AnalyzeResponse
+from app.services import job_queue
+from app.services.job_queue import QueueUnavailableError, enqueue_analysis, get_job
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeStreamRedis") -> None:
+        self.redis = redis
+        self.calls: list[tuple[str, tuple]] = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return
+
+    def __getattr__(self, name: str) -> Any:
+        return lambda *args, **kwargs: self.calls.append((name, args))
+
+    async def execute(self) -> None:
+        for name, args in self.calls:
+            await getattr(self.redis, name)(*args)
+
+
+class FakeStreamRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+        self.stream: list[tuple[str, dict[str, str]]] = []
+        self.acked: list[str] = []
+        self.deleted: list[str] = []
+        self.claims: list[dict[str, Any]] = []
+        self.published: list[dict[str, Any]] = []
+        self.latency: list[str] = []
+
+    async def get(self, key: str) -> str | None:
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> bool:
+        self.store[key] = value
+        return True
+
+    async def xadd(self, stream: str, fields: dict[str, str], **kwargs: Any) -> str:
+        message_id = f"{len(self.stream) + 1}-0"
+        self.stream.append((message_id, fields))
+        return message_id
+
+    async def publish(self, channel: str, message: str) -> int:
+        self.published.append(json.loads(message))
+        return 1
+
+    async def xautoclaim(self, stream: str, group: str, consumer: str, **kwargs: Any) -> tuple:
+        self.claims.append({"command": "xautoclaim", **kwargs})
+        return "0-0", list(self.stream), []
+
+    async def xclaim(self, stream: str, group: str, consumer: str, **kwargs: Any) -> list[str]:
+        self.claims.append({"command": "xclaim", **kwargs})
+        return kwargs["message_ids"]
+
+    async def xack(self, stream: str, group: str, message_id: str) -> int:
+        self.acked.append(message_id)
+        return 1
+
+    async def xdel(self, stream: str, message_id: str) -> int:
+        self.deleted.append(message_id)
+        self.stream = [message for message in self.stream if message[0] != message_id]
+        return 1
+
+    async def lpush(self, key: str, value: str) -> int:
+        self.latency.insert(0, value)
+        return len(self.latency)
+
+    async def ltrim(self, key: str, start: int, end: int) -> bool:
+        return True
+
+    def pipeline(self, transaction: bool = False) -> FakePipeline:
+        return FakePipeline(self)
+
+
+class FakeAnalysisCache:
+    async def get(self, key: str) -> None:
+        return
+
+
+class FakeRuleCache:
+    async def version(self, user_id: str) -> str:
+        return "0"
+
+
+@pytest.fixture
+def stream_redis(monkeypatch, session_factory) -> FakeStreamRedis:
+    redis = FakeStreamRedis()
+    monkeypatch.setattr(job_queue, "redis", redis)
+    monkeypatch.setattr(worker_module, "redis", redis)
+    monkeypatch.setattr(worker_module, "analysis_cache", FakeAnalysisCache())
+    monkeypatch.setattr(worker_module, "rule_cache", FakeRuleCache())
+    monkeypatch.setattr(worker_module, "_get_session_factory", lambda: session_factory)
+    monkeypatch.setattr(worker_module.settings, "analysis_job_max_attempts", 2)
+    return redis
+
+
+async def test_enqueue_saves_the_job_and_appends_to_the_stream(stream_redis, monkeypatch, fake_redis) -> None:
+    job = await enqueue_analysis("user", {"code": "print(1)", "language": "python"})
+
+    assert (await get_job(job["id"]))["status"] == "queued"
+    _, fields = stream_redis.stream[0]
+    assert fields["job_id"] == job["id"]
+    assert json.loads(fields["payload"])["code"] == "print(1)"
+
+    monkeypatch.setattr(job_queue, "redis", fake_redis)
+    with pytest.raises(QueueUnavailableError):
+        await enqueue_analysis("user", {"code": "x"})
+
+
+async def test_worker_completes_and_acknowledges_a_job(stream_redis, monkeypatch) -> None:
+    async def analyze_with_ml(payload):
+        return {"score": 0.9}
+
+    async def finalize_analysis(db, user_id, payload, result, key):
+        return AnalyzeResponse(
+            id="report", suggestions=[], bugs=[], optimizations=[], documentation="", score=0.9, created_at=datetime.now(UTC)
+        )
+
+    monkeypatch.setattr(worker_module, "analyze_with_ml", analyze_with_ml)
+    monkeypatch.setattr(worker_module, "finalize_analysis", finalize_analysis)
+    job = await enqueue_analysis("user", {"code": "print(1)", "language": "python"})
+    worker = worker_module.AnalysisWorker("consumer", concurrency=2)
+
+    messages = await worker._claim_stale()
+    await worker.handle(*messages[0])
+
+    stored = await get_job(job["id"])
+    assert stored["status"] == "completed"
+    assert stored["report"]["id"] == "report"
+    assert stream_redis.acked == ["1-0"]
+    assert stream_redis.deleted == ["1-0"]
+    assert stream_redis.claims[0]["min_idle_time"] == int(worker_module.settings.analysis_job_visibility_seconds * 1000)
+    assert len(stream_redis.latency) == 1
+
+
+async def test_failed_job_is_retried_then_dead_lettered_after_max_attempts(stream_redis, monkeypatch) -> None:
+    async def analyze_with_ml(payload):
+        raise httpx.ConnectError("ml down")
+
+    monkeypatch.setattr(worker_module, "analyze_with_ml", analyze_with_ml)
+    job = await enqueue_analysis("user", {"code": "print(1)", "language": "python"})
+    worker = worker_module.AnalysisWorker("consumer", concurrency=1)
+
+    await worker.handle(*(await worker._claim_stale())[0])
+    assert (await get_job(job["id"]))["status"] == "retrying"
+    assert stream_redis.acked == []
+
+    await worker.handle(*(await worker._claim_stale())[0])
+    stored = await get_job(job["id"])
+    assert stored["status"] == "failed"
+    assert stored["attempts"] == 2
+    assert stream_redis.acked == ["1-0"]
+    assert stream_redis.stream == []
+
+
+async def test_running_job_keeps_its_claim_fresh(stream_redis, monkeypatch) -> None:
+    monkeypatch.setattr(worker_module.settings, "analysis_job_visibility_seconds", 0.03)
+    worker = worker_module.AnalysisWorker("consumer", concurrency=1)
+
+    async def handle(message_id: str, fields: dict[str, str]) -> None:
+        await asyncio.sleep(0.05)
+
+    monkeypatch.setattr(worker, "handle", handle)
+    await worker._slots.acquire()
+    await worker._run_one("1-0", {})
+
+    refreshes = [claim for claim in stream_redis.claims if claim["command"] == "xclaim"]
+    assert len(refreshes) >= 2
+    assert all(claim["min_idle_time"] == 0 and claim["message_ids"] == ["1-0"] for claim in refreshes)
@@ -0,0 +1,23 @@
+from fastapi import BackgroundTasks
+
+from app.api import collaboration
+
+
+async def test_background_fanout_defers_notifications_until_after_response(monkeypatch) -> None:
+    calls: list[tuple] = []
+
+    async def create_notifications_for_room(db, room_id, sender_id, title, body) -> int:
+        calls.append((db, room_id, sender_id, title, body))
+        return 1
+
+    monkeypatch.setattr(collaboration, "create_notifications_for_room", create_notifications_for_room)
+    monkeypatch.setattr(collaboration.settings, "notification_fanout_mode", "background")
+    tasks = BackgroundTasks()
+
+    await collaboration._notify_room("db", tasks, "room", "alice", "New review comment", "hi")
+    assert calls == []
+    assert len(tasks.tasks) == 1
+
+    monkeypatch.setattr(collaboration.settings, "notification_fanout_mode", "inline")
+    await collaboration._notify_room("db", tasks, "room", "alice", "New review comment", "hi")
+    assert calls == [("db", "room", "alice", "New review comment", "hi")]
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    keyset_filter,
+    keyset_page,
+)
+
+
+def test_keyset_page_returns_cursor_for_last_row_when_more_rows_exist() -> None:
+    rows = [
+        {"id": f"00000000-0000-0000-0000-00000000000{index}", "created_at": datetime(2026, 10, 18, 12, 0, index)}
+        for index in range(4)
+    ]
+    page, cursor = keyset_page(rows, limit=3)
+
+    assert page == rows[:3]
+    assert decode_cursor(cursor) == (rows[2]["created_at"], rows[2]["id"])
+    assert keyset_page(rows, limit=4) == (rows, None)
+
+    clause, params = keyset_filter(cursor, "created_at", "id", descending=False)
+    assert "(created_at, id) >" in clause
+    assert params == {"cursor_created_at": rows[2]["created_at"], "cursor_id": rows[2]["id"]}
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,76 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.query_metrics import (
+    QueryMetricsMiddleware,
+    background_context,
+    normalize_statement,
+    query_metrics,
+    redact_parameters,
+)
+
+
+def test_statements_are_normalized_and_counted_per_request() -> None:
+    name, normalized = normalize_statement(
+        "INSERT INTO analysis_reports (id, code_hash) VALUES ($1::uuid, $2), ($3::uuid, $4) RETURNING id::text"
+    )
+    assert name.startswith("insert analysis_reports [")
+    assert normalized == "insert into analysis_reports (id, code_hash) values (?::uuid, ?), ... returning id::text"
+    assert normalize_statement("SELECT 1 FROM notifications WHERE user_id = $1")[0].startswith("select notifications")
+    assert redact_parameters(("secret", 3), False) == "(<str>, <int>)"
+
+    app = FastAPI()
+    app.add_middleware(QueryMetricsMiddleware, timing_headers=True)
+
+    @app.get("/items")
+    async def items() -> dict[str, str]:
+        query_metrics.record("SELECT * FROM review_rooms WHERE id = $1", ("room",), False, 4.0)
+        query_metrics.record("SELECT * FROM review_threads WHERE room_id = $1", ("room",), False, 6.0)
+        return {"status": "ok"}
+
+    response = TestClient(app).get("/items")
+    assert response.headers["x-db-query-count"] == "2"
+    assert response.headers["server-timing"] == 'db;dur=10.0;desc="2 queries"'
+    assert query_metrics.stats()["requests"]["GET /items"]["avg_queries"] >= 2
+
+
+def test_streaming_responses_are_recorded_after_the_body_without_headers() -> None:
+    app = FastAPI()
+    app.add_middleware(QueryMetricsMiddleware, timing_headers=True)
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def body():
+            yield "first\n"
+            query_metrics.record("SELECT * FROM review_comments WHERE thread_id = $1", ("thread",), False, 2.0)
+            query_metrics.record("SELECT * FROM review_comments WHERE thread_id = $1", ("thread",), False, 2.0)
+            yield "second\n"
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    response = TestClient(app).get("/stream")
+    assert response.text == "first\nsecond\n"
+    assert "server-timing" not in response.headers
+    assert "x-db-query-count" not in response.headers
+    assert query_metrics.stats()["requests"]["GET /stream"]["max_queries"] == 2
+
+
+def test_background_tasks_started_by_a_request_are_not_attributed_to_it() -> None:
+    app = FastAPI()
+    app.add_middleware(QueryMetricsMiddleware, timing_headers=True)
+
+    async def flush() -> None:
+        query_metrics.record("INSERT INTO analysis_reports (id) VALUES ($1)", ("report",), False, 3.0)
+
+    @app.get("/flush")
+    async def flush_route() -> dict[str, str]:
+        query_metrics.record("SELECT * FROM analysis_reports WHERE id = $1", ("report",), False, 1.0)
+        await asyncio.get_running_loop().create_task(flush(), context=background_context())
+        await asyncio.get_running_loop().create_task(flush())
+        return {"status": "ok"}
+
+    response = TestClient(app).get("/flush")
+    assert response.headers["x-db-query-count"] == "2"
@@ -0,0 +1,85 @@
+from fastapi import Response
+
+from app.api import collaboration
+from app.core import database
+
+
+async def _read_once() -> str:
+    sessions = database.get_read_db_session()
+    session = await anext(sessions)
+    await sessions.aclose()
+    return session.name
+
+
+async def test_read_sessions_fall_back_to_primary_while_replica_is_unhealthy(monkeypatch, make_session_factory) -> None:
+    replica = make_session_factory("replica", healthy=False)
+    monkeypatch.setattr(database, "_get_read_session_factory", lambda: replica)
+    monkeypatch.setattr(database, "_get_session_factory", lambda: make_session_factory("primary"))
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+
+    assert await _read_once() == "primary"
+    assert await _read_once() == "primary"
+    assert len(replica.sessions) == 1
+    assert replica.sessions[0].closed
+
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    replica.healthy = True
+    assert await _read_once() == "replica"
+    assert database.is_replica_session(replica.sessions[-1])
+
+
+async def test_comment_listing_checks_membership_on_the_primary(monkeypatch, fake_session, make_session_factory) -> None:
+    primary = make_session_factory("primary")
+    calls: list[tuple[str, str]] = []
+
+    async def get_room_id_by_thread(db, thread_id):
+        calls.append(("room", db.name))
+        return "room"
+
+    async def get_user_role(db, room_id, user_id):
+        calls.append(("role", db.name))
+        return "viewer"
+
+    async def list_comments(db, thread_id, limit, cursor):
+        calls.append(("list", db.name))
+        return [], None
+
+    monkeypatch.setattr(collaboration, "_get_session_factory", lambda: primary)
+    monkeypatch.setattr(collaboration, "get_room_id_by_thread", get_room_id_by_thread)
+    monkeypatch.setattr(collaboration, "get_user_role", get_user_role)
+    monkeypatch.setattr(collaboration, "list_comments", list_comments)
+    fake_session.name = "replica"
+    fake_session.info["replica"] = True
+
+    await collaboration.get_comments("thread", Response(), limit=10, cursor=None, user={"sub": "alice"}, db=fake_session)
+
+    assert calls == [("room", "primary"), ("role", "primary"), ("list", "replica")]
+    assert all(session.closed for session in primary.sessions)
+
+
+async def test_comment_listing_reuses_the_primary_read_session(monkeypatch, fake_session, make_session_factory) -> None:
+    primary = make_session_factory("primary")
+    names: list[str] = []
+
+    async def get_room_id_by_thread(db, thread_id):
+        names.append(db.name)
+        return "room"
+
+    async def get_user_role(db, room_id, user_id):
+        names.append(db.name)
+        return "viewer"
+
+    async def list_comments(db, thread_id, limit, cursor):
+        names.append(db.name)
+        return [], None
+
+    monkeypatch.setattr(collaboration, "_get_session_factory", lambda: primary)
+    monkeypatch.setattr(collaboration, "get_room_id_by_thread", get_room_id_by_thread)
+    monkeypatch.setattr(collaboration, "get_user_role", get_user_role)
+    monkeypatch.setattr(collaboration, "list_comments", list_comments)
+
+    await collaboration.get_comments("thread", Response(), limit=10, cursor=None, user={"sub": "alice"}, db=fake_session)
+
+    assert names == ["primary", "primary", "primary"]
+    assert primary.sessions == []
+    assert not fake_session.closed
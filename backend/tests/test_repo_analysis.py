@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import httpx
+
+from app.services import repo_analysis
+from app.services.git_providers import GitHubProvider, LocalRepoProvider
+from app.services.rule_engine import CompiledRuleSet
+
+
+class FakeRuleCache:
+    async def get(self, user_id: str, load: object) -> CompiledRuleSet:
+        return CompiledRuleSet([])
+
+
+async def test_repo_analysis_only_sends_changed_files(tmp_path: Path, monkeypatch, fake_redis, session_factory) -> None:
+    repo = tmp_path / "team" / "service"
+    (repo / "src").mkdir(parents=True)
+    (repo / "src" / "app.py").write_text("print('hello')\n")
+    (repo / "src" / "util.ts").write_text("export const add = (a: number, b: number) => a + b;\n")
+    (repo / "README.md").write_text("# docs\n")
+
+    hashes: dict[str, str] = {}
+    analyzed: list[str] = []
+    saved_reports: list[int] = []
+
+    async def get_file_hashes(db, user_id, provider, repository):
+        return dict(hashes)
+
+    async def save_file_hashes(db, user_id, provider, repository, files, removed):
+        hashes.update({file["path"]: file["content_hash"] for file in files})
+        for path in removed:
+            hashes.pop(path, None)
+
+    async def save_analyses(db, user_id, reports):
+        saved_reports.append(len(reports))
+
+    async def analyze_with_ml(payload):
+        assert all(session.closed for session in session_factory.sessions)
+        analyzed.append(payload["context"]["path"])
+        return {"suggestions": [], "bugs": [], "optimizations": [], "documentation": "", "score": 0.9}
+
+    monkeypatch.setattr(repo_analysis, "redis", fake_redis)
+    monkeypatch.setattr(repo_analysis, "rule_cache", FakeRuleCache())
+    monkeypatch.setattr(repo_analysis, "get_file_hashes", get_file_hashes)
+    monkeypatch.setattr(repo_analysis, "save_file_hashes", save_file_hashes)
+    monkeypatch.setattr(repo_analysis, "save_analyses", save_analyses)
+    monkeypatch.setattr(repo_analysis, "analyze_with_ml", analyze_with_ml)
+
+    async def run() -> dict:
+        job = await repo_analysis.create_job("user", "local", "team/service", None)
+        return await repo_analysis.run_repo_analysis(job, LocalRepoProvider(tmp_path), session_factory)
+
+    first = await run()
+    assert first["status"] == "completed"
+    assert sorted(analyzed) == ["src/app.py", "src/util.ts"]
+
+    analyzed.clear()
+    second = await run()
+    assert analyzed == []
+    assert second["unchanged_files"] == 2
+
+    (repo / "src" / "app.py").write_text("print('changed')\n")
+    (repo / "src" / "util.ts").unlink()
+    third = await run()
+    assert analyzed == ["src/app.py"]
+    assert third["removed_files"] == 1
+    assert sorted(hashes) == ["src/app.py"]
+    assert saved_reports == [2, 0, 1]
+
+    monkeypatch.setattr(repo_analysis.settings, "repo_analysis_max_files", 0)
+    fourth = await run()
+    assert fourth["removed_files"] == 0
+    assert sorted(hashes) == ["src/app.py"]
+
+
+def _github_handler(requests: list[httpx.Request]):
+    trees = {
+        "root": [{"path": "src", "type": "tree", "sha": "src"}, {"path": "setup.py", "type": "blob", "sha": "b1", "size": 10}],
+        "src": [{"path": "app.py", "type": "blob", "sha": "b2", "size": 20}],
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        path = request.url.path
+        if path == "/repos/team/service":
+            return httpx.Response(200, json={"default_branch": "main"})
+        if path == "/repos/team/service/branches/main":
+            return httpx.Response(200, json={"commit": {"sha": "c1", "commit": {"tree": {"sha": "root"}}}})
+        if path.startswith("/repos/team/service/contents/"):
+            return httpx.Response(200, text="print('hello')\n")
+        sha = path.rsplit("/", 1)[-1]
+        if request.url.params.get("recursive"):
+            return httpx.Response(200, json={"sha": sha, "tree": [], "truncated": True})
+        return httpx.Response(200, json={"sha": sha, "tree": trees[sha], "truncated": False})
+
+    return handler
+
+
+async def test_github_provider_walks_subtrees_when_the_tree_is_truncated() -> None:
+    requests: list[httpx.Request] = []
+    provider = GitHubProvider("token")
+    provider._client = httpx.AsyncClient(base_url="https://api.github.com", transport=httpx.MockTransport(_github_handler(requests)))
+    files = await provider.list_files("team/service")
+    await provider.close()
+
+    assert sorted((file.path, file.blob_hash) for file in files) == [("setup.py", "git:b1"), ("src/app.py", "git:b2")]
+
+
+async def test_github_provider_reads_files_at_the_listed_commit() -> None:
+    requests: list[httpx.Request] = []
+    provider = GitHubProvider("token")
+    provider._client = httpx.AsyncClient(base_url="https://api.github.com", transport=httpx.MockTransport(_github_handler(requests)))
+    await provider.list_files("team/service")
+    code = await provider.read_file("team/service", "src/app.py")
+    await provider.close()
+
+    read = requests[-1]
+    assert code == "print('hello')\n"
+    assert read.url.path == "/repos/team/service/contents/src/app.py"
+    assert dict(read.url.params) == {"ref": "c1"}
+    assert read.headers["accept"] == "application/vnd.github.raw+json"
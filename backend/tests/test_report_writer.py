@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from app.services import analysis_store
+from app.services import report_writer as report_writer_module
+from app.services.report_writer import ReportBufferFullError, ReportWriter
+
+
+async def test_write_behind_batches_rows_and_flushes_on_close(monkeypatch, session_factory) -> None:
+    written: list[list[str]] = []
+
+    async def insert_reports(session, rows):
+        written.append([row[0] for row in rows])
+
+    monkeypatch.setattr(report_writer_module, "insert_reports", insert_reports)
+    writer = ReportWriter("buffered", max_rows=3, interval_ms=10_000, max_buffered=100, session_factory=session_factory)
+    ids = [await writer.save(None, "user", {"code": "x"}, {"score": 1.0}) for _ in range(4)]
+    await asyncio.sleep(0)
+    await writer.close()
+
+    assert [report_id for batch in written for report_id in batch] == ids
+    assert [len(batch) for batch in written] == [3, 1]
+    assert session_factory.commits == 2
+
+
+async def test_failed_flushes_stay_in_the_flusher_and_the_buffer_is_capped(monkeypatch, session_factory) -> None:
+    async def insert_reports(session, rows):
+        raise ConnectionError("database down")
+
+    monkeypatch.setattr(report_writer_module, "insert_reports", insert_reports)
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(report_writer_module.asyncio, "sleep", lambda _: real_sleep(0))
+
+    committed = ReportWriter("group_commit", max_rows=2, interval_ms=10_000, max_buffered=2, session_factory=session_factory)
+    waiting = asyncio.create_task(committed.save(None, "user", {"code": "x"}, {"score": 1.0}))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    assert await committed.flush()
+
+    writer = ReportWriter("buffered", max_rows=2, interval_ms=10_000, max_buffered=2, session_factory=session_factory)
+    await writer.save(None, "user", {"code": "x"}, {"score": 1.0})
+    await writer.save(None, "user", {"code": "y"}, {"score": 1.0})
+    with pytest.raises(ReportBufferFullError):
+        await writer.save(None, "user", {"code": "z"}, {"score": 1.0})
+
+    await writer.close()
+    stats = writer.stats()
+    assert stats["rejected"] == 1
+    assert stats["buffered"] == 0
+    assert stats["dropped"] == 2
+    await committed.close()
+
+
+async def test_bulk_insert_stays_under_the_bind_parameter_limit(fake_session) -> None:
+    rows = [(f"00000000-0000-0000-0000-{index:012d}", "user", {"code": f"x{index}"}, {"score": 1.0}) for index in range(2500)]
+
+    await analysis_store.insert_reports(fake_session, rows)
+
+    inserts = [params for params in fake_session.params if isinstance(params, dict) and "id_0" in params]
+    assert [len(params) // 10 for params in inserts] == [1000, 1000, 500]
+    assert all(len(params) < 32767 for params in inserts)
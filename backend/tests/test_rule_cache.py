@@ -0,0 +1,67 @@
+from app.models.schemas import AnalyzeRequest
+from app.services import analysis_cache as analysis_cache_module
+from app.services import rule_cache as rule_cache_module
+from app.services.analysis_pipeline import cache_key
+from app.services.rule_cache import RuleSetCache
+from app.services.rule_engine import Rule
+
+
+async def test_rule_cache_reloads_only_after_version_bump(monkeypatch, fake_redis) -> None:
+    monkeypatch.setattr(rule_cache_module, "redis", fake_redis)
+    cache = RuleSetCache(max_users=10, ttl=60)
+    rules = [Rule(id="1", name="No eval", pattern=r"eval\(", message="avoid eval")]
+    loads = 0
+
+    async def load() -> list[Rule]:
+        nonlocal loads
+        loads += 1
+        return list(rules)
+
+    await cache.get("user", load)
+    await cache.get("user", load)
+    rules.append(Rule(id="2", name="No exec", pattern=r"exec\(", message="avoid exec"))
+    await cache.invalidate("user")
+    assert len(await cache.get("user", load)) == 2
+    assert loads == 2
+    assert cache.stats()["local_hits"] == 1
+
+
+async def test_analysis_cache_key_changes_with_the_rule_set(monkeypatch, fake_redis) -> None:
+    monkeypatch.setattr(rule_cache_module, "redis", fake_redis)
+    cache = RuleSetCache(max_users=10, ttl=60)
+    payload = AnalyzeRequest(code="eval(x)", language="python")
+
+    before = cache_key(payload, "user", await cache.version("user"))
+    await cache.invalidate("user")
+    after = cache_key(payload, "user", await cache.version("user"))
+
+    assert before != after
+    assert cache_key(payload, "other", await cache.version("other")) not in {before, after}
+
+
+async def test_rule_version_is_kept_in_process_until_announced(monkeypatch, fake_redis) -> None:
+    monkeypatch.setattr(rule_cache_module, "redis", fake_redis)
+    monkeypatch.setattr(analysis_cache_module, "rule_cache", RuleSetCache(max_users=10, ttl=60))
+    cache = analysis_cache_module.rule_cache
+    reads = 0
+    get = fake_redis.get
+
+    async def counting_get(key: str) -> str | None:
+        nonlocal reads
+        reads += 1
+        return await get(key)
+
+    monkeypatch.setattr(fake_redis, "get", counting_get)
+
+    assert await cache.version("user") == "0"
+    assert await cache.version("user") == "0"
+    assert reads == 1
+
+    await fake_redis.incr("rules:version:user")
+    assert await cache.version("user") == "0"
+    analysis_cache_module.analysis_cache._on_invalidation("rules:user")
+    assert await cache.version("user") == "1"
+
+    await cache.invalidate("user")
+    assert await cache.version("user") == "2"
+    assert reads == 2
@@ -1,4 +1,4 @@
-from app.services.rule_engine import Rule, apply_rules
+from app.services.rule_engine import CompiledRuleSet, Rule, apply_rules
 
 
 def test_apply_rules_detects_pattern() -> None:
@@ -16,3 +16,20 @@ def test_apply_rules_detects_pattern() -> None:
 
     assert len(findings) == 1
     assert "No eval" in findings[0]
+
+
+def test_compiled_rule_set_reports_locations_and_skips_invalid_patterns() -> None:
+    rules = [
+        Rule(id="1", name="No eval", pattern=r"\beval\(|exec\(", message="avoid eval"),
+        Rule(id="2", name="Secret", pattern=r"(?i)password\s*=", message="hardcoded secret"),
+        Rule(id="3", name="Broken", pattern=r"(unclosed", message="invalid"),
+        Rule(id="4", name="Unused", pattern=r"\bpickle\.loads\(", message="unsafe"),
+    ]
+    code = "import os\nPASSWORD = 'x'\nresult = exec(source)\n"
+
+    rule_set = CompiledRuleSet(rules)
+    findings = rule_set.match(code)
+
+    assert rule_set.skipped == ["3"]
+    assert [(finding.rule_id, finding.line, finding.column) for finding in findings] == [("1", 3, 10), ("2", 2, 1)]
+    assert findings[0].end_column == 15
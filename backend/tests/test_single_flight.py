@@ -0,0 +1,117 @@
+import asyncio
+
+from app.services import single_flight
+from app.services.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_computation(monkeypatch, fake_redis) -> None:
+    monkeypatch.setattr(single_flight, "redis", fake_redis)
+    flight = SingleFlight("test", timeout=1.0)
+    calls = 0
+
+    async def compute() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "report"
+
+    results = await asyncio.gather(*(flight.run("analysis:abc", compute) for _ in range(5)))
+
+    assert results == ["report"] * 5
+    assert calls == 1
+    assert flight.stats()["local_followers"] == 4
+
+
+class FakePubSub:
+    def __init__(self, redis: "LockedRedis") -> None:
+        self.redis = redis
+
+    async def subscribe(self, channel: str) -> None:
+        self.redis.events.append("subscribe")
+
+    async def get_message(self, ignore_subscribe_messages: bool, timeout: float) -> None:
+        await asyncio.sleep(timeout)
+
+    async def unsubscribe(self, channel: str) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        return None
+
+
+class LockedRedis:
+    def __init__(self, lock_holder: str | None) -> None:
+        self.lock_holder = lock_holder
+        self.events: list[str] = []
+        self.released: list[tuple] = []
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+    async def set(self, key: str, value: str, nx: bool = False, px: int | None = None) -> bool:
+        if self.lock_holder is not None:
+            self.lock_holder = None
+            return False
+        self.lock_holder = value
+        return True
+
+    async def get(self, key: str) -> None:
+        self.events.append("get")
+
+    async def exists(self, key: str) -> int:
+        self.events.append("exists")
+        return int(self.lock_holder is not None)
+
+    async def publish(self, channel: str, value: str) -> int:
+        return 0
+
+    async def eval(self, script: str, numkeys: int, *args: str) -> int:
+        self.released.append(args)
+        return 1
+
+
+async def test_follower_leads_when_the_lock_was_released_before_it_subscribed(monkeypatch) -> None:
+    redis = LockedRedis(lock_holder="other-replica")
+    monkeypatch.setattr(single_flight, "redis", redis)
+    flight = SingleFlight("test", timeout=30.0)
+
+    async def compute() -> str:
+        return "report"
+
+    assert await asyncio.wait_for(flight.run("analysis:abc", compute), timeout=1.0) == "report"
+    assert redis.events == ["subscribe", "get", "exists"]
+    assert flight.stats()["leaders"] == 1
+
+
+async def test_leader_releases_the_lock_with_compare_and_delete(monkeypatch) -> None:
+    redis = LockedRedis(lock_holder=None)
+    monkeypatch.setattr(single_flight, "redis", redis)
+    flight = SingleFlight("test", timeout=30.0)
+
+    async def compute() -> str:
+        return "report"
+
+    assert await flight.run("analysis:abc", compute) == "report"
+    assert redis.released == [("test:lock:analysis:abc", redis.lock_holder)]
+
+
+async def test_cancelled_leader_does_not_fail_local_followers(monkeypatch, fake_redis) -> None:
+    monkeypatch.setattr(single_flight, "redis", fake_redis)
+    flight = SingleFlight("test", timeout=1.0)
+    release = asyncio.Event()
+
+    async def compute() -> str:
+        await release.wait()
+        return "report"
+
+    leader = asyncio.create_task(flight.run("analysis:abc", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("analysis:abc", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "report"
+    assert leader.cancelled()
+    assert flight.stats()["in_flight"] == 0
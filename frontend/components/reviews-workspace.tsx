@@ -12,6 +12,10 @@ export function ReviewsWorkspace(): JSX.Element {
   const [threads, setThreads] = useState<ReviewThread[]>([]);
   const [comments, setComments] = useState<ReviewComment[]>([]);
 
+  const [roomsCursor, setRoomsCursor] = useState<string | null>(null);
+  const [threadsCursor, setThreadsCursor] = useState<string | null>(null);
+  const [commentsCursor, setCommentsCursor] = useState<string | null>(null);
+
   const [selectedRoom, setSelectedRoom] = useState<string>("");
   const [selectedThread, setSelectedThread] = useState<string>("");
 
@@ -21,25 +25,63 @@ export function ReviewsWorkspace(): JSX.Element {
   const [commentText, setCommentText] = useState("Potential auth bypass on optional routes.");
 
   const refreshRooms = async () => {
-    const data = await listRooms();
-    setRooms(data);
-    if (data.length > 0 && !selectedRoom) {
-      setSelectedRoom(data[0].id);
+    const page = await listRooms();
+    setRooms(page.items);
+    setRoomsCursor(page.nextCursor);
+    if (page.items.length > 0 && !selectedRoom) {
+      setSelectedRoom(page.items[0].id);
     }
   };
 
+  const loadMoreRooms = async () => {
+    if (!roomsCursor) return;
+    const page = await listRooms(roomsCursor);
+    setRooms((prev) => [...prev, ...page.items]);
+    setRoomsCursor(page.nextCursor);
+  };
+
+  const loadMoreThreads = async () => {
+    if (!selectedRoom || !threadsCursor) return;
+    const page = await listThreads(selectedRoom, threadsCursor);
+    setThreads((prev) => [...prev, ...page.items]);
+    setThreadsCursor(page.nextCursor);
+  };
+
+  const loadMoreComments = async () => {
+    if (!selectedThread || !commentsCursor) return;
+    const page = await listComments(selectedThread, commentsCursor);
+    setComments((prev) => [...prev, ...page.items]);
+    setCommentsCursor(page.nextCursor);
+  };
+
   useEffect(() => {
     refreshRooms().catch(() => setRooms([]));
   }, []);
 
   useEffect(() => {
     if (!selectedRoom) return;
-    listThreads(selectedRoom).then(setThreads).catch(() => setThreads([]));
+    listThreads(selectedRoom)
+      .then((page) => {
+        setThreads(page.items);
+        setThreadsCursor(page.nextCursor);
+      })
+      .catch(() => {
+        setThreads([]);
+        setThreadsCursor(null);
+      });
   }, [selectedRoom]);
 
   useEffect(() => {
     if (!selectedThread) return;
-    listComments(selectedThread).then(setComments).catch(() => setComments([]));
+    listComments(selectedThread)
+      .then((page) => {
+        setComments(page.items);
+        setCommentsCursor(page.nextCursor);
+      })
+      .catch(() => {
+        setComments([]);
+        setCommentsCursor(null);
+      });
   }, [selectedThread]);
 
   const onCreateRoom = async (event: FormEvent) => {
@@ -89,6 +131,11 @@ export function ReviewsWorkspace(): JSX.Element {
                 <p className="text-xs text-muted-foreground">{room.repository} • {room.role}</p>
               </button>
             ))}
+            {roomsCursor ? (
+              <Button variant="outline" size="sm" onClick={() => loadMoreRooms().catch(() => setRoomsCursor(null))}>
+                Load more rooms
+              </Button>
+            ) : null}
           </div>
         </CardContent>
       </Card>
@@ -114,6 +161,11 @@ export function ReviewsWorkspace(): JSX.Element {
                 <p className="text-xs text-muted-foreground">By {thread.created_by}</p>
               </button>
             ))}
+            {threadsCursor ? (
+              <Button variant="outline" size="sm" onClick={() => loadMoreThreads().catch(() => setThreadsCursor(null))}>
+                Load more threads
+              </Button>
+            ) : null}
           </div>
         </CardContent>
       </Card>
@@ -132,6 +184,11 @@ export function ReviewsWorkspace(): JSX.Element {
                 <p className="text-xs text-muted-foreground">{comment.author_id}</p>
               </div>
             ))}
+            {commentsCursor ? (
+              <Button variant="outline" size="sm" onClick={() => loadMoreComments().catch(() => setCommentsCursor(null))}>
+                Load more comments
+              </Button>
+            ) : null}
           </div>
           <form className="grid gap-2" onSubmit={onCreateComment}>
             <textarea
@@ -4,6 +4,7 @@ import {
   AnalyticsSummary,
   AppNotification,
   OAuthConnection,
+  Page,
   ReviewComment,
   ReviewRoom,
   ReviewThread,
@@ -12,6 +13,18 @@ import {
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000";
 
+async function fetchPage<T>(path: string, pageSize: number, cursor: string | null, errorMessage: string): Promise<Page<T>> {
+  const params = new URLSearchParams({ limit: String(pageSize) });
+  if (cursor) {
+    params.set("cursor", cursor);
+  }
+  const response = await fetch(`${API_URL}${path}?${params}`, { cache: "no-store" });
+  if (!response.ok) {
+    throw new Error(`${errorMessage}: ${response.status}`);
+  }
+  return { items: (await response.json()) as T[], nextCursor: response.headers.get("X-Next-Cursor") };
+}
+
 export async function runAnalysis(code: string, language: string): Promise<AnalysisResult> {
   const response = await fetch(`${API_URL}/analysis`, {
     method: "POST",
@@ -105,12 +118,8 @@ export async function listProviderRepos(provider: "github" | "gitlab" | "bitbuck
   return data.repositories ?? [];
 }
 
-export async function listRooms(): Promise<ReviewRoom[]> {
-  const response = await fetch(`${API_URL}/collaboration/rooms`, { cache: "no-store" });
-  if (!response.ok) {
-    throw new Error(`Failed to fetch rooms: ${response.status}`);
-  }
-  return response.json();
+export async function listRooms(cursor: string | null = null): Promise<Page<ReviewRoom>> {
+  return fetchPage<ReviewRoom>("/collaboration/rooms", 50, cursor, "Failed to fetch rooms");
 }
 
 export async function createRoom(name: string, repository?: string): Promise<ReviewRoom> {
@@ -125,12 +134,8 @@ export async function createRoom(name: string, repository?: string): Promise<Rev
   return response.json();
 }
 
-export async function listThreads(roomId: string): Promise<ReviewThread[]> {
-  const response = await fetch(`${API_URL}/collaboration/rooms/${roomId}/threads`, { cache: "no-store" });
-  if (!response.ok) {
-    throw new Error(`Failed to fetch threads: ${response.status}`);
-  }
-  return response.json();
+export async function listThreads(roomId: string, cursor: string | null = null): Promise<Page<ReviewThread>> {
+  return fetchPage<ReviewThread>(`/collaboration/rooms/${roomId}/threads`, 50, cursor, "Failed to fetch threads");
 }
 
 export async function createThread(roomId: string, title: string): Promise<ReviewThread> {
@@ -145,12 +150,8 @@ export async function createThread(roomId: string, title: string): Promise<Revie
   return response.json();
 }
 
-export async function listComments(threadId: string): Promise<ReviewComment[]> {
-  const response = await fetch(`${API_URL}/collaboration/threads/${threadId}/comments`, { cache: "no-store" });
-  if (!response.ok) {
-    throw new Error(`Failed to fetch comments: ${response.status}`);
-  }
-  return response.json();
+export async function listComments(threadId: string, cursor: string | null = null): Promise<Page<ReviewComment>> {
+  return fetchPage<ReviewComment>(`/collaboration/threads/${threadId}/comments`, 100, cursor, "Failed to fetch comments");
 }
 
 export async function createComment(threadId: string, body: string, parentId?: string): Promise<ReviewComment> {
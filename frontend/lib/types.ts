@@ -70,3 +70,8 @@ export interface AppNotification {
   read: boolean;
   created_at: string;
 }
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
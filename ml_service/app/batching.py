@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.inference import InferenceExecutor, InferenceQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    items: int = 0
+    max_batch_size: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+    def record(self, waits_ms: list[float]) -> None:
+        self.batches += 1
+        self.items += len(waits_ms)
+        self.max_batch_size = max(self.max_batch_size, len(waits_ms))
+        self.total_wait_ms += sum(waits_ms)
+        self.max_wait_ms = max(self.max_wait_ms, *waits_ms)
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_queue_wait_ms": round(self.total_wait_ms / self.items, 3) if self.items else 0.0,
+            "max_queue_wait_ms": round(self.max_wait_ms, 3),
+        }
+
+
+@dataclass
+class _PendingItem:
+    payload: Any
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        encode: Callable[[list[Any]], np.ndarray],
+        executor: InferenceExecutor,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_pending: int,
+    ) -> None:
+        self._encode = encode
+        self._executor = executor
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000
+        self._max_pending = max_pending
+        self._queue: asyncio.Queue[_PendingItem] | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._worker: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+        self.stats = BatchStats()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, payload: Any) -> np.ndarray:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self._executor.workers)
+        if self._max_pending > 0 and self._queue.qsize() >= self._max_pending:
+            raise InferenceQueueFullError("Inference queue is full")
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingItem(payload, future, time.perf_counter()))
+        return await future
+
+    async def close(self) -> None:
+        for task in list(self._inflight):
+            task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _collect(self) -> list[_PendingItem]:
+        assert self._queue is not None
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self._max_wait
+        while len(batch) < self._max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        assert self._slots is not None
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: list[_PendingItem]) -> None:
+        assert self._slots is not None
+        started = time.perf_counter()
+        try:
+            vectors = await self._executor.run(self._encode, [item.payload for item in batch])
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as exc:
+            logger.warning("Embedding batch of %s items failed", len(batch), exc_info=True)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+        finally:
+            self._slots.release()
+
+        self.stats.record([(started - item.enqueued_at) * 1000 for item in batch])
+        for item, vector in zip(batch, vectors):
+            if not item.future.done():
+                item.future.set_result(vector)
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,12 +10,34 @@ class Settings(BaseSettings):
     env: str = "development"
     ml_port: int = 8001
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    inference_precision: Literal["fp32", "int8", "bf16"] = "fp32"
+    model_load_mode: Literal["background", "lazy"] = "background"
+    model_ready_timeout_seconds: float = 120.0
+    model_lazy_warmup_seconds: float = 60.0
+    embedding_batch_max_size: int = 16
+    embedding_batch_max_wait_ms: float = 5.0
+    embedding_chunking: bool = False
+    embedding_chunk_tokens: int = 512
+    embedding_chunk_overlap: int = 64
+    embedding_cache_entries: int = 4096
+    embedding_cache_dir: str = ""
+    embedding_cache_disk_entries: int = 200_000
+    inference_workers: int = 1
+    inference_queue_limit: int = 256
+    torch_num_threads: int = 0
     nvidia_base_url: str = "https://integrate.api.nvidia.com/v1"
     nvidia_api_key: str = ""
     nvidia_model: str = "meta/llama-3.1-70b-instruct"
+    llm_prompt_mode: Literal["sequential", "concurrent", "single_shot"] = "concurrent"
+    llm_prompt_timeout_seconds: float = 30.0
     pinecone_api_key: str = ""
     pinecone_index: str = "codemind-code-embeddings"
     pinecone_host: str = ""
+    local_index_enabled: bool = True
+    local_index_dir: str = ""
+    local_index_ivf_lists: int = 0
+    local_index_nprobe: int = 8
+    local_index_max_entries: int = 50_000
 
 
 @lru_cache
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DiskEmbeddingStore:
+    def __init__(self, directory: Path, capacity: int) -> None:
+        self.directory = directory
+        self.capacity = capacity
+        self._meta_path = directory / "meta.json"
+        self._vectors_path = directory / "vectors.f32"
+        self._index_path = directory / "index.log"
+        self._vectors: np.memmap | None = None
+        self._slots: dict[str, int] = {}
+        self._slot_keys: list[str | None] = [None] * capacity
+        self._cursor = 0
+        self._index_file: Any = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._open_existing()
+
+    def _open_existing(self) -> None:
+        if not self._meta_path.exists() or not self._vectors_path.exists():
+            return
+
+        meta = json.loads(self._meta_path.read_text())
+        if meta.get("capacity") != self.capacity:
+            logger.warning("Embedding cache capacity changed, discarding %s", self.directory)
+            self._reset()
+            return
+
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, meta["dim"]))
+        lines = 0
+        if self._index_path.exists():
+            with self._index_path.open() as handle:
+                for line in handle:
+                    key, _, raw_slot = line.strip().partition(" ")
+                    if not raw_slot.isdigit() or int(raw_slot) >= self.capacity:
+                        continue
+                    self._assign(key, int(raw_slot))
+                    self._cursor = (int(raw_slot) + 1) % self.capacity
+                    lines += 1
+        if lines > 2 * self.capacity:
+            self._compact()
+
+    def _create(self, dim: int) -> None:
+        self._meta_path.write_text(json.dumps({"dim": dim, "capacity": self.capacity}))
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="w+", shape=(self.capacity, dim))
+
+    def _reset(self) -> None:
+        for path in (self._meta_path, self._vectors_path, self._index_path):
+            path.unlink(missing_ok=True)
+        self._vectors = None
+        self._slots.clear()
+        self._slot_keys = [None] * self.capacity
+        self._cursor = 0
+
+    def _compact(self) -> None:
+        tmp_path = self._index_path.with_suffix(".tmp")
+        ordered = sorted(self._slots.items(), key=lambda item: (item[1] - self._cursor) % self.capacity)
+        with tmp_path.open("w") as handle:
+            handle.writelines(f"{key} {slot}\n" for key, slot in ordered)
+        tmp_path.replace(self._index_path)
+
+    def _assign(self, key: str, slot: int) -> None:
+        previous = self._slot_keys[slot]
+        if previous is not None:
+            self._slots.pop(previous, None)
+        self._slot_keys[slot] = key
+        self._slots[key] = slot
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get(self, key: str) -> np.ndarray | None:
+        slot = self._slots.get(key)
+        if slot is None or self._vectors is None:
+            return None
+        return self._vectors[slot]
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        if key in self._slots:
+            return
+        if self._vectors is None:
+            self._create(vector.shape[-1])
+        assert self._vectors is not None
+        if vector.shape[-1] != self._vectors.shape[1]:
+            self._reset()
+            self._create(vector.shape[-1])
+            assert self._vectors is not None
+
+        slot = self._cursor
+        self._cursor = (self._cursor + 1) % self.capacity
+        self._vectors[slot] = vector
+        self._assign(key, slot)
+
+        if self._index_file is None:
+            self._index_file = self._index_path.open("a")
+        self._index_file.write(f"{key} {slot}\n")
+        self._index_file.flush()
+
+    def close(self) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        namespace: str,
+        memory_entries: int,
+        disk_dir: str = "",
+        disk_entries: int = 0,
+    ) -> None:
+        self.namespace = namespace
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._disk: DiskEmbeddingStore | None = None
+        if disk_dir and disk_entries > 0:
+            digest = hashlib.sha256(namespace.encode()).hexdigest()[:16]
+            self._disk = DiskEmbeddingStore(Path(disk_dir) / digest, disk_entries)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, code: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{code}".encode()).hexdigest()
+
+    def get(self, key: str) -> np.ndarray | None:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        if self._disk is not None:
+            stored = self._disk.get(key)
+            if stored is not None:
+                self.disk_hits += 1
+                vector = np.array(stored)
+                self._remember(key, vector)
+                return vector
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        self._remember(key, vector)
+        if self._disk is not None:
+            self._disk.put(key, vector)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory": {"policy": "lru", "entries": len(self._memory), "capacity": self.memory_entries},
+            "disk": {
+                "policy": "fifo-ring",
+                "entries": len(self._disk) if self._disk is not None else 0,
+                "capacity": self._disk.capacity if self._disk is not None else 0,
+            },
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_evictions": self.evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
@@ -1,4 +1,12 @@
+import asyncio
 import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from itertools import islice
 from typing import Any
 
 import numpy as np
@@ -6,15 +14,127 @@ from langchain_core.prompts import PromptTemplate
 from langchain_nvidia_ai_endpoints import ChatNVIDIA
 from pinecone import Pinecone
 from transformers import AutoModel, AutoTokenizer
-import torch
 
+from app.batching import MicroBatcher
 from app.config import get_settings
+from app.embedding_cache import EmbeddingCache
+from app.inference import InferenceExecutor, mean_pool, prepare_encoder
+from app.metrics import LatencyTracker
+from app.vector_index import LocalVectorIndex
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
+WARMUP_SNIPPETS = [
+    "def add(a, b):\n    return a + b\n",
+    "export function handler(req, res) {\n  res.json({ ok: true });\n}\n" * 8,
+]
 
-tokenizer = AutoTokenizer.from_pretrained(settings.embedding_model)
-encoder_model = AutoModel.from_pretrained(settings.embedding_model)
+
+class ModelNotReadyError(RuntimeError):
+    pass
+
+
+@dataclass
+class AnalysisContext:
+    code: str
+    language: str
+    embedding: np.ndarray
+    digest: str
+    similar_summary: str
+    started: float
+
+
+@dataclass
+class ChunkedEmbedding:
+    vector: np.ndarray
+    chunk_vectors: np.ndarray
+    spans: list[tuple[int, int]]
+
+
+def iter_token_windows(token_ids: list[int], window: int, overlap: int) -> Iterator[tuple[int, list[int]]]:
+    window = max(1, window)
+    step = max(1, window - max(0, overlap))
+    start = 0
+    while True:
+        yield start, token_ids[start : start + window]
+        if start + window >= len(token_ids):
+            return
+        start += step
+
+
+DEFAULT_SECTIONS: dict[str, list[str]] = {
+    "suggestions": [
+        "Add explicit input validation and fail-fast error handling.",
+        "Extract repeated logic into small pure functions for easier testing.",
+    ],
+    "bugs": [
+        "Potential unchecked null/undefined access in control paths.",
+        "Missing authentication/authorization checks around sensitive operations.",
+    ],
+    "optimizations": [
+        "Avoid repeated heavy computation by memoizing deterministic results.",
+        "Batch IO-bound calls and parallelize independent async operations.",
+    ],
+}
+
+SUGGESTIONS_PROMPT = PromptTemplate.from_template(
+    """
+    You are a senior reviewer. Provide concise maintainability suggestions for this {language} code.
+    Similar patterns: {similar}
+    Code:
+    {code}
+    """
+)
+
+BUGS_PROMPT = PromptTemplate.from_template(
+    """
+    Find likely bugs and security risks in this {language} snippet. Keep answers brief.
+    Code:
+    {code}
+    """
+)
+
+PERF_PROMPT = PromptTemplate.from_template(
+    """
+    Suggest runtime and memory optimizations for this {language} snippet.
+    Code:
+    {code}
+    """
+)
+
+COMBINED_PROMPT = PromptTemplate.from_template(
+    """
+    You are a senior reviewer. Review this {language} code and reply with a single JSON object only,
+    no prose and no markdown, shaped exactly like:
+    {{"suggestions": ["..."], "bugs": ["..."], "optimizations": ["..."]}}
+    - suggestions: concise maintainability suggestions. Similar patterns: {similar}
+    - bugs: likely bugs and security risks, kept brief.
+    - optimizations: runtime and memory optimizations.
+    Use at most 5 short items per list.
+    Code:
+    {code}
+    """
+)
+
+
+def _parse_sections(content: str) -> dict[str, list[str]] | None:
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(content[start : end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    sections: dict[str, list[str]] = {}
+    for section in DEFAULT_SECTIONS:
+        items = data.get(section)
+        if isinstance(items, list):
+            sections[section] = [str(item).strip("- ").strip() for item in items if str(item).strip()][:5]
+    return sections
 
 
 class AIEngine:
@@ -34,84 +154,303 @@ class AIEngine:
             pc = Pinecone(api_key=settings.pinecone_api_key)
             self.pinecone_index = pc.Index(host=settings.pinecone_host)
 
+        self.local_index = None
+        if not self.pinecone_index and settings.local_index_enabled:
+            self.local_index = LocalVectorIndex(
+                directory=settings.local_index_dir,
+                ivf_lists=settings.local_index_ivf_lists,
+                nprobe=settings.local_index_nprobe,
+                max_entries=settings.local_index_max_entries,
+            )
+
+        self.executor = InferenceExecutor(
+            workers=settings.inference_workers,
+            torch_threads=settings.torch_num_threads,
+        )
+        self.batcher = MicroBatcher(
+            self.encode_batch,
+            executor=self.executor,
+            max_batch_size=settings.embedding_batch_max_size,
+            max_wait_ms=settings.embedding_batch_max_wait_ms,
+            max_pending=settings.inference_queue_limit,
+        )
+        self.chunk_batcher = MicroBatcher(
+            self.encode_token_windows,
+            executor=self.executor,
+            max_batch_size=settings.embedding_batch_max_size,
+            max_wait_ms=settings.embedding_batch_max_wait_ms,
+            max_pending=settings.inference_queue_limit,
+        )
+        self.embedding_cache = EmbeddingCache(
+            namespace=self._cache_namespace(),
+            memory_entries=settings.embedding_cache_entries,
+            disk_dir=settings.embedding_cache_dir,
+            disk_entries=settings.embedding_cache_disk_entries,
+        )
+        self.prompt_latency = LatencyTracker()
+        self.stream_latency = LatencyTracker()
+
+        self.tokenizer: Any = None
+        self._tokenizer_lock = threading.Lock()
+        self.encoder_model: Any = None
+        self.special_token_ids: list[int] = []
+        self.precision = settings.inference_precision
+        self.model_state = "pending"
+        self.model_error: str | None = None
+        self.startup_timings: dict[str, float] = {}
+        self._ready = asyncio.Event()
+        self._startup_task: asyncio.Task | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.model_state == "ready"
+
+    def load_models(self) -> None:
+        started = time.perf_counter()
+        self.tokenizer = AutoTokenizer.from_pretrained(settings.embedding_model)
+        encoder_model, self.precision = prepare_encoder(
+            AutoModel.from_pretrained(settings.embedding_model),
+            settings.inference_precision,
+        )
+        self.encoder_model = encoder_model
+        self.special_token_ids = self.tokenizer("", add_special_tokens=True)["input_ids"]
+        self.startup_timings["model_load_seconds"] = round(time.perf_counter() - started, 3)
+
+    def warm_up(self) -> None:
+        started = time.perf_counter()
+        self.encode_batch(WARMUP_SNIPPETS)
+        if settings.embedding_chunking:
+            self.encode_token_windows([self._token_ids(snippet) for snippet in WARMUP_SNIPPETS])
+        self.startup_timings["warmup_seconds"] = round(time.perf_counter() - started, 3)
+
+    async def _load_and_warm(self) -> None:
+        try:
+            self.model_state = "loading"
+            await self.executor.run(self.load_models)
+            self.model_state = "warming"
+            await self.executor.run(self.warm_up)
+            self.model_state = "ready"
+        except Exception as exc:
+            logger.exception("Failed to load the embedding model")
+            self.model_state = "failed"
+            self.model_error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self._ready.set()
+
+    def start(self) -> asyncio.Task:
+        if self._startup_task is None:
+            self._startup_task = asyncio.get_running_loop().create_task(self._load_and_warm())
+        return self._startup_task
+
+    async def wait_until_ready(self) -> None:
+        if self.is_ready:
+            return
+        self.start()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=settings.model_ready_timeout_seconds)
+        except TimeoutError as exc:
+            raise ModelNotReadyError(f"Embedding model is still {self.model_state}") from exc
+        if not self.is_ready:
+            raise ModelNotReadyError(f"Embedding model failed to load: {self.model_error}")
+
+    def _cache_namespace(self) -> str:
+        if settings.embedding_chunking:
+            strategy = f"chunked:{settings.embedding_chunk_tokens}/{settings.embedding_chunk_overlap}"
+        else:
+            strategy = "truncated:512"
+        return f"{settings.embedding_model}|{settings.inference_precision}|{strategy}"
+
+    def encode_batch(self, codes: list[str]) -> np.ndarray:
+        with self._tokenizer_lock:
+            inputs = self.tokenizer(codes, return_tensors="pt", truncation=True, padding=True, max_length=512)
+        return mean_pool(self.encoder_model, inputs)
+
+    def encode_token_windows(self, windows: list[list[int]]) -> np.ndarray:
+        special = self.special_token_ids
+        encoded = [[*special[:1], *window, *special[1:]] for window in windows]
+        with self._tokenizer_lock:
+            inputs = self.tokenizer.pad({"input_ids": encoded}, return_tensors="pt")
+        return mean_pool(self.encoder_model, inputs)
+
     def generate_embedding(self, code: str) -> np.ndarray:
-        inputs = tokenizer(code, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        with torch.no_grad():
-            outputs = encoder_model(**inputs)
-        embedding = outputs.last_hidden_state.mean(dim=1).squeeze(0)
-        return embedding.cpu().numpy()
+        return self.encode_batch([code])[0]
+
+    def _token_ids(self, code: str) -> list[int]:
+        with self._tokenizer_lock:
+            return self.tokenizer(code, add_special_tokens=False, return_attention_mask=False, verbose=False)["input_ids"]
+
+    async def embed_chunked(self, code: str) -> ChunkedEmbedding:
+        await self.wait_until_ready()
+        token_ids = await self.executor.run(self._token_ids, code)
+        window = settings.embedding_chunk_tokens - len(self.special_token_ids)
+        overlap = min(settings.embedding_chunk_overlap, window - 1)
+        windows = iter_token_windows(token_ids, window, overlap)
+
+        vectors: list[np.ndarray] = []
+        spans: list[tuple[int, int]] = []
+        while group := list(islice(windows, settings.embedding_batch_max_size)):
+            vectors.extend(await asyncio.gather(*[self.chunk_batcher.submit(ids) for _, ids in group]))
+            spans.extend((start, start + len(ids)) for start, ids in group)
+
+        chunk_vectors = np.stack(vectors)
+        weights = np.array(
+            [end - max(start, spans[i - 1][1] if i else 0) for i, (start, end) in enumerate(spans)],
+            dtype=np.float32,
+        )
+        weights = np.maximum(weights, 1.0)
+        vector = (chunk_vectors * weights[:, None]).sum(axis=0) / weights.sum()
+        return ChunkedEmbedding(vector=vector.astype(np.float32), chunk_vectors=chunk_vectors, spans=spans)
+
+    async def embed(self, code: str) -> np.ndarray:
+        key = self.embedding_cache.key(code)
+        cached = self.embedding_cache.get(key)
+        if cached is not None:
+            return cached
+
+        await self.wait_until_ready()
+
+        if settings.embedding_chunking:
+            embedding = (await self.embed_chunked(code)).vector
+        else:
+            embedding = await self.batcher.submit(code)
+        self.embedding_cache.put(key, embedding)
+        return embedding
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "model": {"state": self.model_state, "precision": self.precision, **self.startup_timings},
+            "embedding_batcher": {**self.batcher.stats.snapshot(), "pending": self.batcher.pending},
+            "chunk_batcher": {**self.chunk_batcher.stats.snapshot(), "pending": self.chunk_batcher.pending},
+            "inference_executor": self.executor.stats(),
+            "embedding_cache": self.embedding_cache.stats(),
+            "local_index": self.local_index.stats() if self.local_index is not None else None,
+            "llm_prompt_mode": settings.llm_prompt_mode,
+            "llm_prompts": self.prompt_latency.snapshot(),
+            "analysis_latency": self.stream_latency.snapshot(),
+        }
+
+    async def close(self) -> None:
+        if self._startup_task is not None and not self._startup_task.done():
+            self._startup_task.cancel()
+        await self.batcher.close()
+        await self.chunk_batcher.close()
+        self.executor.shutdown()
+        self.embedding_cache.close()
+        if self.local_index is not None:
+            self.local_index.close()
 
     def find_similar_code(self, embedding: np.ndarray) -> list[dict[str, Any]]:
+        if self.local_index is not None:
+            return self.local_index.query(embedding, top_k=5)
+
         if not self.pinecone_index:
             return []
 
         response = self.pinecone_index.query(vector=embedding.tolist(), top_k=5, include_metadata=True)
         return response.get("matches", [])
 
-    async def _run_prompt(self, prompt: str, fallback: list[str]) -> list[str]:
+    def index_embedding(self, vector_id: str, embedding: np.ndarray, metadata: dict[str, Any]) -> None:
+        if self.local_index is not None:
+            self.local_index.upsert(vector_id, embedding, metadata)
+
+    async def _run_prompt(self, name: str, prompt: str, fallback: list[str]) -> list[str]:
         if not self.llm:
             return fallback
 
-        output = await self.llm.ainvoke(prompt)
+        started = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(self.llm.ainvoke(prompt), timeout=settings.llm_prompt_timeout_seconds)
+        except TimeoutError:
+            self.prompt_latency.record_failure(name, "timeouts")
+            return fallback
+        finally:
+            self.prompt_latency.record(name, (time.perf_counter() - started) * 1000)
+
         lines = [line.strip("- ") for line in output.content.splitlines() if line.strip()]
         return lines[:5] if lines else fallback
 
-    async def analyze(self, code: str, language: str) -> dict[str, Any]:
-        embedding = self.generate_embedding(code)
-        similar = self.find_similar_code(embedding)
+    async def _labelled_prompt(self, section: str, prompt: str) -> tuple[str, list[str]]:
+        return section, await self._run_prompt(f"concurrent:{section}", prompt, DEFAULT_SECTIONS[section])
 
-        digest = hashlib.sha1(code.encode()).hexdigest()[:8]
-        similar_summary = ", ".join([m.get("id", "unknown") for m in similar]) or "none"
+    async def _iter_sections(self, context: AnalysisContext) -> AsyncIterator[tuple[str, list[str]]]:
+        mode = settings.llm_prompt_mode
+        if mode == "single_shot":
+            sections = await self._run_sections_single_shot(context.code, context.language, context.similar_summary)
+            for section, items in sections.items():
+                yield section, items
+            return
 
-        suggestions_prompt = PromptTemplate.from_template(
-            """
-            You are a senior reviewer. Provide concise maintainability suggestions for this {language} code.
-            Similar patterns: {similar}
-            Code:
-            {code}
-            """
-        ).format(language=language, code=code, similar=similar_summary)
-
-        bugs_prompt = PromptTemplate.from_template(
-            """
-            Find likely bugs and security risks in this {language} snippet. Keep answers brief.
-            Code:
-            {code}
-            """
-        ).format(language=language, code=code)
-
-        perf_prompt = PromptTemplate.from_template(
-            """
-            Suggest runtime and memory optimizations for this {language} snippet.
-            Code:
-            {code}
-            """
-        ).format(language=language, code=code)
-
-        suggestions = await self._run_prompt(
-            suggestions_prompt,
-            [
-                "Add explicit input validation and fail-fast error handling.",
-                "Extract repeated logic into small pure functions for easier testing.",
-            ],
-        )
-        bugs = await self._run_prompt(
-            bugs_prompt,
-            [
-                "Potential unchecked null/undefined access in control paths.",
-                "Missing authentication/authorization checks around sensitive operations.",
-            ],
-        )
-        optimizations = await self._run_prompt(
-            perf_prompt,
-            [
-                "Avoid repeated heavy computation by memoizing deterministic results.",
-                "Batch IO-bound calls and parallelize independent async operations.",
-            ],
+        prompts = {
+            "suggestions": SUGGESTIONS_PROMPT.format(
+                language=context.language, code=context.code, similar=context.similar_summary
+            ),
+            "bugs": BUGS_PROMPT.format(language=context.language, code=context.code),
+            "optimizations": PERF_PROMPT.format(language=context.language, code=context.code),
+        }
+        if mode == "sequential":
+            for section, prompt in prompts.items():
+                yield section, await self._run_prompt(f"sequential:{section}", prompt, DEFAULT_SECTIONS[section])
+            return
+
+        tasks = [asyncio.create_task(self._labelled_prompt(section, prompt)) for section, prompt in prompts.items()]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_sections_single_shot(self, code: str, language: str, similar_summary: str) -> dict[str, list[str]]:
+        if not self.llm:
+            return dict(DEFAULT_SECTIONS)
+
+        prompt = COMBINED_PROMPT.format(language=language, code=code, similar=similar_summary)
+        started = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(self.llm.ainvoke(prompt), timeout=settings.llm_prompt_timeout_seconds)
+        except TimeoutError:
+            self.prompt_latency.record_failure("single_shot:combined", "timeouts")
+            return dict(DEFAULT_SECTIONS)
+        finally:
+            self.prompt_latency.record("single_shot:combined", (time.perf_counter() - started) * 1000)
+
+        parsed = _parse_sections(output.content)
+        if parsed is None:
+            self.prompt_latency.record_failure("single_shot:combined", "parse_errors")
+            parsed = {}
+        return {section: parsed.get(section) or fallback for section, fallback in DEFAULT_SECTIONS.items()}
+
+    async def prepare_analysis(self, code: str, language: str) -> AnalysisContext:
+        started = time.perf_counter()
+        embedding = await self.embed(code)
+        fingerprint = hashlib.sha1(code.encode()).hexdigest()
+        similar = await asyncio.to_thread(self.find_similar_code, embedding)
+        similar = [match for match in similar if match.get("id") != fingerprint]
+        if self.local_index is not None:
+            await asyncio.to_thread(self.index_embedding, fingerprint, embedding, {"language": language})
+        similar_summary = ", ".join([m.get("id", "unknown") for m in similar]) or "none"
+        return AnalysisContext(
+            code=code,
+            language=language,
+            embedding=embedding,
+            digest=fingerprint[:8],
+            similar_summary=similar_summary,
+            started=started,
         )
 
+    async def stream_analysis(self, context: AnalysisContext) -> AsyncIterator[dict[str, Any]]:
+        sections: dict[str, list[str]] = {}
+        async for section, items in self._iter_sections(context):
+            if not sections:
+                self.stream_latency.record("first_section", (time.perf_counter() - context.started) * 1000)
+            sections[section] = items
+            yield {"type": "section", "section": section, "items": items}
+        self.stream_latency.record("complete", (time.perf_counter() - context.started) * 1000)
+
+        bugs = sections["bugs"]
+
         documentation = (
-            f"Code fingerprint `{digest}` in {language}.\n"
+            f"Code fingerprint `{context.digest}` in {context.language}.\n"
             "This snippet was analyzed for maintainability, security, and performance.\n"
             "Recommended next step: add focused tests for risky branches before refactors."
         )
@@ -119,11 +458,22 @@ class AIEngine:
         raw_score = 1.0 - min(0.8, len(bugs) * 0.2)
         score = max(0.05, round(raw_score, 2))
 
-        return {
-            "suggestions": suggestions,
-            "bugs": bugs,
-            "optimizations": optimizations,
-            "documentation": documentation,
-            "score": score,
-            "embedding": embedding.tolist(),
+        yield {
+            "type": "result",
+            "result": {
+                "suggestions": sections["suggestions"],
+                "bugs": bugs,
+                "optimizations": sections["optimizations"],
+                "documentation": documentation,
+                "score": score,
+                "embedding": context.embedding,
+            },
         }
+
+    async def analyze(self, code: str, language: str) -> dict[str, Any]:
+        context = await self.prepare_analysis(code, language)
+        result: dict[str, Any] = {}
+        async for event in self.stream_analysis(context):
+            if event["type"] == "result":
+                result = event["result"]
+        return result
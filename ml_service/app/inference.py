@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+import numpy as np
+import torch
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_supports_bf16() -> bool:
+    try:
+        return bool(torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def prepare_encoder(model: torch.nn.Module, precision: str) -> tuple[torch.nn.Module, str]:
+    model.eval()
+    if precision == "int8":
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8), "int8"
+    if precision == "bf16":
+        if cpu_supports_bf16():
+            return model.to(torch.bfloat16), "bf16"
+        logger.warning("bf16 inference requested but this CPU lacks bf16 support, using fp32")
+    return model, "fp32"
+
+
+def mean_pool(model: torch.nn.Module, inputs: Any) -> np.ndarray:
+    with torch.no_grad():
+        outputs = model(**inputs)
+    hidden = outputs.last_hidden_state.float()
+    mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+    summed = (hidden * mask).sum(dim=1)
+    embeddings = summed / mask.sum(dim=1).clamp(min=1)
+    return embeddings.cpu().numpy()
+
+
+class InferenceQueueFullError(RuntimeError):
+    pass
+
+
+class InferenceExecutor:
+    def __init__(self, workers: int, torch_threads: int = 0) -> None:
+        if torch_threads > 0:
+            torch.set_num_threads(torch_threads)
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._active = 0
+        self._completed = 0
+        self._busy_ms = 0.0
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        self._active += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._active -= 1
+            self._completed += 1
+            self._busy_ms += (time.perf_counter() - started) * 1000
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "workers": self.workers,
+            "torch_threads": torch.get_num_threads(),
+            "active": self._active,
+            "completed": self._completed,
+            "avg_run_ms": round(self._busy_ms / self._completed, 3) if self._completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,59 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 
-from app.engine import AIEngine
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.bootstrap import IMPORT_STARTED
+from app.config import get_settings
+from app.engine import AIEngine, AnalysisContext, ModelNotReadyError
+from app.inference import InferenceQueueFullError
 from app.models import CodeAnalysisRequest, CodeAnalysisResponse
+from app.transport import encode_embedding
 
-app = FastAPI(title="CodeMind ML Service", version="1.0.0")
+logger = logging.getLogger("uvicorn.error")
+settings = get_settings()
 engine = AIEngine()
+engine.startup_timings["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
+
+
+async def _report_startup(started: float, delay: float = 0.0) -> None:
+    if delay > 0:
+        await asyncio.sleep(delay)
+    await engine.start()
+    if not engine.is_ready:
+        logger.error("Embedding model failed to load: %s", engine.model_error)
+        return
+    engine.startup_timings["ready_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("ML service ready: %s", engine.startup_timings)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    logger.info("ML service imported in %.3fs", engine.startup_timings["import_seconds"])
+    delay = 0.0 if settings.model_load_mode == "background" else settings.model_lazy_warmup_seconds
+    reporter = asyncio.get_running_loop().create_task(_report_startup(time.perf_counter(), delay))
+    yield
+    reporter.cancel()
+    await engine.close()
+
+
+app = FastAPI(title="CodeMind ML Service", version="1.0.0", lifespan=lifespan)
+
+
+@app.exception_handler(InferenceQueueFullError)
+async def inference_queue_full(_: Request, exc: InferenceQueueFullError) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(ModelNotReadyError)
+async def model_not_ready(_: Request, exc: ModelNotReadyError) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
 
 
 @app.get("/health")
@@ -12,7 +61,44 @@ async def health() -> dict[str, str]:
     return {"status": "ok", "service": "ml-service"}
 
 
-@app.post("/analyze", response_model=CodeAnalysisResponse)
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    content = {"status": engine.model_state, "service": "ml-service", **engine.startup_timings}
+    if engine.model_error:
+        content["error"] = engine.model_error
+    return JSONResponse(status_code=200 if engine.is_ready else 503, content=content)
+
+
+@app.get("/metrics")
+async def metrics() -> dict[str, Any]:
+    return engine.metrics()
+
+
+@app.post("/analyze", response_model=CodeAnalysisResponse, response_model_exclude_none=True)
 async def analyze(payload: CodeAnalysisRequest) -> CodeAnalysisResponse:
     data = await engine.analyze(payload.code, payload.language)
-    return CodeAnalysisResponse(**data)
+    embedding = data.pop("embedding")
+    return CodeAnalysisResponse(**data, **encode_embedding(embedding, payload.embedding_format))
+
+
+async def _ndjson_events(context: AnalysisContext, embedding_format: str) -> AsyncIterator[str]:
+    try:
+        async for event in engine.stream_analysis(context):
+            if event["type"] == "result":
+                data = dict(event["result"])
+                embedding = data.pop("embedding")
+                result = CodeAnalysisResponse(**data, **encode_embedding(embedding, embedding_format))
+                event = {"type": "result", "result": result.model_dump(exclude_none=True)}
+            yield json.dumps(event) + "\n"
+    except Exception as exc:
+        logger.exception("Streaming analysis failed")
+        yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(payload: CodeAnalysisRequest) -> StreamingResponse:
+    context = await engine.prepare_analysis(payload.code, payload.language)
+    return StreamingResponse(
+        _ndjson_events(context, payload.embedding_format),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,31 @@
+from collections import defaultdict, deque
+
+import numpy as np
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 512) -> None:
+        self._samples: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._counts: dict[str, int] = defaultdict(int)
+        self._failures: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        self._samples[name].append(elapsed_ms)
+        self._counts[name] += 1
+
+    def record_failure(self, name: str, reason: str) -> None:
+        self._failures[name][reason] += 1
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        report: dict[str, dict[str, float]] = {}
+        for name, samples in self._samples.items():
+            values = np.fromiter(samples, dtype=np.float64)
+            report[name] = {
+                "count": self._counts[name],
+                "avg_ms": round(float(values.mean()), 3),
+                "p50_ms": round(float(np.percentile(values, 50)), 3),
+                "p95_ms": round(float(np.percentile(values, 95)), 3),
+                "max_ms": round(float(values.max()), 3),
+                **self._failures.get(name, {}),
+            }
+        return report
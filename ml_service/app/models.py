@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -8,6 +8,7 @@ class CodeAnalysisRequest(BaseModel):
     language: str = Field(default="typescript")
     context: dict[str, Any] = Field(default_factory=dict)
     repository: str | None = None
+    embedding_format: Literal["json", "f32", "f16", "none"] = "json"
 
 
 class CodeAnalysisResponse(BaseModel):
@@ -16,4 +17,7 @@ class CodeAnalysisResponse(BaseModel):
     optimizations: list[str]
     documentation: str
     score: float
-    embedding: list[float]
+    embedding: list[float] | None = None
+    embedding_b64: str | None = None
+    embedding_dtype: Literal["f32", "f16"] | None = None
+    embedding_dim: int | None = None
@@ -0,0 +1,30 @@
+import base64
+from typing import Any
+
+import numpy as np
+
+EMBEDDING_DTYPES = {"f32": "<f4", "f16": "<f2"}
+
+
+def encode_embedding(vector: np.ndarray, embedding_format: str) -> dict[str, Any]:
+    if embedding_format == "none":
+        return {}
+    if embedding_format == "json":
+        return {"embedding": np.asarray(vector, dtype=np.float32).tolist()}
+
+    dtype = EMBEDDING_DTYPES[embedding_format]
+    raw = np.ascontiguousarray(vector, dtype=dtype).tobytes()
+    return {
+        "embedding_b64": base64.b64encode(raw).decode("ascii"),
+        "embedding_dtype": embedding_format,
+        "embedding_dim": int(vector.shape[-1]),
+    }
+
+
+def decode_embedding(payload: dict[str, Any]) -> np.ndarray | None:
+    if payload.get("embedding") is not None:
+        return np.asarray(payload["embedding"], dtype=np.float32)
+    if not payload.get("embedding_b64"):
+        return None
+    raw = base64.b64decode(payload["embedding_b64"])
+    return np.frombuffer(raw, dtype=EMBEDDING_DTYPES[payload["embedding_dtype"]])
@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class LocalVectorIndex:
+    def __init__(
+        self,
+        directory: str = "",
+        ivf_lists: int = 0,
+        nprobe: int = 8,
+        initial_capacity: int = 1024,
+        max_entries: int = 0,
+    ) -> None:
+        self.ivf_lists = ivf_lists
+        self.max_entries = max_entries
+        self.nprobe = max(1, nprobe)
+        self._directory = Path(directory) if directory else None
+        self._initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self._dim: int | None = None
+        self._matrix: np.ndarray | None = None
+        self._count = 0
+        self._ids: list[str] = []
+        self._metadata: list[dict[str, Any]] = []
+        self._positions: dict[str, int] = {}
+        self._centroids: np.ndarray | None = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._list_rows: list[list[int]] = []
+        self._list_cache: dict[int, np.ndarray] = {}
+        self._log_file: Any = None
+        self._log_records = 0
+        self._cursor = 0
+        self._evictions = 0
+        if self._directory is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @property
+    def _vectors_path(self) -> Path:
+        assert self._directory is not None
+        return self._directory / "vectors.f32"
+
+    @property
+    def _ids_path(self) -> Path:
+        assert self._directory is not None
+        return self._directory / "ids.jsonl"
+
+    @property
+    def _meta_path(self) -> Path:
+        assert self._directory is not None
+        return self._directory / "meta.json"
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _load(self) -> None:
+        if not self._meta_path.exists() or not self._vectors_path.exists():
+            return
+
+        meta = json.loads(self._meta_path.read_text())
+        self._dim = int(meta["dim"])
+        capacity = self._vectors_path.stat().st_size // (4 * self._dim)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        if self._ids_path.exists():
+            with self._ids_path.open() as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    row = int(record["row"])
+                    if row >= capacity:
+                        continue
+                    while len(self._ids) <= row:
+                        self._ids.append("")
+                        self._metadata.append({})
+                    previous = self._ids[row]
+                    if previous != record["id"]:
+                        if self._positions.get(previous) == row:
+                            del self._positions[previous]
+                        self._cursor = row + 1
+                    self._ids[row] = record["id"]
+                    self._metadata[row] = record.get("metadata", {})
+                    self._positions[record["id"]] = row
+        self._count = len(self._ids)
+        if self.max_entries > 0:
+            self._cursor %= self.max_entries
+        self._compact_log()
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        assert self._dim is not None
+        if self._directory is None:
+            matrix = np.zeros((capacity, self._dim), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[: self._count] = self._matrix[: self._count]
+            return matrix
+
+        if self._matrix is None:
+            self._meta_path.write_text(json.dumps({"dim": self._dim}))
+        elif isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        with self._vectors_path.open("ab") as handle:
+            handle.truncate(capacity * self._dim * 4)
+        return np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+
+    def _append_log(self, vector_id: str, row: int, metadata: dict[str, Any]) -> None:
+        if self._directory is None:
+            return
+        if self._log_records > max(4 * self._count, 1024):
+            self._compact_log()
+        if self._log_file is None:
+            self._log_file = self._ids_path.open("a")
+        self._log_file.write(json.dumps({"id": vector_id, "row": row, "metadata": metadata}) + "\n")
+        self._log_file.flush()
+        self._log_records += 1
+
+    def _compact_log(self) -> None:
+        if self._directory is None:
+            return
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        order = range(self._count)
+        if self.max_entries > 0 and self._count >= self.max_entries:
+            order = [(self._cursor + offset) % self._count for offset in range(self._count)]
+        temporary = self._ids_path.with_suffix(".tmp")
+        with temporary.open("w") as handle:
+            for row in order:
+                handle.write(json.dumps({"id": self._ids[row], "row": row, "metadata": self._metadata[row]}) + "\n")
+        os.replace(temporary, self._ids_path)
+        self._log_records = self._count
+
+    def upsert(self, vector_id: str, vector: np.ndarray, metadata: dict[str, Any] | None = None) -> None:
+        normalized = _normalize(vector).reshape(-1)
+        metadata = metadata or {}
+        with self._lock:
+            if self._dim is None:
+                self._dim = normalized.shape[0]
+            if normalized.shape[0] != self._dim:
+                raise ValueError(f"Expected {self._dim}-dimensional vector, got {normalized.shape[0]}")
+
+            row = self._positions.get(vector_id)
+            if row is None and self.max_entries > 0 and self._count >= self.max_entries:
+                row = self._cursor
+                self._cursor = (row + 1) % self.max_entries
+                del self._positions[self._ids[row]]
+                self._ids[row] = vector_id
+                self._metadata[row] = metadata
+                self._positions[vector_id] = row
+                self._evictions += 1
+            elif row is None:
+                row = self._count
+                capacity = self._matrix.shape[0] if self._matrix is not None else 0
+                if row >= capacity:
+                    grown = max(self._initial_capacity, capacity * 2)
+                    self._matrix = self._allocate(min(grown, self.max_entries) if self.max_entries > 0 else grown)
+                self._ids.append(vector_id)
+                self._metadata.append(metadata)
+                self._positions[vector_id] = row
+                self._count += 1
+                if self.max_entries > 0:
+                    self._cursor = self._count % self.max_entries
+            else:
+                self._metadata[row] = metadata
+
+            assert self._matrix is not None
+            self._matrix[row] = normalized
+            self._append_log(vector_id, row, metadata)
+            if self._centroids is not None:
+                self._assign_rows(np.array([row]))
+
+    def train(self, iterations: int = 10, sample_size: int = 50_000, seed: int = 0, retrain: bool = False) -> None:
+        with self._lock:
+            if self.ivf_lists <= 0 or self._matrix is None or self._count < self.ivf_lists:
+                return
+            if self._centroids is not None and not retrain:
+                return
+            rng = np.random.default_rng(seed)
+            count = self._count
+            sample_rows = rng.choice(count, size=min(sample_size, count), replace=False)
+            sample = np.asarray(self._matrix[np.sort(sample_rows)])
+            centroids = sample[rng.choice(sample.shape[0], size=self.ivf_lists, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                order = np.argsort(labels, kind="stable")
+                present, starts = np.unique(labels[order], return_index=True)
+                centroids[present] = _normalize(np.add.reduceat(sample[order], starts, axis=0))
+
+            assignments = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+            for start in range(0, count, 65_536):
+                block = np.asarray(self._matrix[start : min(start + 65_536, count)])
+                assignments[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+
+            order = np.argsort(assignments[:count], kind="stable")
+            boundaries = np.searchsorted(assignments[:count][order], np.arange(self.ivf_lists + 1))
+            self._centroids = centroids
+            self._assignments = assignments
+            self._list_rows = [order[boundaries[i] : boundaries[i + 1]].tolist() for i in range(self.ivf_lists)]
+            self._list_cache.clear()
+
+    def _assign_rows(self, rows: np.ndarray) -> None:
+        assert self._centroids is not None and self._matrix is not None
+        if self._assignments.shape[0] < self._matrix.shape[0]:
+            grown = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+            grown[: self._assignments.shape[0]] = self._assignments
+            self._assignments = grown
+
+        labels = np.argmax(np.asarray(self._matrix[rows]) @ self._centroids.T, axis=1).astype(np.int32)
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            previous = int(self._assignments[row])
+            if previous == label:
+                continue
+            if previous >= 0:
+                self._list_rows[previous].remove(row)
+                self._list_cache.pop(previous, None)
+            self._list_rows[label].append(row)
+            self._list_cache.pop(label, None)
+            self._assignments[row] = label
+
+    def _probe_rows(self, query: np.ndarray) -> np.ndarray:
+        assert self._centroids is not None
+        probes = _top_k(self._centroids @ query, self.nprobe)
+        chunks = []
+        for label in probes.tolist():
+            cached = self._list_cache.get(label)
+            if cached is None:
+                cached = np.fromiter(self._list_rows[label], dtype=np.int64)
+                self._list_cache[label] = cached
+            chunks.append(cached)
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def query(self, vector: np.ndarray, top_k: int = 5) -> list[dict[str, Any]]:
+        if self.ivf_lists > 0 and self._centroids is None and self._count >= self.ivf_lists * 39:
+            self.train()
+
+        query = _normalize(vector).reshape(-1)
+        with self._lock:
+            if self._matrix is None or self._count == 0:
+                return []
+            matrix, count = self._matrix, self._count
+            rows = self._probe_rows(query) if self._centroids is not None else None
+
+        if rows is None:
+            scores = matrix[:count] @ query
+            best = _top_k(scores, top_k)
+            picked_rows, picked_scores = best, scores[best]
+        else:
+            scores = matrix[rows] @ query
+            best = _top_k(scores, top_k)
+            picked_rows, picked_scores = rows[best], scores[best]
+
+        return [
+            {"id": self._ids[row], "score": float(score), "metadata": self._metadata[row]}
+            for row, score in zip(picked_rows.tolist(), picked_scores.tolist())
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "vectors": self._count,
+            "dim": self._dim or 0,
+            "mode": "ivf" if self._centroids is not None else "flat",
+            "ivf_lists": self.ivf_lists,
+            "nprobe": self.nprobe,
+            "max_entries": self.max_entries,
+            "evictions": self._evictions,
+            "persistent": self._directory is not None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
@@ -0,0 +1,47 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.models import CodeAnalysisResponse
+from app.transport import decode_embedding, encode_embedding
+
+BASE_RESPONSE = {
+    "suggestions": ["Add explicit input validation and fail-fast error handling."] * 3,
+    "bugs": ["Potential unchecked null/undefined access in control paths."] * 3,
+    "optimizations": ["Avoid repeated heavy computation by memoizing deterministic results."] * 3,
+    "documentation": "Code fingerprint `deadbeef` in python.",
+    "score": 0.6,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare /analyze embedding transport formats")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    vector = np.random.default_rng(3).standard_normal(args.dim).astype(np.float32)
+    for embedding_format in ("json", "f32", "f16", "none"):
+        started = time.perf_counter()
+        for _ in range(args.repeats):
+            body = CodeAnalysisResponse(
+                **BASE_RESPONSE, **encode_embedding(vector, embedding_format)
+            ).model_dump_json(exclude_none=True)
+        encode_us = (time.perf_counter() - started) / args.repeats * 1e6
+
+        started = time.perf_counter()
+        for _ in range(args.repeats):
+            decoded = decode_embedding(json.loads(body))
+        decode_us = (time.perf_counter() - started) / args.repeats * 1e6
+
+        error = float(np.abs(decoded - vector).max()) if decoded is not None else float("nan")
+        print(
+            f"format={embedding_format:<4} payload={len(body.encode()):6d}B "
+            f"encode={encode_us:8.1f}us decode={decode_us:8.1f}us max_abs_error={error:.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import time
+from typing import Any
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from app.config import get_settings
+from app.inference import mean_pool, prepare_encoder
+
+CORPUS = [
+    "def add(a, b):\n    return a + b\n",
+    "async function fetchUser(id) {\n  const res = await fetch(`/api/users/${id}`);\n  return res.json();\n}\n",
+    "SELECT id, email FROM users WHERE created_at > NOW() - INTERVAL '7 days' ORDER BY created_at DESC;",
+    "for (let i = 0; i < items.length; i++) {\n  total += items[i].price * items[i].qty;\n}\n",
+    "class Stack:\n    def __init__(self):\n        self.items = []\n\n    def push(self, item):\n        self.items.append(item)\n",
+    "const token = req.headers.authorization?.split(' ')[1];\nif (!token) return res.status(401).end();\n",
+    "func Sum(xs []int) int {\n\ttotal := 0\n\tfor _, x := range xs {\n\t\ttotal += x\n\t}\n\treturn total\n}\n",
+    "eval(userInput)",
+    "import os\npassword = os.environ.get('DB_PASSWORD', 'hunter2')\n",
+    "public int fib(int n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); }",
+    "with open(path) as handle:\n    rows = [line.split(',') for line in handle]\n",
+    "fn main() {\n    let v: Vec<u32> = (0..10).map(|x| x * x).collect();\n    println!(\"{:?}\", v);\n}\n",
+] * 2
+
+
+def _embed(model: torch.nn.Module, tokenizer: Any, texts: list[str]) -> np.ndarray:
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
+    return mean_pool(model, inputs)
+
+
+def _throughput(model: torch.nn.Module, tokenizer: Any, batch_size: int, repeats: int) -> float:
+    batch = (CORPUS * (batch_size // len(CORPUS) + 1))[:batch_size]
+    _embed(model, tokenizer, batch)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        _embed(model, tokenizer, batch)
+    return batch_size * repeats / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare quantized encoder embeddings and throughput with fp32")
+    parser.add_argument("--model", default=get_settings().embedding_model)
+    parser.add_argument("--precision", choices=["int8", "bf16"], default="int8")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    baseline, _ = prepare_encoder(AutoModel.from_pretrained(args.model), "fp32")
+    candidate, effective = prepare_encoder(AutoModel.from_pretrained(args.model), args.precision)
+
+    reference = _embed(baseline, tokenizer, CORPUS)
+    compared = _embed(candidate, tokenizer, CORPUS)
+    cosine = np.sum(reference * compared, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(compared, axis=1)
+    )
+
+    print(f"model={args.model} precision={effective} corpus={len(CORPUS)}")
+    print(f"cosine vs fp32: mean={cosine.mean():.5f} min={cosine.min():.5f}")
+    fp32_rate = _throughput(baseline, tokenizer, args.batch_size, args.repeats)
+    candidate_rate = _throughput(candidate, tokenizer, args.batch_size, args.repeats)
+    print(f"throughput fp32={fp32_rate:.1f}/s {effective}={candidate_rate:.1f}/s speedup={candidate_rate / fp32_rate:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
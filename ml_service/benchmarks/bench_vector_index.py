@@ -0,0 +1,69 @@
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.vector_index import LocalVectorIndex
+
+
+def _build(vectors: np.ndarray, directory: str, ivf_lists: int, nprobe: int) -> tuple[LocalVectorIndex, float]:
+    index = LocalVectorIndex(directory=directory, ivf_lists=ivf_lists, nprobe=nprobe, initial_capacity=vectors.shape[0])
+    started = time.perf_counter()
+    for row, vector in enumerate(vectors):
+        index.upsert(f"v{row}", vector)
+    index.train()
+    return index, time.perf_counter() - started
+
+
+def _measure(index: LocalVectorIndex, queries: np.ndarray, top_k: int) -> tuple[list[list[str]], np.ndarray]:
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        matches = index.query(query, top_k=top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([match["id"] for match in matches])
+    return results, np.array(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark LocalVectorIndex query latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--ivf-lists", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    for size in args.sizes:
+        centers = rng.standard_normal((max(1, size // 500), args.dim), dtype=np.float32)
+        vectors = centers[rng.integers(0, centers.shape[0], size)]
+        vectors += rng.normal(0, 0.5, vectors.shape).astype(np.float32)
+        queries = vectors[rng.choice(size, args.queries, replace=False)] + rng.normal(
+            0, 0.1, (args.queries, args.dim)
+        ).astype(np.float32)
+
+        with tempfile.TemporaryDirectory() as directory:
+            flat, flat_build = _build(vectors, directory, 0, args.nprobe)
+            flat_results, flat_latency = _measure(flat, queries, args.top_k)
+            flat.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            ivf, ivf_build = _build(vectors, directory, min(args.ivf_lists, size // 39), args.nprobe)
+            ivf_results, ivf_latency = _measure(ivf, queries, args.top_k)
+            ivf.close()
+
+        recall = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(flat_results, ivf_results)])
+        for mode, build, latency in (("flat", flat_build, flat_latency), ("ivf", ivf_build, ivf_latency)):
+            print(
+                f"n={size:>9,} mode={mode:<4} build={build:7.2f}s "
+                f"p50={np.percentile(latency, 50):8.3f}ms p95={np.percentile(latency, 95):8.3f}ms"
+            )
+        print(f"n={size:>9,} ivf recall@{args.top_k}={recall:.3f}")
+        del vectors
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from app.bootstrap import IMPORT_STARTED
 from app.main import app
 
-__all__ = ["app"]
+__all__ = ["IMPORT_STARTED", "app"]
@@ -0,0 +1,40 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.batching import MicroBatcher
+from app.inference import InferenceExecutor
+
+
+def _encode(payloads: list[int]) -> np.ndarray:
+    return np.array([[payload, payload * 2] for payload in payloads], dtype=np.float32)
+
+
+async def test_batched_results_match_submission_order() -> None:
+    executor = InferenceExecutor(workers=2)
+    batcher = MicroBatcher(_encode, executor, max_batch_size=4, max_wait_ms=5, max_pending=0)
+
+    vectors = await asyncio.gather(*(batcher.submit(index) for index in range(10)))
+
+    assert [vector.tolist() for vector in vectors] == [[index, index * 2] for index in range(10)]
+    assert batcher.stats.items == 10
+    assert batcher.stats.max_batch_size <= 4
+    await batcher.close()
+    executor.shutdown()
+
+
+async def test_encode_failure_is_raised_for_every_item_in_the_batch() -> None:
+    def fail(payloads: list[int]) -> np.ndarray:
+        raise RuntimeError("encoder failed")
+
+    executor = InferenceExecutor(workers=1)
+    batcher = MicroBatcher(fail, executor, max_batch_size=8, max_wait_ms=5, max_pending=0)
+
+    results = await asyncio.gather(*(batcher.submit(index) for index in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    with pytest.raises(RuntimeError):
+        await batcher.submit(0)
+    await batcher.close()
+    executor.shutdown()
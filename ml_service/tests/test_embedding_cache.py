@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.embedding_cache import EmbeddingCache
+
+
+def test_memory_tier_evicts_least_recently_used() -> None:
+    cache = EmbeddingCache("model", memory_entries=2)
+    a, b, c = (cache.key(code) for code in ("a", "b", "c"))
+    cache.put(a, np.ones(4))
+    cache.put(b, np.ones(4) * 2)
+    cache.get(a)
+    cache.put(c, np.ones(4) * 3)
+
+    assert cache.get(b) is None
+    assert cache.get(a) is not None
+    assert cache.stats()["memory_evictions"] == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path: Path) -> None:
+    vectors = {code: np.random.default_rng(index).normal(size=8).astype(np.float32) for index, code in enumerate("abc")}
+    cache = EmbeddingCache("model", memory_entries=0, disk_dir=str(tmp_path), disk_entries=2)
+    for code, vector in vectors.items():
+        cache.put(cache.key(code), vector)
+    cache.close()
+
+    reopened = EmbeddingCache("model", memory_entries=0, disk_dir=str(tmp_path), disk_entries=2)
+    assert reopened.get(reopened.key("a")) is None
+    np.testing.assert_array_equal(reopened.get(reopened.key("b")), vectors["b"])
+    np.testing.assert_array_equal(reopened.get(reopened.key("c")), vectors["c"])
+    assert reopened.stats()["disk_hits"] == 2
+
+    reopened.put(reopened.key("d"), vectors["a"])
+    assert reopened.get(reopened.key("b")) is None
+    reopened.close()
+
+
+def test_namespaces_do_not_share_disk_entries(tmp_path: Path) -> None:
+    first = EmbeddingCache("model-a", memory_entries=0, disk_dir=str(tmp_path), disk_entries=4)
+    first.put(first.key("code"), np.ones(4))
+    first.close()
+
+    second = EmbeddingCache("model-b", memory_entries=0, disk_dir=str(tmp_path), disk_entries=4)
+    assert second.get(second.key("code")) is None
+    second.close()
+
+
+def test_disk_hits_are_not_overwritten_by_later_puts(tmp_path: Path) -> None:
+    cache = EmbeddingCache("model", memory_entries=0, disk_dir=str(tmp_path), disk_entries=1)
+    cache.put(cache.key("a"), np.ones(4))
+
+    vector = cache.get(cache.key("a"))
+    cache.put(cache.key("b"), np.zeros(4))
+
+    np.testing.assert_array_equal(vector, np.ones(4))
+    assert not isinstance(vector, np.memmap)
+    cache.close()
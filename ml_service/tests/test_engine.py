@@ -0,0 +1,52 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.engine import AIEngine, _parse_sections, iter_token_windows
+
+
+class ReentrancyCheckingTokenizer:
+    def __init__(self) -> None:
+        self.active = 0
+        self.overlaps = 0
+        self._guard = threading.Lock()
+
+    def __call__(self, code: str, **kwargs: object) -> dict[str, list[int]]:
+        with self._guard:
+            self.active += 1
+            self.overlaps += self.active > 1
+        time.sleep(0.005)
+        with self._guard:
+            self.active -= 1
+        return {"input_ids": [len(code)]}
+
+
+def test_tokenizer_is_never_entered_by_two_workers_at_once() -> None:
+    engine = AIEngine()
+    engine.tokenizer = ReentrancyCheckingTokenizer()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        token_ids = list(pool.map(engine._token_ids, ["a" * size for size in range(1, 17)]))
+
+    assert token_ids == [[size] for size in range(1, 17)]
+    assert engine.tokenizer.overlaps == 0
+    engine.executor.shutdown()
+
+
+def test_token_windows_cover_every_token_with_the_requested_overlap() -> None:
+    tokens = list(range(24))
+
+    windows = list(iter_token_windows(tokens, window=10, overlap=3))
+
+    assert [start for start, _ in windows] == [0, 7, 14]
+    assert all(ids == tokens[start : start + 10] for start, ids in windows)
+    assert windows[-1][1][-1] == tokens[-1]
+    assert list(iter_token_windows([], window=10, overlap=3)) == [(0, [])]
+
+
+def test_single_shot_reply_is_parsed_from_surrounding_prose() -> None:
+    content = 'Sure! {"suggestions": ["- split handler", ""], "bugs": ["unchecked input"], "optimizations": "n/a"} Done.'
+
+    assert _parse_sections(content) == {"suggestions": ["split handler"], "bugs": ["unchecked input"]}
+    assert _parse_sections("no json here") is None
+    assert _parse_sections("{not json}") is None
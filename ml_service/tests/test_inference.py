@@ -0,0 +1,39 @@
+import copy
+
+import numpy as np
+import torch
+
+from app.inference import mean_pool, prepare_encoder
+
+
+class TinyEncoder(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.embed = torch.nn.Embedding(32, 16)
+        self.proj = torch.nn.Linear(16, 16)
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> object:
+        return type("Output", (), {"last_hidden_state": self.proj(self.embed(input_ids))})()
+
+
+def test_int8_encoder_stays_close_to_fp32() -> None:
+    torch.manual_seed(0)
+    model = TinyEncoder()
+    inputs = {"input_ids": torch.tensor([[1, 2, 3, 0]]), "attention_mask": torch.tensor([[1, 1, 1, 0]])}
+    reference = mean_pool(model, inputs)
+
+    quantized, precision = prepare_encoder(copy.deepcopy(model), "int8")
+    result = mean_pool(quantized, inputs)
+
+    assert precision == "int8"
+    assert isinstance(quantized.proj, torch.ao.nn.quantized.dynamic.Linear)
+    cosine = float(np.sum(reference * result) / (np.linalg.norm(reference) * np.linalg.norm(result)))
+    assert cosine > 0.99
+
+
+def test_mean_pool_ignores_padding() -> None:
+    model = TinyEncoder()
+    padded = mean_pool(model, {"input_ids": torch.tensor([[4, 5, 0, 0]]), "attention_mask": torch.tensor([[1, 1, 0, 0]])})
+    unpadded = mean_pool(model, {"input_ids": torch.tensor([[4, 5]]), "attention_mask": torch.tensor([[1, 1]])})
+
+    torch.testing.assert_close(torch.from_numpy(padded), torch.from_numpy(unpadded))
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.engine import AnalysisContext
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(main.app)
+
+
+def _context(code: str) -> AnalysisContext:
+    return AnalysisContext(code=code, language="python", embedding=np.ones(4, dtype=np.float32), digest="abc", similar_summary="none", started=0.0)
+
+
+def test_stream_sends_sections_before_the_encoded_result(client, monkeypatch) -> None:
+    async def prepare_analysis(code: str, language: str) -> AnalysisContext:
+        return _context(code)
+
+    async def stream_analysis(context: AnalysisContext):
+        yield {"type": "section", "section": "bugs", "items": ["unchecked input"]}
+        yield {"type": "section", "section": "suggestions", "items": []}
+        result = {"suggestions": [], "bugs": ["unchecked input"], "optimizations": [], "documentation": "", "score": 0.8}
+        yield {"type": "result", "result": {**result, "embedding": context.embedding}}
+
+    monkeypatch.setattr(main.engine, "prepare_analysis", prepare_analysis)
+    monkeypatch.setattr(main.engine, "stream_analysis", stream_analysis)
+
+    response = client.post("/analyze/stream", json={"code": "print(1)", "language": "python", "embedding_format": "f16"})
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [(event["type"], event.get("section")) for event in events] == [
+        ("section", "bugs"),
+        ("section", "suggestions"),
+        ("result", None),
+    ]
+    assert events[-1]["result"]["embedding_dtype"] == "f16"
+    assert "embedding" not in events[-1]["result"]
+
+
+def test_stream_ends_with_an_error_event_when_a_section_fails(client, monkeypatch) -> None:
+    async def prepare_analysis(code: str, language: str) -> AnalysisContext:
+        return _context(code)
+
+    async def stream_analysis(context: AnalysisContext):
+        yield {"type": "section", "section": "bugs", "items": []}
+        raise RuntimeError("llm unavailable")
+
+    monkeypatch.setattr(main.engine, "prepare_analysis", prepare_analysis)
+    monkeypatch.setattr(main.engine, "stream_analysis", stream_analysis)
+
+    response = client.post("/analyze/stream", json={"code": "print(1)", "language": "python"})
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [event["type"] for event in events] == ["section", "error"]
+    assert events[-1]["detail"] == "llm unavailable"
+
+
+@pytest.fixture
+def unloaded_engine(monkeypatch) -> None:
+    monkeypatch.setattr(main.engine, "start", lambda: None)
+    monkeypatch.setattr(main.engine, "model_state", "pending")
+    monkeypatch.setattr(main.settings, "model_ready_timeout_seconds", 0.01)
+
+
+def test_ready_is_unavailable_until_the_model_loads(client, unloaded_engine) -> None:
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "pending"
+
+    main.engine.model_state = "ready"
+    assert client.get("/ready").status_code == 200
+
+
+def test_analyze_is_gated_until_the_model_loads(client, unloaded_engine) -> None:
+    response = client.post("/analyze", json={"code": "print(1)", "language": "python"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert "pending" in response.json()["detail"]
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from app.transport import decode_embedding, encode_embedding
+
+
+@pytest.mark.parametrize("embedding_format", ["json", "f32", "f16"])
+def test_encoded_embeddings_decode_to_the_same_vector(embedding_format: str) -> None:
+    vector = np.random.default_rng(0).normal(size=768).astype(np.float32)
+
+    decoded = decode_embedding(encode_embedding(vector, embedding_format))
+
+    assert decoded.shape == vector.shape
+    tolerance = 1e-2 if embedding_format == "f16" else 0.0
+    np.testing.assert_allclose(decoded.astype(np.float32), vector, atol=tolerance)
+
+
+def test_binary_payload_reports_dtype_and_dimension() -> None:
+    payload = encode_embedding(np.zeros(4, dtype=np.float32), "f16")
+
+    assert payload["embedding_dtype"] == "f16"
+    assert payload["embedding_dim"] == 4
+    assert "embedding" not in payload
+    assert decode_embedding(encode_embedding(np.zeros(4), "none")) is None
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.vector_index import LocalVectorIndex
+
+
+def _vectors(count: int, dim: int = 16) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return {f"v{index}": rng.normal(size=dim).astype(np.float32) for index in range(count)}
+
+
+def test_index_reloads_vectors_and_metadata(tmp_path: Path) -> None:
+    vectors = _vectors(20)
+    index = LocalVectorIndex(str(tmp_path), initial_capacity=4)
+    for vector_id, vector in vectors.items():
+        index.upsert(vector_id, vector, {"language": "python", "id": vector_id})
+    index.upsert("v3", vectors["v3"], {"language": "go", "id": "v3"})
+    index.close()
+
+    reopened = LocalVectorIndex(str(tmp_path))
+    assert len(reopened) == 20
+    best = reopened.query(vectors["v3"], top_k=1)[0]
+    assert best["id"] == "v3"
+    assert best["metadata"] == {"language": "go", "id": "v3"}
+    assert abs(best["score"] - 1.0) < 1e-5
+    reopened.close()
+
+
+def test_ivf_search_finds_exact_matches() -> None:
+    vectors = _vectors(400)
+    index = LocalVectorIndex(ivf_lists=4, nprobe=4)
+    for vector_id, vector in vectors.items():
+        index.upsert(vector_id, vector)
+    index.train()
+
+    assert index.stats()["mode"] == "ivf"
+    assert all(index.query(vectors[vector_id], top_k=1)[0]["id"] == vector_id for vector_id in ("v0", "v199", "v399"))
+
+
+def test_full_index_overwrites_the_oldest_entry_across_restarts(tmp_path: Path) -> None:
+    vectors = _vectors(6)
+    index = LocalVectorIndex(str(tmp_path), max_entries=3, initial_capacity=2)
+    for vector_id in ("v0", "v1", "v2", "v3"):
+        index.upsert(vector_id, vectors[vector_id])
+    index.close()
+
+    reopened = LocalVectorIndex(str(tmp_path), max_entries=3)
+    reopened.upsert("v4", vectors["v4"])
+    ids = {match["id"] for match in reopened.query(vectors["v4"], top_k=10)}
+
+    assert ids == {"v2", "v3", "v4"}
+    assert len(reopened) == 3
+    reopened.close()
@@ -0,0 +1,16 @@
+-- CreateTable
+CREATE TABLE "repo_file_hashes" (
+    "id" UUID NOT NULL,
+    "user_id" TEXT NOT NULL,
+    "provider" TEXT NOT NULL,
+    "repository" TEXT NOT NULL,
+    "path" TEXT NOT NULL,
+    "content_hash" TEXT NOT NULL,
+    "report_id" UUID,
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "repo_file_hashes_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "repo_file_hashes_user_id_provider_repository_path_key" ON "repo_file_hashes"("user_id", "provider", "repository", "path");
@@ -0,0 +1,34 @@
+-- CreateTable
+CREATE TABLE "user_analysis_stats" (
+    "user_id" TEXT NOT NULL,
+    "total_analyses" INTEGER NOT NULL DEFAULT 0,
+    "score_sum" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "high_risk_count" INTEGER NOT NULL DEFAULT 0,
+    "recent_languages" JSONB NOT NULL DEFAULT '[]',
+    "updated_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "user_analysis_stats_pkey" PRIMARY KEY ("user_id")
+);
+
+-- Backfill
+INSERT INTO "user_analysis_stats" ("user_id", "total_analyses", "score_sum", "high_risk_count", "recent_languages")
+SELECT
+    "user_id",
+    COUNT(*)::int,
+    COALESCE(SUM("score"), 0),
+    (COUNT(*) FILTER (WHERE "score" < 0.5))::int,
+    COALESCE(
+        (
+            SELECT jsonb_agg(recent."language" ORDER BY recent."created_at" DESC, recent."id" DESC)
+            FROM (
+                SELECT "id", "language", "created_at"
+                FROM "analysis_reports" latest
+                WHERE latest."user_id" = reports."user_id"
+                ORDER BY "created_at" DESC, "id" DESC
+                LIMIT 5
+            ) recent
+        ),
+        '[]'::jsonb
+    )
+FROM "analysis_reports" reports
+GROUP BY "user_id";
@@ -0,0 +1,21 @@
+-- CreateTable
+CREATE TABLE "code_blobs" (
+    "hash" TEXT NOT NULL,
+    "encoding" TEXT NOT NULL,
+    "content" BYTEA NOT NULL,
+    "size" INTEGER NOT NULL,
+    "stored_size" INTEGER NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "code_blobs_pkey" PRIMARY KEY ("hash")
+);
+
+-- AlterTable
+ALTER TABLE "analysis_reports" ADD COLUMN "code_hash" TEXT,
+ALTER COLUMN "code" DROP NOT NULL;
+
+-- CreateIndex
+CREATE INDEX "analysis_reports_code_hash_idx" ON "analysis_reports"("code_hash");
+
+-- AddForeignKey
+ALTER TABLE "analysis_reports" ADD CONSTRAINT "analysis_reports_code_hash_fkey" FOREIGN KEY ("code_hash") REFERENCES "code_blobs"("hash") ON DELETE SET NULL ON UPDATE CASCADE;